@@ -21,3 +21,5 @@ class MarketItem(scrapy.Item):
     img = scrapy.Field()
     img_caption = scrapy.Field()
     content = scrapy.Field()
+    # Crawl frontier entry of the article page, recorded by CrawlerPipeline once the item is stored
+    frontier_entry = scrapy.Field()
@@ -3,12 +3,23 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import asyncio
+import hashlib
+import time
+
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
-from scrapy.http import HtmlResponse
-from selenium.webdriver.support.ui import WebDriverWait
+from scrapy.http import Headers, HtmlResponse
+from scrapy.responsetypes import responsetypes
+from twisted.internet import threads
+
+from Crawler.rendering import callback_wait_selectors
+from services.browser_pool import BrowserPool
+from services.frontier_store import FrontierStore
+from services.page_cache import PageCache
 
 
 class CrawlerSpiderMiddleware:
@@ -107,15 +118,335 @@ class CrawlerDownloaderMiddleware:
 
 
 class SeleniumMiddleware:
-    def process_request(self, request, spider):
-        if request.meta.get('use_selenium', False):
-            spider.driver.get(request.url)
-            
-            # Wait for the necessary elements to load. You can use explicit waits instead.
-            WebDriverWait(spider.driver, 10).until(
-                lambda d: d.execute_script('return document.readyState') == 'complete'
+    """
+    Renders requests flagged with meta['use_selenium'] in a shared pool of headless browsers.
+
+    The rendered DOM is returned as an HtmlResponse, so spider callbacks parse it with
+    Scrapy selectors instead of loading the page again. Spiders declare the CSS selectors
+    each callback needs in a `render_wait_for` dict keyed by callback name; the DOM is
+    captured as soon as they are present (meta['wait_for'] overrides this per request).
+    Rendering runs in the pool's threads, so the reactor keeps downloading while pages render.
+
+    The pool is shared by every crawler in the process and closed with the last spider.
+    Used when RENDER_BACKEND is 'selenium'; see Crawler.rendering.RenderedRequestMixin.
+    """
+    pool = None
+    open_spiders = 0
+
+    def __init__(self, pool_size=2, max_pages_per_browser=50, timeout=20):
+        self.pool_size = pool_size
+        self.max_pages_per_browser = max_pages_per_browser
+        self.timeout = timeout
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        s = cls(
+            pool_size=settings.getint('BROWSER_POOL_SIZE', 2),
+            max_pages_per_browser=settings.getint('BROWSER_MAX_PAGES', 50),
+            timeout=settings.getfloat('BROWSER_RENDER_TIMEOUT', 20),
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def spider_opened(self, spider):
+        cls = self.__class__
+        if cls.pool is None:
+            cls.pool = BrowserPool(
+                size=self.pool_size,
+                max_pages_per_browser=self.max_pages_per_browser,
+                timeout=self.timeout,
             )
-            
-            # Get the HTML source and build a HtmlResponse object
-            body = spider.driver.page_source
-            return HtmlResponse(url=spider.driver.current_url, body=body, encoding='utf-8', request=request)
+        cls.open_spiders += 1
+
+    def spider_closed(self, spider):
+        cls = self.__class__
+        cls.open_spiders -= 1
+        if cls.open_spiders == 0 and cls.pool is not None:
+            pool, cls.pool = cls.pool, None
+            # Closing joins the browser threads; do it off the reactor so other crawls keep going
+            return threads.deferToThread(pool.close)
+
+    @staticmethod
+    def wait_selectors(request, spider):
+        """Returns the CSS selectors to wait for before capturing the page for `request`."""
+        if 'wait_for' in request.meta:
+            return request.meta['wait_for']
+        return callback_wait_selectors(spider, request.callback)
+
+    async def process_request(self, request, spider):
+        if not request.meta.get('use_selenium', False):
+            return None
+
+        future = self.pool.submit(request.url, wait_for=self.wait_selectors(request, spider))
+        try:
+            url, body = await asyncio.wrap_future(future)
+        except Exception as e:
+            spider.logger.error(f"Error rendering {request.url}: {e}")
+            raise IgnoreRequest(f"Error rendering {request.url}: {e}")
+
+        # Get the HTML source and build a HtmlResponse object
+        return HtmlResponse(url=url, body=body, encoding='utf-8', request=request)
+
+
+class IncrementalCrawlMiddleware:
+    """
+    Skips article pages that an earlier run already crawled, before they are downloaded.
+
+    Requests whose callback is listed in FRONTIER_CALLBACKS (the article callbacks; listing
+    pages are always fetched) are looked up by request fingerprint in a persistent
+    FrontierStore. A page crawled before is dropped with IgnoreRequest, so it is not fetched,
+    rendered or translated again. When FRONTIER_REVISIT_AFTER is set, pages last fetched
+    that many seconds ago are fetched again, but only reach the spider if their content hash
+    changed.
+
+    A fetched page is not recorded here: its fingerprint, URL and content hash are left in
+    meta['frontier_entry'], FrontierItemMiddleware copies them onto the page's item, and
+    CrawlerPipeline records them once the item made it through dedup and into the database.
+    A page whose parsing, translation or insert fails is therefore fetched again next run.
+    Pages the spider rejects by date are recorded by FrontierItemMiddleware instead.
+
+    The store is shared by every crawler in the process and closed with the last spider.
+    """
+    store = None
+    open_spiders = 0
+
+    def __init__(self, crawler, path, callbacks, revisit_after=0, max_age_days=30):
+        self.crawler = crawler
+        self.path = path
+        self.callbacks = set(callbacks)
+        self.revisit_after = revisit_after
+        self.max_age_days = max_age_days
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('FRONTIER_ENABLED', True):
+            raise NotConfigured("Incremental crawling is disabled")
+        s = cls(
+            crawler,
+            path=settings.get('FRONTIER_PATH', '.frontier.sqlite'),
+            callbacks=settings.getlist('FRONTIER_CALLBACKS', ['parse_news_content', 'parse_article_content']),
+            revisit_after=settings.getfloat('FRONTIER_REVISIT_AFTER', 0),
+            max_age_days=settings.getfloat('FRONTIER_MAX_AGE_DAYS', 30),
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def spider_opened(self, spider):
+        cls = self.__class__
+        if cls.store is None:
+            cls.store = FrontierStore(self.path)
+            if self.max_age_days:
+                cls.store.prune(self.max_age_days * 86400)
+        cls.open_spiders += 1
+
+    def spider_closed(self, spider):
+        cls = self.__class__
+        cls.open_spiders -= 1
+        if cls.open_spiders == 0 and cls.store is not None:
+            cls.store.close()
+            cls.store = None
+
+    def tracked(self, request):
+        """Returns True if `request` fetches an article page the frontier keeps track of."""
+        return getattr(request.callback, '__name__', None) in self.callbacks
+
+    def fingerprint(self, request):
+        return self.crawler.request_fingerprinter.fingerprint(request).hex()
+
+    def process_request(self, request, spider):
+        if not self.tracked(request):
+            return None
+
+        entry = self.store.get(self.fingerprint(request))
+        if entry is None:
+            return None
+        if self.revisit_after and time.time() - entry['last_seen'] >= self.revisit_after:
+            request.meta['frontier_content_hash'] = entry['content_hash']
+            return None
+
+        self.crawler.stats.inc_value('frontier/skipped')
+        raise IgnoreRequest(f"Already crawled {request.url}")
+
+    def process_response(self, request, response, spider):
+        if not self.tracked(request) or response.status != 200:
+            return response
+
+        content_hash = hashlib.sha1(response.body).hexdigest()
+        if request.meta.get('frontier_content_hash') == content_hash:
+            # Processed successfully by an earlier run; only the fetch time changes
+            self.store.record(self.fingerprint(request), request.url, content_hash)
+            self.crawler.stats.inc_value('frontier/unchanged')
+            raise IgnoreRequest(f"Content of {request.url} has not changed since the last crawl")
+
+        request.meta['frontier_entry'] = {
+            'fingerprint': self.fingerprint(request),
+            'url': request.url,
+            'content_hash': content_hash,
+        }
+        self.crawler.stats.inc_value('frontier/fetched')
+        return response
+
+
+class FrontierItemMiddleware:
+    """
+    Spider middleware that copies the frontier entry of an article page onto the items
+    parsed from it, so CrawlerPipeline can mark the page as crawled once the item is stored.
+    Items without a `frontier_entry` field are passed on unchanged.
+
+    A page the spider rejected for good (an article outside the date window) produces no
+    item, so the spider sets meta['frontier_rejected'] instead and the page is recorded here
+    once its callback has finished. Pages that fail to parse or translate are not flagged
+    and are fetched again next run.
+    """
+
+    @staticmethod
+    def tag(response, output):
+        entry = response.meta.get('frontier_entry')
+        if entry is not None and is_item(output):
+            adapter = ItemAdapter(output)
+            if 'frontier_entry' in adapter.field_names():
+                adapter['frontier_entry'] = entry
+        return output
+
+    @staticmethod
+    def record_rejected(response, spider):
+        entry = response.meta.get('frontier_entry')
+        store = IncrementalCrawlMiddleware.store
+        if entry is None or store is None or not response.meta.get('frontier_rejected'):
+            return
+        try:
+            store.record(entry['fingerprint'], entry['url'], entry['content_hash'])
+            spider.crawler.stats.inc_value('frontier/rejected')
+        except Exception as e:
+            spider.logger.error(f"Error recording rejected page {entry['url']} in the crawl frontier: {e}")
+
+    def process_spider_output(self, response, result, spider):
+        for output in result:
+            yield self.tag(response, output)
+        self.record_rejected(response, spider)
+
+    async def process_spider_output_async(self, response, result, spider):
+        async for output in result:
+            yield self.tag(response, output)
+        self.record_rejected(response, spider)
+
+
+class ConditionalGetMiddleware:
+    """
+    Revalidates listing pages with conditional GET requests instead of downloading them again.
+
+    Requests for the CONDITIONAL_GET_CALLBACKS callbacks (the listing parsers) carry the
+    If-None-Match / If-Modified-Since validators stored from the previous fetch. When the
+    server answers 304 Not Modified, or sends a body identical to the stored one, the stored
+    page is passed to the callback instead of a new download (CONDITIONAL_GET_SERVE_CACHED,
+    on by default). The listing is still parsed, so the crawl frontier decides which of its
+    articles are requested: an article whose insert failed, or that a crashed run never got
+    to, is fetched again even though the listing has not changed. With serving turned off
+    the request is dropped with IgnoreRequest and none of the listing's articles are
+    requested. Pages rendered in a browser are not revalidated.
+
+    The store is shared by every crawler in the process and closed with the last spider.
+    """
+    store = None
+    open_spiders = 0
+
+    def __init__(self, crawler, path, callbacks, serve_cached=True):
+        self.crawler = crawler
+        self.path = path
+        self.callbacks = set(callbacks)
+        self.serve_cached = serve_cached
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CONDITIONAL_GET_ENABLED', True):
+            raise NotConfigured("Conditional GET caching is disabled")
+        s = cls(
+            crawler,
+            path=settings.get('CONDITIONAL_GET_PATH', '.page_cache.sqlite'),
+            callbacks=settings.getlist('CONDITIONAL_GET_CALLBACKS', ['parse', 'parse_articles']),
+            serve_cached=settings.getbool('CONDITIONAL_GET_SERVE_CACHED', True),
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def spider_opened(self, spider):
+        cls = self.__class__
+        if cls.store is None:
+            cls.store = PageCache(self.path)
+        cls.open_spiders += 1
+
+    def spider_closed(self, spider):
+        cls = self.__class__
+        cls.open_spiders -= 1
+        if cls.open_spiders == 0 and cls.store is not None:
+            cls.store.close()
+            cls.store = None
+
+    def tracked(self, request):
+        """Returns True if `request` fetches a listing page that is revalidated."""
+        if request.meta.get('use_selenium') or request.meta.get('playwright'):
+            return False
+        # Requests built from start_urls have no callback and go to parse
+        return getattr(request.callback, '__name__', 'parse') in self.callbacks
+
+    def fingerprint(self, request):
+        return self.crawler.request_fingerprinter.fingerprint(request).hex()
+
+    def process_request(self, request, spider):
+        if not self.tracked(request):
+            return None
+
+        entry = self.store.get(self.fingerprint(request))
+        if entry is None:
+            return None
+        if entry['etag']:
+            request.headers.setdefault('If-None-Match', entry['etag'])
+        if entry['last_modified']:
+            request.headers.setdefault('If-Modified-Since', entry['last_modified'])
+        request.meta['conditional_get_hash'] = entry['body_hash']
+        return None
+
+    def process_response(self, request, response, spider):
+        if 'conditional_get_hash' not in request.meta and not self.tracked(request):
+            return response
+
+        fingerprint = self.fingerprint(request)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        etag = etag.decode('latin-1') if etag else None
+        last_modified = last_modified.decode('latin-1') if last_modified else None
+
+        if response.status == 304 and 'conditional_get_hash' in request.meta:
+            self.store.touch(fingerprint, etag, last_modified)
+            self.crawler.stats.inc_value('conditional_get/not_modified')
+            return self.unchanged(request, fingerprint)
+        if response.status != 200:
+            return response
+
+        if PageCache.body_hash(response.body) == request.meta.get('conditional_get_hash'):
+            self.store.touch(fingerprint, etag, last_modified)
+            self.crawler.stats.inc_value('conditional_get/unchanged')
+            return self.unchanged(request, fingerprint)
+
+        content_type = response.headers.get('Content-Type')
+        headers = {'Content-Type': content_type.decode('latin-1')} if content_type else {}
+        self.store.put(fingerprint, response.url, response.body, etag, last_modified, headers)
+        self.crawler.stats.inc_value('conditional_get/stored')
+        return response
+
+    def unchanged(self, request, fingerprint):
+        """Handles a listing page that has not changed since it was stored."""
+        if not self.serve_cached:
+            raise IgnoreRequest(f"{request.url} has not changed since the last crawl")
+
+        entry = self.store.get(fingerprint)
+        body = self.store.body(fingerprint)
+        headers = Headers(entry['headers'])
+        response_cls = responsetypes.from_args(headers=headers, url=entry['url'], body=body)
+        return response_cls(url=entry['url'], status=200, headers=headers, body=body, request=request)
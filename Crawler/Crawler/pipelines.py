@@ -6,42 +6,100 @@
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
-import mysql.connector
-from mysql.connector import Error 
 from scrapy.exceptions import DropItem
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
 import os
-from supabase import create_client, Client
 from scrapy.exceptions import NotConfigured
+from twisted.internet import defer, threads
 
-import pandas as pd
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import re
-import spacy
-import mysql.connector  # Needed for MySQL database connection
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from services.cpu_pool import cpu_pool, encode, lemmatize
+from services.embedding_store import EmbeddingStore
+from services.frontier_store import FrontierStore
+from services.grouping import group_similar_articles
+from services.item_store import ItemStore
+from services.metrics import metrics
+from services.model_registry import embedding_backend
+from services.openai_config import openai_base_url
+from services.run_artifacts import item_record, run_artifacts
+from services.similarity_index import build_similarity_index, normalize_rows
+from services.supabase_writer import SupabaseBatchWriter
+from services.wordpress_writer import WordPressWriter
+
+# Sentence embedding model shared by the dedup and grouping stages
+EMBEDDING_MODEL_NAME = 'multi-qa-mpnet-base-cos-v1'
+# spaCy pipeline the grouping stage lemmatises article contents with
+SPACY_MODEL_NAME = 'en_core_web_md'
+
+EMBEDDING_BATCH_SECONDS = metrics.histogram('crawler_embedding_batch_seconds', 'SentenceTransformer encode calls', ['stage'])
+EMBEDDED_TEXTS = metrics.counter('crawler_embedded_texts_total', 'Texts encoded with the SentenceTransformer', ['stage'])
+LEMMATIZE_SECONDS = metrics.histogram('crawler_lemmatize_batch_seconds', 'spaCy lemmatisation batches')
+SIMILARITY_QUERY_SECONDS = metrics.histogram('crawler_similarity_query_seconds', 'Similarity searches', ['stage'])
+LLM_REQUEST_SECONDS = metrics.histogram('crawler_llm_request_seconds', 'Chat completion requests for drafts')
+LLM_RETRIES = metrics.counter('crawler_llm_retries_total', 'Draft requests retried after a rate limit or failure')
+DRAFTS = metrics.counter('crawler_drafts_total', 'Article groups drafted', ['outcome'])
+DEDUP_DROPPED = metrics.counter('crawler_dedup_dropped_items_total', 'Items dedup did not insert', ['reason'])
+STAGE_SECONDS = metrics.histogram('crawler_pipeline_stage_seconds', 'Dedup, grouping and drafting runs', ['stage'])
+
+
+def encode_texts(texts, stage, **kwargs):
+    """
+    Encodes `texts` with the shared SentenceTransformer, recording the call in the embedding metrics.
+
+    With CPU_WORKERS set, the texts are split across the CPU pool's worker processes, so the
+    reactor is not blocked while they are encoded; otherwise they are encoded in-process.
 
-import openai
+    Args:
+        texts (List[str]): The texts to encode.
+        stage (str): Metrics label of the caller, e.g. 'dedup' or 'grouping'.
+        **kwargs: Passed on to `SentenceTransformer.encode`.
+
+    Returns:
+        np.ndarray: The embeddings `model.encode` returned.
+    """
+    with EMBEDDING_BATCH_SECONDS.time(stage=stage):
+        embeddings = np.concatenate(cpu_pool().map(encode, list(texts), EMBEDDING_MODEL_NAME, **kwargs))
+    EMBEDDED_TEXTS.inc(len(texts), stage=stage)
+    return embeddings
 
 class AccumulatePipeline:
     """
     A pipeline that accumulates all items processed by spiders.
     
     This pipeline is designed to collect all items scraped during the run
-    of multiple spiders or multiple runs of the same spider, allowing for
-    bulk processing or analysis at a later stage.
+    of multiple spiders, allowing for bulk processing or analysis at a later stage.
+    Items are kept in an ItemStore shared by all crawlers of the process, which holds
+    them as compact records and spills them to a temporary file past
+    ITEM_STORE_MEMORY_MB. Call `reset` once a run's items have been processed.
     """
     # This class variable will store all items from all spiders
-    accumulated_items = []
+    store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if cls.store is None:
+            settings = crawler.settings
+            cls.store = ItemStore(
+                memory_budget=settings.getint('ITEM_STORE_MEMORY_MB', 256) * 1024 * 1024,
+                spill_dir=settings.get('ITEM_STORE_SPILL_DIR'),
+            )
+        return cls()
 
     def process_item(self, item, spider):
-        # Add the item to the class-level list
         try:
-            # Add the item to the class-level list
-            self.__class__.accumulated_items.append(item)
+            # Add the item to the class-level store
+            self.__class__.store.append(item)
+            artifacts = run_artifacts()
+            if artifacts.enabled:
+                artifacts.write('scraped_items', item_record(item, spider=spider.name))
         except Exception as e:
             spider.logger.error(f"Error accumulating item: {e}")
         # Make sure to return the item to continue the pipeline process
@@ -53,31 +111,81 @@ class AccumulatePipeline:
         Provides access to all accumulated items.
 
         Returns:
-            A list of all items accumulated over the course of the spider(s) run.
+            ItemStore: The items accumulated over the course of the spider(s) run; iterating
+            it reads them lazily, and `batches(size)` yields them a list at a time.
         """
-        # Access method to get all accumulated items
-        return cls.accumulated_items
+        if cls.store is None:
+            cls.store = ItemStore()
+        return cls.store
+
+    @classmethod
+    def reset(cls):
+        """Drops the accumulated items, so the next run in this process starts empty."""
+        if cls.store is not None:
+            stats = cls.store.stats()
+            logging.info(f"Clearing {stats['items']} accumulated items ({stats['spilled']} spilled to disk)")
+            cls.store.clear()
 
 class CrawlerPipeline:
     # pass
-    def __init__(self):
+    def __init__(self, supabase_client=None):
         """
         Initializes the spider with necessary configurations and resources.
         
         - Loads environment variables.
-        - Initializes the SentenceTransformer model.
         - Validates and sets up Supabase connection.
+        - Opens the on-disk embedding store.
         - Fetches existing headers embeddings from the database.
+
+        Args:
+            supabase_client (optional): A Supabase client, or a local stand-in exposing the same
+                `table(...).select(...)` and `table(...).insert(...)` calls. By default a client is
+                created from SUPABASE_URL and SUPABASE_KEY.
         """
         load_dotenv()
         try:
-            # Initialize SentenceTransformer model
-            self.model = SentenceTransformer('multi-qa-mpnet-base-cos-v1')
+            # Embeddings of already seen headers persist between runs, keyed by header hash
+            store_dir = os.environ.get('EMBEDDING_STORE_DIR', '.embedding_store')
+            self.embedding_store = EmbeddingStore(store_dir, EMBEDDING_MODEL_NAME, embedding_backend())
         except Exception as e:
-            raise NotConfigured(f"Error initializing SentenceTransformer model: {e}")
-        
-        
-        
+            raise NotConfigured(f"Error opening embedding store: {e}")
+
+
+        if supabase_client is not None:
+            self.supabase = supabase_client
+        else:
+            self.supabase = self.create_supabase_client()
+
+        try:
+            # 'exact' scores against every stored header, 'ivf' only against the closest clusters
+            self.similarity_index = build_similarity_index(os.environ.get('SIMILARITY_INDEX', 'exact'))
+        except ValueError as e:
+            raise NotConfigured(f"Error creating similarity index: {e}")
+
+        try:
+            # Fetch existing headers embeddings from the database
+            existing_headers_embeddings = self.fetch_existing_headers_embeddings()
+            if existing_headers_embeddings.size:
+                self.similarity_index.add(existing_headers_embeddings)
+        except Exception as e:
+            # Log and handle any errors encountered during fetch operation
+            raise NotConfigured(f"Error fetching existing headers embeddings: {e}")
+
+        # Headers at or above this cosine similarity are treated as duplicates
+        self.similarity_threshold = 0.98
+        # Number of headers encoded per forward pass and compared per similarity block
+        self.encode_batch_size = int(os.environ.get('ENCODE_BATCH_SIZE', 64))
+        # Rows per Supabase insert request, and retries of a request that fails with a transient
+        # (connection or 5xx) error; a request rejected for its rows is split without retrying
+        self.insert_chunk_size = int(os.environ.get('SUPABASE_INSERT_CHUNK_SIZE', 100))
+        self.insert_max_retries = int(os.environ.get('SUPABASE_INSERT_RETRIES', 3))
+        # Crawl frontier the article pages of stored items are recorded in; opened on first use
+        self.frontier_path = os.environ.get('FRONTIER_PATH', '.frontier.sqlite')
+        self.frontier = None
+
+    @staticmethod
+    def create_supabase_client():
+        """Creates a Supabase client from SUPABASE_URL and SUPABASE_KEY."""
         # Retrieve Supabase connection parameters from environment variables
         supabase_url = os.environ.get('SUPABASE_URL')
         supabase_key = os.environ.get('SUPABASE_KEY')
@@ -86,96 +194,122 @@ class CrawlerPipeline:
 
         try:
             print('Initializing Supabase client...')
+            # Imported here so the client library only loads when the stage runs
+            from supabase import create_client
             # Create a Supabase client instance
-            self.supabase: Client = create_client(supabase_url, supabase_key)
+            return create_client(supabase_url, supabase_key)
         except Exception as e:
             raise NotConfigured(f"Error initializing Supabase client: {e}")
 
-        try:
-            # Fetch existing headers embeddings from the database
-            self.existing_headers_embeddings = self.fetch_existing_headers_embeddings()
-        except Exception as e:
-            # Log and handle any errors encountered during fetch operation
-            raise NotConfigured(f"Error fetching existing headers embeddings: {e}")
-        
-        self.item_cache = [] 
-
     def fetch_existing_headers_embeddings(self):
         """
         Fetches existing news headers from the Supabase database and generates embeddings.
 
-        Uses the SentenceTransformer model initialized in the spider to encode the headers into embeddings.
+        Headers already present in the embedding store are read from disk; only headers
+        that have not been seen before are encoded with the SentenceTransformer model.
 
         Returns:
-            A tensor of embeddings if there are existing headers, otherwise an empty numpy array.
+            A numpy array of embeddings if there are existing headers, otherwise an empty numpy array.
+
+        Raises:
+            Exception: If the headers cannot be fetched or encoded (e.g. the model fails to
+                load). Deduplicating against an empty archive would re-insert every known
+                headline, so `__init__` turns this into NotConfigured instead.
         """
         # Fetch existing headers from the database and create embeddings
         result = self.supabase.table('news').select('header').execute()
-        try:
-            existing_headers = [row['header'] for row in result.data] if result.data else []
-            # Check if there are any headers to encode
-            if existing_headers:
-                embeddings = self.model.encode(existing_headers, convert_to_tensor=True)
-            else:
-                # Handle the case where there are no existing headers
-                embeddings = np.array([])  # Create an empty array or handle appropriately
-        except Exception as e:
-            # Log and handle any errors encountered during the encoding process
-            logging.error(f"Error encoding existing headers: {e}")
-            embeddings = np.array([])
+        existing_headers = [row['header'] for row in result.data if row.get('header')] if result.data else []
+        # Check if there are any headers to encode
+        if existing_headers:
+            embeddings = self.embedding_store.sync(
+                existing_headers, lambda texts: encode_texts(texts, 'archive'))
+        else:
+            # Handle the case where there are no existing headers
+            embeddings = np.array([])  # Create an empty array or handle appropriately
 
         return embeddings
 
-    def header_similarity(self, header):
+    def find_unique_headers(self, header_embeddings, archive_similarities):
         """
-        Calculates the cosine similarity between a new header's embedding and existing headers' embeddings.
+        Selects the headers of a batch that are neither near-duplicates of the archive nor of each other.
+
+        Within the batch the first occurrence of a header wins; a later header is dropped when it
+        is too similar to any earlier header that was kept. Similarities are computed one block of
+        rows at a time as a matrix product, so the batch never needs per-pair Python calls.
 
         Args:
-            header (str): The text of the new header for which similarity is to be calculated.
+            header_embeddings (np.ndarray): Unit-length header embeddings, one row per item.
+            archive_similarities (np.ndarray): Each header's highest similarity with the archive.
 
         Returns:
-            float: The highest cosine similarity score with the existing headers. Returns 0 if there are no existing headers to compare.
+            List[int]: Positions of the headers to keep, in batch order.
         """
+        keep = archive_similarities < self.similarity_threshold
+        for start in range(0, len(header_embeddings), self.encode_batch_size):
+            end = start + self.encode_batch_size
+            # Similarity of this block of headers with every header before it in the batch
+            block_similarities = header_embeddings[start:end] @ header_embeddings[:end].T
+            for offset, similarities in enumerate(block_similarities):
+                position = start + offset
+                if keep[position] and np.any(similarities[:position][keep[:position]] >= self.similarity_threshold):
+                    keep[position] = False
+        return np.nonzero(keep)[0].tolist()
 
-        try:
-            # Create an embedding for the new header and compare with existing ones
-            new_header_embedding = self.model.encode(header, convert_to_tensor=True)
-            if self.existing_headers_embeddings.size == 0:
-            # Return a default similarity value (e.g., 0) if there are no existing embeddings
-                return 0
-            else:
-                # Calculate similarity only if there are existing embeddings
-                similarities = cosine_similarity(
-                    new_header_embedding.reshape(1, -1),
-                    self.existing_headers_embeddings
-                )
-                return np.max(similarities)
-        except Exception as e:
-            # Log any errors encountered during the process.
-            logging.error(f"Error calculating header similarity for '{header}': {e}")
-            # Return a default value to indicate failure in calculation.
-            return -1
-    
     def process_item(self, items):
         """
-        Processes each item by calculating its header similarity and inserting it into Supabase if unique enough.
-        
+        Processes a batch of items by calculating their header similarity and inserting the unique ones into Supabase.
+
+        All headers are encoded in a single batched `encode` call and scored against the
+        archive in one similarity-index query; items are also deduplicated against each other.
+
         Args:
-            item: The item being processed.
-            spider: The spider that scraped the item.
+            items (Iterable[scrapy.Item]): The items being processed, e.g. one batch of the
+                AccumulatePipeline store; later batches are deduplicated against earlier ones.
             
         Returns:
-            The item if it was successfully processed and inserted into the database.
+            List[scrapy.Item]: The items of this batch that were inserted into the database.
+            Earlier batches' items are not kept, so callers that need every inserted item
+            (e.g. batch-mode grouping) collect them.
         """
         table = "news"
-        for item in items:
-            try:
-                similarity = self.header_similarity(item.get('header'))
-                logging.info(f"Similarity for {item.get('header')}: {similarity}")
-            except Exception as e:
-                logging.error(f"Error calculating similarity: {str(e)}")
-                raise DropItem("Error calculating similarity.")
-            
+        items = list(items)
+        headerless = [item for item in items if not item.get('header')]
+        for item in headerless:
+            logging.warning(f"Item dropped without a header: {(item.get('frontier_entry') or {}).get('url')}")
+        if headerless:
+            DEDUP_DROPPED.inc(len(headerless), reason='no_header')
+            # The pages have no article header; fetching them again would not change that
+            self.record_crawled(headerless)
+            items = [item for item in items if item.get('header')]
+        if not items:
+            return []
+
+        headers = [item.get('header') for item in items]
+        try:
+            header_embeddings = normalize_rows(encode_texts(headers, 'dedup', batch_size=self.encode_batch_size))
+            with SIMILARITY_QUERY_SECONDS.time(stage='dedup_archive'):
+                archive_similarities = self.similarity_index.max_similarity(header_embeddings)
+            with SIMILARITY_QUERY_SECONDS.time(stage='dedup_batch'):
+                unique_positions = self.find_unique_headers(header_embeddings, archive_similarities)
+        except Exception as e:
+            logging.error(f"Error calculating similarity: {str(e)}")
+            raise DropItem("Error calculating similarity.")
+
+        unique = set(unique_positions)
+        for position, item in enumerate(items):
+            logging.info(f"Similarity for {item.get('header')}: {archive_similarities[position]}")
+            if position not in unique:
+                logging.info(f"Item not inserted due to high similarity: {item.get('header', '')}")
+        DEDUP_DROPPED.inc(len(items) - len(unique_positions), reason='duplicate')
+
+        writer = SupabaseBatchWriter(
+            self.supabase,
+            table,
+            chunk_size=self.insert_chunk_size,
+            max_retries=self.insert_max_retries,
+        )
+        for position in unique_positions:
+            item = items[position]
             # If the item does not exist, proceed with insertion
             data = {
                 'created_at': item.get('date'),
@@ -186,20 +320,42 @@ class CrawlerPipeline:
                 'img_caption': item.get('img_caption'),
                 'content': item.get('content')
             }
-            if similarity < 0.98:
-                try:
-                    response = self.supabase.table(table).insert(data).execute()
-                    logging.info("Item inserted to Supabase successfully")
-                    self.item_cache.append(item)  # Add the item to the cache
-                except Exception as e:
-                    # Handle any exceptions thrown during the insert attempt, which may include HTTP errors
-                    logging.error(f"Error inserting item to Supabase: {str(e)}")
-                    raise DropItem(f"Error inserting item to Supabase: {str(e)}")
-            else:
-                logging.info(f"Item not inserted due to high similarity: {item.get('header', '')}")
-                raise DropItem(f"Item too similar to existing entries: {item}")
+            writer.add(data, key=position)
+        writer.flush()
+
+        inserted_positions = [outcome.key for outcome in writer.outcomes if outcome.ok]
+        failed = len(writer.outcomes) - len(inserted_positions)
+        logging.info(f"Inserted {len(inserted_positions)} items to Supabase, {failed} failed")
+        if inserted_positions:
+            run_artifacts().write_many('inserted_items', (item_record(items[position]) for position in inserted_positions))
+            inserted_embeddings = header_embeddings[inserted_positions]
+            # Persist the new headers' embeddings so the next run does not encode them again
+            self.embedding_store.add([items[position].get('header') for position in inserted_positions], inserted_embeddings)
+            # Later items in this run are compared against the new headers as well
+            self.similarity_index.add(inserted_embeddings)
+
+        # Inserted items and duplicates are done with; items whose insert failed are fetched again next run
+        failed_positions = {outcome.key for outcome in writer.outcomes if not outcome.ok}
+        self.record_crawled(item for position, item in enumerate(items) if position not in failed_positions)
+
+        return [items[position] for position in inserted_positions]
+
+    def record_crawled(self, items):
+        """
+        Marks the article pages of `items` as crawled in the frontier, so later runs skip them.
 
-        return self.item_cache
+        Only items carrying a `frontier_entry` (set by FrontierItemMiddleware) are recorded.
+        """
+        entries = [item.get('frontier_entry') for item in items if item.get('frontier_entry')]
+        if not entries:
+            return
+        try:
+            if self.frontier is None:
+                self.frontier = FrontierStore(self.frontier_path)
+            self.frontier.record_many(entries)
+        except Exception as e:
+            # The pages are fetched again next run and dropped as duplicates then
+            logging.error(f"Error recording {len(entries)} pages in the crawl frontier: {e}")
 
 class ComparePipeline:
     """
@@ -209,21 +365,23 @@ class ComparePipeline:
     # pass
     def __init__(self):
         """
-        Initializes the ComparePipeline with pre-loaded NLP models and sets the similarity threshold.
+        Initializes the ComparePipeline and sets the similarity threshold.
+
+        The spaCy and SentenceTransformer models come from the shared model registry and
+        are only loaded when articles are first grouped.
         """
-        try:
-            self.nlp = spacy.load('en_core_web_md')
-        except Exception as e:
-            # Handle exceptions related to SpaCy model loading
-            print(f"Failed to load SpaCy model: {e}")
-            
-        try:
-            self.model = SentenceTransformer('multi-qa-mpnet-base-cos-v1')
-        except Exception as e:
-            # Handle exceptions related to Sentence Transformer model loading
-            print(f"Failed to load Sentence Transformer model: {e}")
-        
         self.threshold = 0.85
+        # 'leader' reproduces the original greedy groups, 'union_find' groups transitively
+        self.grouping_method = os.environ.get('GROUPING_METHOD', 'leader')
+        # Optional cap on the neighbours considered per article (0 means no cap)
+        self.grouping_top_k = int(os.environ.get('GROUPING_TOP_K', 0)) or None
+        # spaCy batching; SPACY_N_PROCESS > 1 lemmatises in several worker processes when the
+        # CPU pool is disabled (with CPU_WORKERS set, the pool's workers split the texts instead)
+        self.spacy_batch_size = int(os.environ.get('SPACY_BATCH_SIZE', 64))
+        self.spacy_n_process = int(os.environ.get('SPACY_N_PROCESS', 1))
+        # Lemmatised text per content hash, least recently used first
+        self.lemma_cache = OrderedDict()
+        self.lemma_cache_size = int(os.environ.get('LEMMA_CACHE_SIZE', 10000))
         self.grouped_articles = []
 
     def preprocess_text(self, text):
@@ -239,54 +397,99 @@ class ComparePipeline:
         Returns:
             str: The preprocessed and lemmatized text as a single string.
         """
-        doc = self.nlp(text.lower())
-        lemmatized_text = ' '.join([token.lemma_ for token in doc if not token.is_stop and not token.is_punct and not token.like_num])
-        return lemmatized_text
+        return self.preprocess_texts([text])[0]
+
+    def preprocess_texts(self, texts):
+        """
+        Preprocesses a batch of texts the same way as `preprocess_text`.
+
+        Texts are streamed through `nlp.pipe` with the parser and NER disabled, since only
+        lemmas and the stopword, punctuation and number flags are used; with CPU_WORKERS set
+        this runs in the CPU pool's worker processes. Results are cached per content hash,
+        so a text that was already lemmatised is not parsed again.
+
+        Args:
+            texts (List[str]): The texts to be preprocessed.
+
+        Returns:
+            List[str]: The preprocessed and lemmatized texts, in the same order.
+        """
+        results = [None] * len(texts)
+        missing = {}  # content hash -> positions of texts not in the cache
+        for position, text in enumerate(texts):
+            key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+            if key in self.lemma_cache:
+                self.lemma_cache.move_to_end(key)
+                results[position] = self.lemma_cache[key]
+            else:
+                missing.setdefault(key, []).append(position)
+
+        if missing:
+            keys = list(missing)
+            pool = cpu_pool()
+            with LEMMATIZE_SECONDS.time():
+                chunks = pool.map(
+                    lemmatize,
+                    [texts[missing[key][0]].lower() for key in keys],
+                    SPACY_MODEL_NAME,
+                    batch_size=self.spacy_batch_size,
+                    n_process=1 if pool.enabled else self.spacy_n_process,
+                )
+            lemmatized_texts = [lemmatized_text for chunk in chunks for lemmatized_text in chunk]
+            for key, lemmatized_text in zip(keys, lemmatized_texts):
+                for position in missing[key]:
+                    results[position] = lemmatized_text
+                self.lemma_cache[key] = lemmatized_text
+            # Drop the least recently used entries once the cache is over its limit
+            while len(self.lemma_cache) > self.lemma_cache_size:
+                self.lemma_cache.popitem(last=False)
+
+        return results
 
     def compare_news_articles(self, contents):
         """
-        Calculates the cosine similarity between embeddings of a set of news article contents.
+        Generates unit-length embeddings for a set of news article contents.
 
         This method uses a pre-trained SentenceTransformer model to generate embeddings
-        for each article's content, then computes the cosine similarity between every pair
-        of articles to identify their level of similarity.
+        for each article's content. Similarities are computed from these embeddings block
+        by block when grouping, so the full pairwise similarity matrix is never built.
 
         Args:
             contents (List[str]): A list containing the text content of each news article.
 
         Returns:
-            np.ndarray: A 2D numpy array representing the cosine similarity matrix between all pairs of articles.
+            np.ndarray: A 2D numpy array with one normalised embedding per article.
         """
         try:
-            embeddings = self.model.encode(contents)
-            cosine_sim = cosine_similarity(embeddings, embeddings)
-            return cosine_sim
+            embeddings = encode_texts(contents, 'grouping')
+            return normalize_rows(embeddings)
         except Exception as e:
-            # Log the exception if the embedding generation or similarity calculation fails
+            # Log the exception if the embedding generation fails
             logging.error(f"Failed to compare news articles: {e}")
             return np.empty((0, 0))
 
-    def find_unique_similar_article_pairs(self, similarity_matrix, threshold):
+    def find_unique_similar_article_pairs(self, embeddings, threshold):
         """
-        Identifies pairs of articles that are similar to each other above a specified threshold.
+        Identifies groups of articles that are similar to each other above a specified threshold.
+
+        With the default 'leader' method each ungrouped article, in order, collects every
+        other ungrouped article above the threshold; 'union_find' groups transitively instead.
 
         Args:
-            similarity_matrix (np.ndarray): A 2D numpy array containing similarity scores between articles.
+            embeddings (np.ndarray): A 2D numpy array with one embedding per article.
             threshold (float): The minimum similarity score to consider two articles as similar.
 
         Returns:
             dict: A dictionary where keys are article indices and values are lists of tuples, 
                 each tuple containing the index of a similar article and their similarity score.
         """
-        grouped_articles = set()  # Keep track of articles already in a group
-        article_similarities = {}
-        for i in range(len(similarity_matrix)):
-            if i not in grouped_articles:
-                similar_articles = [(j, similarity_matrix[i, j]) for j in range(len(similarity_matrix)) if similarity_matrix[i, j] > threshold and i != j and j not in grouped_articles]
-                article_similarities[i] = similar_articles
-                grouped_articles.add(i)
-                grouped_articles.update([j for j, _ in similar_articles])
-        return article_similarities
+        with SIMILARITY_QUERY_SECONDS.time(stage='grouping'):
+            return group_similar_articles(
+                embeddings,
+                threshold,
+                method=self.grouping_method,
+                top_k=self.grouping_top_k,
+            )
 
     def process_grouped_articles(self, items):
         """
@@ -302,37 +505,30 @@ class ComparePipeline:
         """
 
         if items:
-            contents = [self.preprocess_text(item['content'] if item['content'] is not None else item['header']) for item in items]
-            similarity_matrix = self.compare_news_articles(contents)
-            article_similarities = self.find_unique_similar_article_pairs(similarity_matrix, self.threshold)
+            contents = self.preprocess_texts([item['content'] if item['content'] is not None else item['header'] for item in items])
+            embeddings = self.compare_news_articles(contents)
+            article_similarities = self.find_unique_similar_article_pairs(embeddings, self.threshold)
 
             grouped_articles_full = {}
 
-            # closely monitor the output
-            with open('similar_articles.txt', 'w', encoding='utf-8') as file:
-                for i, similar_indices in article_similarities.items():
-                    # Initialize the group with the base article
-                    grouped_articles_full[i] = [items[i]]  # Start the group with a list containing the base article
-                    for index, _ in similar_indices:
-                        grouped_articles_full[i].append(items[index])  # Append similar articles to the group
-
-                    file.write(f"Group starting with Article {i + 1}:\n")
-                    base_article_content = items[i]['content']
-                    file.write("Base Article Content:\n")
-                    file.write(base_article_content + "\n\n")
-                    
-                    if similar_indices:
-                        file.write("Similar Articles:\n")
-                        for index, similarity in similar_indices:
-                            similar_article_content = items[index]['content']
-                            file.write(f"\tArticle {index + 1} (Similarity: {similarity:.2f})\n")
-                            file.write("\tContent:\n")
-                            file.write(similar_article_content + "\n\n")
-                    else:
-                        file.write("\tNo similar articles above the threshold.\n\n")
-                    
-                    file.write("="*80 + "\n\n")
-            
+            for i, similar_indices in article_similarities.items():
+                # Initialize the group with the base article
+                grouped_articles_full[i] = [items[i]]  # Start the group with a list containing the base article
+                for index, _ in similar_indices:
+                    grouped_articles_full[i].append(items[index])  # Append similar articles to the group
+
+            # Groups reference their articles by position and header; the contents are in inserted_items
+            run_artifacts().write_many('groups', (
+                {
+                    'group': i,
+                    'articles': [{'index': i, 'header': items[i].get('header'), 'similarity': 1.0}] + [
+                        {'index': index, 'header': items[index].get('header'), 'similarity': round(float(similarity), 4)}
+                        for index, similarity in similar_indices
+                    ],
+                }
+                for i, similar_indices in article_similarities.items()
+            ))
+
             self.grouped_articles = grouped_articles_full
 
             return self.grouped_articles
@@ -340,10 +536,14 @@ class ComparePipeline:
 
 class DraftPipeline: 
     # pass
-    def __init__(self):
+    def __init__(self, conn=None):
         """
         Initializes the class instance by setting up OpenAI API access and establishing
         a database connection using credentials stored in environment variables.
+
+        Args:
+            conn (optional): An open DB-API connection to the WordPress database. By default
+                one is opened from DB_HOST, DB_NAME, DB_USER and DB_PASSWORD.
         
         Raises:
             ValueError: If the OpenAI API key is not found in the environment variables.
@@ -354,28 +554,50 @@ class DraftPipeline:
         if not api_key:
             raise ValueError("OpenAI API key not found in environment variables.")
         self.api_key = api_key
-        openai.api_key = self.api_key
+        # The OpenAI and MySQL clients are imported here so they only load when drafting runs
+        import openai
+
+        # Groups are drafted concurrently, at most DRAFT_CONCURRENCY at a time. Each request
+        # times out after DRAFT_TIMEOUT seconds and rate limited or failed requests are retried
+        # DRAFT_RETRIES times. OPENAI_BASE_URL can point the client at a local mock server.
+        self.max_concurrency = int(os.environ.get('DRAFT_CONCURRENCY', 4))
+        self.max_retries = int(os.environ.get('DRAFT_RETRIES', 3))
+        self.retry_backoff = float(os.environ.get('DRAFT_RETRY_BACKOFF', 2.0))
+        self.client = openai.OpenAI(
+            api_key=self.api_key,
+            base_url=openai_base_url(),
+            timeout=float(os.environ.get('DRAFT_TIMEOUT', 120)),
+            max_retries=0,
+        )
 
-        try:
-            # Retrieve database credentials from environment variables for security
-            db_host = os.environ.get('DB_HOST')
-            db_name = os.environ.get('DB_NAME')
-            db_user = os.environ.get('DB_USER')
-            db_password = os.environ.get('DB_PASSWORD')
-
-            # Establish a connection to the database
-            self.conn = mysql.connector.connect(
-                host=db_host,
-                database=db_name,
-                user=db_user,
-                password=db_password
-            )
-            # Create a cursor object using the connection
-            self.cur = self.conn.cursor()
-        except Error as e:
-            # Log or print the error if the database connection fails
-            print(f"Failed to connect to database: {e}")
-            raise 
+        if conn is None:
+            import mysql.connector
+
+            try:
+                # Retrieve database credentials from environment variables for security
+                db_host = os.environ.get('DB_HOST')
+                db_name = os.environ.get('DB_NAME')
+                db_user = os.environ.get('DB_USER')
+                db_password = os.environ.get('DB_PASSWORD')
+
+                # Establish a connection to the database
+                conn = mysql.connector.connect(
+                    host=db_host,
+                    database=db_name,
+                    user=db_user,
+                    password=db_password
+                )
+            except mysql.connector.Error as e:
+                # Log or print the error if the database connection fails
+                print(f"Failed to connect to database: {e}")
+                raise 
+        self.conn = conn
+        # Drafts are written in batches, one transaction per batch
+        self.wp_writer = WordPressWriter(
+            self.conn,
+            table_prefix=os.environ.get('WP_TABLE_PREFIX', 'wp_'),
+            batch_size=int(os.environ.get('WP_INSERT_BATCH_SIZE', 50)),
+        )
         # # db here
         # self.conn = mysql.connector.connect(
         #     host='20.24.22.27',
@@ -384,7 +606,7 @@ class DraftPipeline:
         #     password='techTodate'
         # )
         # self.cur = self.conn.cursor()
-    
+
 
     def aggregate_articles_info(self, articles):
         """Combine contents from a list of articles into a single string."""
@@ -411,10 +633,7 @@ class DraftPipeline:
                 "Example: <h1 style='color: #333; font-family: Arial, sans-serif;'>Your Header Here</h1>"
             )
             
-            chat_completion = openai.chat.completions.create(
-                model="gpt-4-0125-preview",
-                messages=[{"role": "user", "content": prompt}],
-            )
+            chat_completion = self.create_completion(prompt)
 
             # Extract the HTML/CSS formatted content
             response_text = chat_completion.choices[0].message.content
@@ -440,6 +659,63 @@ class DraftPipeline:
         except Exception as e:
             logging.error(f'Error drafting article with GPT: {e}')
             return None, None, None
+
+    def create_completion(self, prompt):
+        """
+        Requests a chat completion, retrying rate limited, timed out and failed requests.
+
+        Waits for the server's Retry-After when it sends one, otherwise backs off exponentially
+        from `retry_backoff` seconds.
+
+        Args:
+            prompt (str): The user message.
+
+        Returns:
+            ChatCompletion: The completion.
+        """
+        import openai
+
+        retryable = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+        for attempt in range(self.max_retries + 1):
+            try:
+                with LLM_REQUEST_SECONDS.time():
+                    return self.client.chat.completions.create(
+                        model="gpt-4-0125-preview",
+                        messages=[{"role": "user", "content": prompt}],
+                    )
+            except retryable as e:
+                if attempt == self.max_retries:
+                    raise
+                LLM_RETRIES.inc()
+                delay = self.retry_backoff * 2 ** attempt
+                response = getattr(e, 'response', None)
+                retry_after = response.headers.get('retry-after') if response is not None else None
+                if retry_after:
+                    try:
+                        delay = float(retry_after)
+                    except ValueError:
+                        pass
+                logging.warning(f'{type(e).__name__} from OpenAI, retrying in {delay:.1f}s')
+                time.sleep(delay)
+
+    def draft_groups(self, grouped_articles):
+        """
+        Drafts every group concurrently and yields the drafts as they finish.
+
+        Args:
+            grouped_articles (dict): Maps group IDs to lists of articles.
+
+        Yields:
+            tuple: (group_id, drafted_header, drafted_subheader, drafted_content), in completion
+            order. The drafted fields are None when drafting the group failed.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='draft') as executor:
+            futures = {
+                executor.submit(self.draft_article_with_gpt, self.aggregate_articles_info(articles)): group_id
+                for group_id, articles in grouped_articles.items()
+            }
+            for future in as_completed(futures):
+                yield (futures[future],) + future.result()
         
     def close(self, items):
 
@@ -461,24 +737,32 @@ class DraftPipeline:
             logging.info("No grouped articles to process.")
             return
         
-        # closely monitor the output
-        with open('drafted_articles.txt', 'w', encoding='utf-8') as file:
-            for group_id, articles in grouped_articles.items():
-                aggregated_content = self.aggregate_articles_info(articles)
+        artifacts = run_artifacts()
+        # Drafts are queued for the database writer on this thread as soon as each one finishes
+        for group_id, drafted_header, drafted_subheader, drafted_content in self.draft_groups(grouped_articles):
+            if drafted_content:
+                if artifacts.enabled:
+                    artifacts.write('drafts', {
+                        'group': group_id, 'header': drafted_header, 'subheader': drafted_subheader, 'content': drafted_content,
+                    })
+                self.insert_into_db(drafted_header, drafted_subheader, drafted_content)
                 
-                drafted_header, drafted_subheader, drafted_content = self.draft_article_with_gpt(aggregated_content)
-                
-                if drafted_content:
-                    file.write(f"Group {group_id} Draft:\nHeader: {drafted_header}\nSubheader: {drafted_subheader}\nContent:\n{drafted_content}\n")
-                    file.write("="*80 + "\n\n")  # Separator for readability
-                    self.insert_into_db(drafted_header, drafted_subheader, drafted_content)
-                    
-                    logging.info(f"Draft for Group {group_id} saved.\n")
-                else:
-                    logging.error(f"Failed to draft content for Group {group_id}")
+                logging.info(f"Draft for Group {group_id} saved.\n")
+                DRAFTS.inc(outcome='ok')
+            else:
+                logging.error(f"Failed to draft content for Group {group_id}")
+                DRAFTS.inc(outcome='failed')
+
+        # Write the drafts still queued in the last, partial batch
+        self.wp_writer.flush()
 
 
     def insert_into_db(self, header, subheader, content):
+        """
+        Queues a drafted post for the WordPress database.
+
+        Posts are written in batches by `wp_writer`; `close` writes whatever is still queued.
+        """
         post_type = 'post'
         # prepare post mariaDB !!!!!!!!!!
         ########################################################################################################################################################
@@ -491,131 +775,190 @@ class DraftPipeline:
 
         ########################################################################################################################################################
 
-        # Prepare data tuple with mapped and default values
-        data_tuple = (
-            default_author_id,
-            current_datetime,
-            current_datetime,  # post_date_gmt
-            content,
-            header,
-            subheader,  # post_excerpt I turned it into a sub_header container which should work?
-            default_post_status,
-            'open',  # comment_status
-            'open',  # ping_status
-            '',  # post_password slugify(item.get('sub_header', ''))
-            '',  # post_name (slug), use a slugify function
-            '',  # to_ping
-            '',  # pinged
-            current_datetime,  # post_modified
-            current_datetime,  # post_modified_gmt
-            '',  # post_content_filtered
-            0,   # post_parent
-            '',  # guid
-            0,   # menu_order
-            post_type, # post_type
-            'Central Asia',  # post_mime_type
-            0,   # comment_count
-        )
-
-
-        # insert query here
-        insert_query = """INSERT INTO wp_posts (
-            post_author, post_date, post_date_gmt, post_content, post_title, post_excerpt, 
-            post_status, comment_status, ping_status, post_password, post_name, to_ping, 
-            pinged, post_modified, post_modified_gmt, post_content_filtered, post_parent, 
-            guid, menu_order, post_type, post_mime_type, comment_count) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-        ##########################################################################################################################################################
+        # Map the draft and default values onto the wp_posts columns
+        post = {
+            'post_author': default_author_id,
+            'post_date': current_datetime,
+            'post_date_gmt': current_datetime,
+            'post_content': content,
+            'post_title': header,
+            'post_excerpt': subheader,  # post_excerpt I turned it into a sub_header container which should work?
+            'post_status': default_post_status,
+            'comment_status': 'open',
+            'ping_status': 'open',
+            'post_password': '',  # slugify(item.get('sub_header', ''))
+            'post_name': '',  # slug, use a slugify function
+            'to_ping': '',
+            'pinged': '',
+            'post_modified': current_datetime,
+            'post_modified_gmt': current_datetime,
+            'post_content_filtered': '',
+            'post_parent': 0,
+            'guid': '',
+            'menu_order': 0,
+            'post_type': post_type,
+            'post_mime_type': 'Central Asia',
+            'comment_count': 0,
+        }
 
-        # data_tuple = (item['date'],item['label'],item['header'],item['sub_header'],item['img'],item['img_caption'],item['content'])
         try:
-            # Check if "Financial" category exists, if not, create it
-            financial_category_id = self.get_category_id("Central Asia")
-            if financial_category_id is None:
-                term_id = self.create_category("Central Asia")
-                financial_category_id = self.create_term_taxonomy(term_id)
-
-            # check_query = "SELECT * FROM sim76_posts WHERE post_title = %s"
-            # self.cur.execute(check_query, header)
-            # if self.cur.fetchone() is None:
-
-            # date, label, header, sub_header, img, img_caption, content) VALUES (%s, %s, %s, %s, %s, %s, %s)"""
-            self.cur.execute(insert_query, data_tuple)
-
-            new_post_id = self.cur.lastrowid  # Get the ID of the new post
-
-            # Link post to the "Financial" category
-            insert_relationship_query = "INSERT INTO wp_term_relationships (object_id, term_taxonomy_id) VALUES (%s, %s)"
-            self.cur.execute(insert_relationship_query, (new_post_id, financial_category_id))
-
-
-            self.conn.commit()
-            logging.info(f'Inserted new {post_type} with ID {new_post_id}')
-                        
-            # else:
-            #     logging.info("Record already exists. Skipping insertion.")
+            # The "Central Asia" category is looked up (or created) once and cached by the writer
+            self.wp_writer.add_post(post, "Central Asia")
         except Exception as e:
             logging.error(header)
             logging.error(subheader)
             logging.error(content)
             logging.error(f'Failed to connect to DB: {e}')
 
-    def create_category(self, category_name):
-        """
-        Inserts a new category into the database.
 
-        Args:
-            category_name (str): The name of the category to be created.
+class StreamCoordinator:
+    """
+    Moves items through dedup, grouping and drafting while the spiders are still crawling.
+
+    Scraped items are collected into micro-batches that go through CrawlerPipeline as soon
+    as `batch_size` items are waiting, or `max_delay` seconds after the first one arrived.
+    The deferred returned for an item only fires once its batch has been processed, so
+    Scrapy's CONCURRENT_ITEMS limit keeps the spiders from running ahead of the pipeline.
+    Items that were inserted are collected into windows of `window_size` items, and each
+    window is grouped with ComparePipeline and drafted with DraftPipeline.
+
+    Batches and windows are each processed one at a time in the reactor's thread pool. With
+    CPU_WORKERS set, their embedding and lemmatisation run in the CPU pool's worker processes,
+    so they do not hold the GIL while the reactor downloads.
+    """
 
-        Returns:
-            int: The ID of the newly created category term, or None if insertion fails.
-        """
-        insert_term_query = "INSERT INTO wp_terms (name, slug) VALUES (%s, %s)"
-        slug = category_name.lower().replace(" ", "-")  # Simple slug creation
-        self.cur.execute(insert_term_query, (category_name, slug))
-        return self.cur.lastrowid  # Returns the newly created term_id
-    
-    def create_term_taxonomy(self, term_id, taxonomy='category', description=''):
-        """
-        Inserts a new term taxonomy into the database.
+    def __init__(self, batch_size=32, window_size=200, max_delay=5.0):
+        self.batch_size = batch_size
+        self.window_size = window_size
+        self.max_delay = max_delay
+        self.open_spiders = 0
 
-        Args:
-            term_id (int): The term ID to associate the taxonomy with.
-            taxonomy (str, optional): The type of taxonomy. Defaults to 'category'.
-            description (str, optional): The taxonomy description. Defaults to an empty string.
+        self._pending = []  # (item, deferred) pairs waiting for the next batch
+        self._window = []
+        self._flush_call = None
+        self._batch_lock = defer.DeferredLock()
+        self._window_lock = defer.DeferredLock()
 
-        Returns:
-            int: The ID of the newly created term taxonomy, or None if insertion fails.
-        """
-        insert_taxonomy_query = "INSERT INTO wp_term_taxonomy (term_id, taxonomy, description) VALUES (%s, %s, %s)"
-        self.cur.execute(insert_taxonomy_query, (term_id, taxonomy, description))
-        return self.cur.lastrowid  # Returns the newly created term_taxonomy_id
-    
-    def get_category_id(self, category_name):
-        """
-        Retrieves the category ID for a given category name.
+        # Created on first use, from the worker thread
+        self.crawler_pipeline = None
+        self.compare_pipeline = None
+        self.draft_pipeline = None
 
-        Args:
-            category_name (str): The name of the category.
+    def submit(self, item):
+        """
+        Queues an item for the next micro-batch.
 
         Returns:
-            int or None: The category ID if found, or None if the category does not exist.
-        """
-        query = """
-        SELECT tt.term_taxonomy_id
-        FROM wp_terms AS t
-        INNER JOIN wp_term_taxonomy AS tt ON t.term_id = tt.term_id
-        WHERE t.name = %s AND tt.taxonomy = 'category'
+            Deferred: Fires with the item once it has been inserted, or fails with DropItem.
         """
-        self.cur.execute(query, (category_name,))
-        result = self.cur.fetchone()
-        return result[0] if result else None
-
-
-
+        from twisted.internet import reactor
+
+        d = defer.Deferred()
+        self._pending.append((item, d))
+        if len(self._pending) >= self.batch_size:
+            self.flush_batch()
+        elif self._flush_call is None:
+            self._flush_call = reactor.callLater(self.max_delay, self.flush_batch)
+        return d
+
+    def flush_batch(self):
+        """Sends the items waiting for a batch through dedup, whether or not the batch is full."""
+        if self._flush_call is not None and self._flush_call.active():
+            self._flush_call.cancel()
+        self._flush_call = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return defer.succeed(None)
+        return self._batch_lock.run(self._process_batch, batch)
+
+    def flush_window(self):
+        """Groups and drafts the items collected in the current window."""
+        window, self._window = self._window, []
+        if not window:
+            return defer.succeed(None)
+        d = self._window_lock.run(threads.deferToThread, self._group_and_draft, window)
+        d.addErrback(lambda failure: logging.error(f"Error grouping and drafting window: {failure.value}"))
+        return d
+
+    def _process_batch(self, batch):
+        d = threads.deferToThread(self._dedup, [item for item, _ in batch])
+        d.addCallbacks(self._batch_done, self._batch_failed, callbackArgs=(batch,), errbackArgs=(batch,))
+        return d
+
+    def _dedup(self, items):
+        if self.crawler_pipeline is None:
+            self.crawler_pipeline = CrawlerPipeline()
+        with STAGE_SECONDS.time(stage='dedup'):
+            return self.crawler_pipeline.process_item(items)
+
+    def _batch_done(self, inserted, batch):
+        inserted_ids = {id(item) for item in inserted}
+        for item, d in batch:
+            if id(item) in inserted_ids:
+                d.callback(item)
+            else:
+                d.errback(DropItem(f"Item not inserted (duplicate or failed insert): {item.get('header')}"))
+
+        self._window.extend(inserted)
+        if len(self._window) >= self.window_size:
+            # Not waited on, so grouping and drafting overlap with the next batches
+            self.flush_window()
+
+    def _batch_failed(self, failure, batch):
+        logging.error(f"Error processing batch of {len(batch)} items: {failure.value}")
+        for item, d in batch:
+            d.errback(DropItem(f"Error processing batch: {failure.value}"))
+
+    def _group_and_draft(self, items):
+        if self.compare_pipeline is None:
+            self.compare_pipeline = ComparePipeline()
+        with STAGE_SECONDS.time(stage='grouping'):
+            grouped_articles = self.compare_pipeline.process_grouped_articles(items)
+        if not grouped_articles:
+            logging.info("No grouped articles to draft.")
+            return
+        if self.draft_pipeline is None:
+            self.draft_pipeline = DraftPipeline()
+        with STAGE_SECONDS.time(stage='drafting'):
+            self.draft_pipeline.close(grouped_articles)
 
 
+class StreamingPipeline:
+    """
+    A Scrapy item pipeline that hands every item to the process-wide StreamCoordinator.
 
+    This is the streaming replacement for AccumulatePipeline: instead of holding every item
+    until all spiders have finished, items are deduplicated in micro-batches as they are
+    scraped and grouped and drafted window by window. The coordinator is a class attribute
+    so that all crawlers started by one runner share the same batches and windows.
+    """
+    coordinator = None
 
+    @classmethod
+    def from_crawler(cls, crawler):
+        if cls.coordinator is None:
+            settings = crawler.settings
+            cls.coordinator = StreamCoordinator(
+                batch_size=settings.getint('STREAM_BATCH_SIZE', 32),
+                window_size=settings.getint('STREAM_WINDOW_SIZE', 200),
+                max_delay=settings.getfloat('STREAM_MAX_DELAY', 5.0),
+            )
+        return cls()
 
+    def open_spider(self, spider):
+        self.coordinator.open_spiders += 1
 
+    def process_item(self, item, spider):
+        artifacts = run_artifacts()
+        if artifacts.enabled:
+            artifacts.write('scraped_items', item_record(item, spider=spider.name))
+        return self.coordinator.submit(item)
+
+    def close_spider(self, spider):
+        self.coordinator.open_spiders -= 1
+        d = self.coordinator.flush_batch()
+        if self.coordinator.open_spiders == 0:
+            # The last spider is done; draft whatever is left in the current window
+            d.addCallback(lambda _: self.coordinator.flush_window())
+        return d
@@ -0,0 +1,92 @@
+import scrapy
+
+# Renderer used when the settings do not set RENDER_BACKEND; the same default as settings.py
+DEFAULT_RENDER_BACKEND = 'playwright'
+
+# Resource types the rendered pages never need; blocking them saves most of the page weight
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+# scrapy-playwright only renders requests flagged with meta['playwright']; the rest are
+# downloaded by Scrapy's regular HTTP handler
+PLAYWRIGHT_DOWNLOAD_HANDLERS = {
+    'http': 'scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler',
+    'https': 'scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler',
+}
+
+
+def should_abort_request(request):
+    """
+    PLAYWRIGHT_ABORT_REQUEST predicate: drops image, font and media requests made by rendered pages.
+    """
+    return request.resource_type in BLOCKED_RESOURCE_TYPES
+
+
+def render_backend(settings):
+    """Returns the RENDER_BACKEND of `settings`: 'playwright' or 'selenium'."""
+    return settings.get('RENDER_BACKEND') or DEFAULT_RENDER_BACKEND
+
+
+def callback_wait_selectors(spider, callback):
+    """
+    Looks up the CSS selectors a spider declared for a callback in its `render_wait_for` dict.
+
+    Args:
+        spider (scrapy.Spider): The spider that owns the callback.
+        callback (Callable, optional): The request callback; defaults to the spider's `parse`.
+
+    Returns:
+        str or List[str] or None: The selectors to wait for, if any were declared.
+    """
+    callback = callback or getattr(spider, 'parse', None)
+    callback_name = getattr(callback, '__name__', 'parse')
+    return getattr(spider, 'render_wait_for', {}).get(callback_name)
+
+
+class RenderedRequestMixin:
+    """
+    Builds requests for pages that need a browser to render their content.
+
+    The RENDER_BACKEND setting picks the renderer. With 'playwright' the page is rendered by
+    scrapy-playwright's download handler on the reactor's event loop, in a browser context
+    named after the spider so its pages share one context; with 'selenium' it is rendered by
+    SeleniumMiddleware's browser pool. Either way the callback receives the rendered DOM
+    once the selectors declared for it in `render_wait_for` are present.
+    """
+    render_wait_for = {}
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        if render_backend(settings) == 'playwright':
+            # Installed per spider, so crawls that render nothing never load Playwright
+            settings.set('DOWNLOAD_HANDLERS', PLAYWRIGHT_DOWNLOAD_HANDLERS, priority='spider')
+
+    def rendered_request(self, url, callback, meta=None, **kwargs):
+        """
+        Args:
+            url (str): The page to render.
+            callback (Callable): Parses the rendered page.
+            meta (dict, optional): Extra request meta.
+            **kwargs: Passed on to scrapy.Request.
+
+        Returns:
+            scrapy.Request: A request the configured backend renders.
+        """
+        meta = dict(meta or {})
+        if render_backend(self.settings) == 'playwright':
+            from scrapy_playwright.page import PageMethod
+
+            selectors = callback_wait_selectors(self, callback) or []
+            if isinstance(selectors, str):
+                selectors = [selectors]
+            meta.update({
+                'playwright': True,
+                'playwright_context': self.name,
+                'playwright_page_methods': [PageMethod('wait_for_selector', selector) for selector in selectors],
+            })
+            if selectors:
+                # The selectors are awaited explicitly, so navigation only waits for the DOM
+                meta['playwright_page_goto_kwargs'] = {'wait_until': 'domcontentloaded'}
+        else:
+            meta['use_selenium'] = True
+        return scrapy.Request(url, callback=callback, meta=meta, **kwargs)
@@ -7,6 +7,8 @@
 #     https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #     https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+
 BOT_NAME = "Crawler"
 
 SPIDER_MODULES = ["Crawler.spiders"]
@@ -46,15 +48,48 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
+SPIDER_MIDDLEWARES = {
 #    "Crawler.middlewares.CrawlerSpiderMiddleware": 543,
-#}
+    # Puts the crawl frontier entry of an article page on its item (see IncrementalCrawlMiddleware)
+    "Crawler.middlewares.FrontierItemMiddleware": 50,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
+DOWNLOADER_MIDDLEWARES = {
 #    "Crawler.middlewares.CrawlerDownloaderMiddleware": 543,
-#}
+    "Crawler.middlewares.IncrementalCrawlMiddleware": 50,
+    # Below HttpCompressionMiddleware (590) so stored bodies are decompressed
+    "Crawler.middlewares.ConditionalGetMiddleware": 100,
+}
+
+# Persistent crawl frontier used by Crawler.middlewares.IncrementalCrawlMiddleware. Article
+# pages (requests for the FRONTIER_CALLBACKS callbacks) crawled by an earlier run are skipped
+# without being fetched. FRONTIER_REVISIT_AFTER > 0 refetches them after that many seconds and
+# only passes them on if their content changed; entries older than FRONTIER_MAX_AGE_DAYS are pruned.
+# A page is recorded only once CrawlerPipeline has stored its item (or found it to be a duplicate).
+FRONTIER_ENABLED = os.environ.get("FRONTIER_ENABLED", "1") == "1"
+FRONTIER_PATH = os.environ.get("FRONTIER_PATH", ".frontier.sqlite")
+FRONTIER_CALLBACKS = ["parse_news_content", "parse_article_content"]
+FRONTIER_REVISIT_AFTER = 0
+FRONTIER_MAX_AGE_DAYS = 30
+
+# Listing-page date prefilter (Crawler.prefilter.ListingDatePrefilterMixin): article links dated
+# before today minus this many days are dropped before they are requested
+PREFILTER_DATE_WINDOW_DAYS = 0
+# Spiders the prefilter runs for. Only FKZ declares a listing selector, checked against the live
+# markup; add a spider here once its selector has been verified against recorded listing pages.
+PREFILTER_SPIDERS = ["FKZSpider"]
+
+# Conditional GET revalidation of listing pages (Crawler.middlewares.ConditionalGetMiddleware).
+# Requests for the CONDITIONAL_GET_CALLBACKS callbacks send the stored ETag/Last-Modified; on a 304
+# or an unchanged body the stored copy is parsed, so the crawl frontier still decides which articles
+# to fetch. CONDITIONAL_GET_SERVE_CACHED=0 drops unchanged listings instead, which also skips
+# articles whose insert failed on an earlier run.
+CONDITIONAL_GET_ENABLED = os.environ.get("CONDITIONAL_GET_ENABLED", "1") == "1"
+CONDITIONAL_GET_PATH = os.environ.get("CONDITIONAL_GET_PATH", ".page_cache.sqlite")
+CONDITIONAL_GET_CALLBACKS = ["parse", "parse_articles"]
+CONDITIONAL_GET_SERVE_CACHED = os.environ.get("CONDITIONAL_GET_SERVE_CACHED", "1") == "1"
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -64,14 +99,31 @@ ROBOTSTXT_OBEY = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
+# Only AccumulatePipeline runs per item. CrawlerPipeline, ComparePipeline and DraftPipeline work on
+# the accumulated batch and are run by run_all_spiders once the crawl has finished (or by
+# StreamingPipeline with PIPELINE_MODE=stream), so crawling never builds them.
 ITEM_PIPELINES = {
    "Crawler.pipelines.AccumulatePipeline": 300,
-   "Crawler.pipelines.CrawlerPipeline": 300,
-   "Crawler.pipelines.ComparePipeline": 200,
-   "Crawler.pipelines.DraftPipeline": 100
-
 }
 
+# Micro-batch and window sizes for Crawler.pipelines.StreamingPipeline (run_all_spiders with PIPELINE_MODE=stream).
+# A partial batch is processed STREAM_MAX_DELAY seconds after its first item arrived.
+STREAM_BATCH_SIZE = 32
+STREAM_WINDOW_SIZE = 200
+STREAM_MAX_DELAY = 5.0
+
+# Crawler.pipelines.AccumulatePipeline keeps up to ITEM_STORE_MEMORY_MB of scraped items in memory and spills
+# the rest to a temporary file in ITEM_STORE_SPILL_DIR (default: the system temp dir). In batch mode
+# run_all_spiders deduplicates the stored items DEDUP_BATCH_SIZE at a time.
+ITEM_STORE_MEMORY_MB = 256
+ITEM_STORE_SPILL_DIR = None
+DEDUP_BATCH_SIZE = 500
+
+# Shared headless browser pool used by Crawler.middlewares.SeleniumMiddleware
+BROWSER_POOL_SIZE = 2
+BROWSER_MAX_PAGES = 50
+BROWSER_RENDER_TIMEOUT = 20
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
@@ -93,11 +145,20 @@ ITEM_PIPELINES = {
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
-DOWNLOAD_HANDLERS = {
-     "scrapy_playwright.middleware.ScrapyPlaywrightDownloadMiddleware": 800,
-}
+# Renderer for pages that need a browser (FBK, FKZ and CAT spiders): playwright | selenium.
+# Keep the default in step with Crawler.rendering.DEFAULT_RENDER_BACKEND
+RENDER_BACKEND = os.environ.get("RENDER_BACKEND", "playwright")
+
+# The rendering spiders install scrapy-playwright's download handler themselves (see
+# Crawler.rendering.RenderedRequestMixin), so other crawls never start Playwright
 PLAYWRIGHT_BROWSER_TYPE = "chromium"
- 
+PLAYWRIGHT_LAUNCH_OPTIONS = {"headless": True}
+# One reused context per rendering spider, each rendering several pages at once
+PLAYWRIGHT_MAX_CONTEXTS = 4
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 4
+PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = 20 * 1000
+PLAYWRIGHT_ABORT_REQUEST = "Crawler.rendering.should_abort_request"
+
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 
 
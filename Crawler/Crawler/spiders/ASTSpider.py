@@ -4,6 +4,7 @@ from datetime import datetime
 from w3lib.html import remove_tags
 import logging
 from Crawler.items import MarketItem
+from services.date_parser import DateParser, crawl_date
 
 class MarketSpiderAST(scrapy.Spider):
     """
@@ -12,6 +13,7 @@ class MarketSpiderAST(scrapy.Spider):
     name = "ASTSpider"
     allowed_domains = ["astanatimes.com"]
     start_urls = ["https://astanatimes.com/category/business/"]
+    date_parser = DateParser(formats=['%d %B %Y'], languages=['en'])
 
     custom_settings = {
         'FEEDS': {
@@ -56,7 +58,7 @@ class MarketSpiderAST(scrapy.Spider):
                 logging.error('No date found for article: %s', response.url)
                 raise DropItem("Missing date in article")
 
-            if date_obj.date() == datetime.now().date():
+            if date_obj.date() == crawl_date():
                 news_item['date'] = date_obj.strftime('%Y-%m-%d')
                 news_item['label'] = "Business"
                 news_item['header'] = response.css('div.eight.columns h1::text').get()
@@ -67,6 +69,8 @@ class MarketSpiderAST(scrapy.Spider):
 
                 yield news_item
             else:
+                # Off-day articles stay off-day; the frontier skips the page on later runs
+                response.meta['frontier_rejected'] = True
                 logging.info(f"Skipping article, not from today: {date_string}")
         except ValueError as e:
             news_item['content'] = "Empty"
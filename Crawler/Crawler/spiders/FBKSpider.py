@@ -1,32 +1,36 @@
 import os
 from dotenv import load_dotenv
 import scrapy
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from datetime import datetime
 import logging
-import dateparser
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from services.translator import Translator
+from services.async_translator import get_async_translator
+from services.date_parser import DateParser, crawl_date
 from Crawler.items import MarketItem
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from Crawler.rendering import RenderedRequestMixin
 
 
-class MarketSpiderFBK(scrapy.Spider):
+class MarketSpiderFBK(RenderedRequestMixin, scrapy.Spider):
     """
     A Scrapy spider integrated with Selenium and a translation service for scraping
     and translating news articles from forbes.kz, focusing only on articles published today.
+
+    Pages are rendered once, by Playwright or SeleniumMiddleware's browser pool depending on
+    RENDER_BACKEND, and parsed from the returned HtmlResponse.
     """
     name = "FBKSpider"
+    date_parser = DateParser(languages=['ru'])
     custom_settings = {
         'DOWNLOADER_MIDDLEWARES': {
+            'Crawler.middlewares.IncrementalCrawlMiddleware': 50,
             'Crawler.middlewares.SeleniumMiddleware': 800
         }
     }
 
+    # CSS selectors the renderer waits for before capturing each callback's page
+    render_wait_for = {
+        'parse': 'a.news__mini-info',
+        'parse_news_content': 'article[class*="article-id"]',
+    }
+
     def __init__(self, *args, **kwargs):
         """
         Initializes the spider with environment variables and a translator service.
@@ -37,91 +41,56 @@ class MarketSpiderFBK(scrapy.Spider):
         if not api_key:
             logging.error("OPENAI_API_KEY not found in environment variables")
             raise EnvironmentError("OPENAI_API_KEY not found in environment variables")
-        
-        self.translator = Translator(api_key=api_key)  # Initialize translator with API key
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Enables headless mode for Chrome
-        chrome_service = Service(self.get_chromedriver_path())
-        self.driver = webdriver.Chrome(service=chrome_service, options=chrome_options)
 
-    def get_chromedriver_path(self):
-        """
-        Determines the correct path for chromedriver based on the operating system.
-        """
-        if os.name == 'nt':
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
-            return os.path.join(project_root, 'chromedriver.exe')  # Path for Windows
-        else:
-            return '/path/to/your/chromedriver'  # Adjust this path for non-Windows OS
+        self.translator = get_async_translator(api_key)  # Initialize translator with API key
 
     def start_requests(self):
         urls = ['https://forbes.kz/news']
         for url in urls:
-            yield scrapy.Request(url, callback=self.parse, meta={'use_selenium': True})
+            yield self.rendered_request(url, callback=self.parse)
 
     def parse(self, response):
         """
         Processes each article element, extracting the URL and scheduling a parse callback.
         """
-        try:
-            self.driver.get(response.url)
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'a.news__mini-info'))
-            )
+        relative_urls = response.css('a.news__mini-info::attr(href)').getall()[:2]  # Limit to 2 for demonstration
+        if not relative_urls:
+            logging.error(f'No news links found on {response.url}')
 
-            elements = self.driver.find_elements(By.CSS_SELECTOR, 'a.news__mini-info')
-            relative_urls = [element.get_attribute('href') for element in elements][:2]  # Limit to 2 for demonstration
+        for relative_url in relative_urls:
+            yield self.rendered_request(response.urljoin(relative_url), callback=self.parse_news_content)
 
-            for relative_url in relative_urls:
-                yield scrapy.Request(relative_url, callback=self.parse_news_content, meta={'use_selenium': True})
-        except TimeoutException:
-            logging.error(f'Timeout while loading {response.url}')
-        except WebDriverException as e:
-            logging.error(f"WebDriver exception on {response.url}: {e}")
-
-    def parse_news_content(self, response):
+    async def parse_news_content(self, response):
         """
         Parses individual news articles to extract relevant information.
         """
-        self.driver.get(response.url)
         try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'article[class*="article-id"]'))
-            )
-
-            date_text = self.driver.find_element(By.CSS_SELECTOR, 'div.article__date span').text.strip()
-            date_obj = dateparser.parse(date_text)
+            date_text = response.css('div.article__date span::text').get(default='').strip()
+            date_obj = self.date_parser.parse(date_text)
 
-            if date_obj.date() == datetime.now().date():
+            if date_obj.date() == crawl_date():
                 news_item = MarketItem()
-                header = self.driver.find_element(By.CSS_SELECTOR, 'article[class*="article-id"] h1').text
-
-                translated_header = self.translator.translate_text(header)
-                news_item['header'] = translated_header if translated_header else None
+                header = response.css('article[class*="article-id"] h1').xpath('string()').get(default='').strip()
+
+                paragraphs = response.css('article[class*="inner-news"] p')
+                content = ' '.join(p.xpath('string()').get().strip() for p in paragraphs)
+
+                # Header and content are translated together in a single request
+                translated = await self.translator.translate_fields({'header': header, 'content': content})
+                if header and not translated['header']:
+                    # The translation request failed; the article is fetched again on the next run
+                    logging.error(f"No translated header, skipping article on {response.url}")
+                    return
+                news_item['header'] = translated['header'] if translated['header'] else None
                 news_item['date'] = date_obj.strftime('%Y-%m-%d')
                 news_item['label'] = "Central Asia"
-                news_item['sub_header'] = "Empty" 
-
-                paragraphs = self.driver.find_elements(By.CSS_SELECTOR, 'article[class*="inner-news"] p')
-                content = ' '.join(p.text.strip() for p in paragraphs)
-
-                translated_content = self.translator.translate_text(content)
-                news_item['content'] = translated_content if translated_content else None
+                news_item['sub_header'] = "Empty"
+                news_item['content'] = translated['content'] if translated['content'] else None
 
                 yield news_item
             else:
+                # Off-day articles stay off-day; the frontier skips the page on later runs
+                response.meta['frontier_rejected'] = True
                 logging.info(f"Skipping article from {date_obj.strftime('%Y-%m-%d')}, not today's date.")
-        except WebDriverException as e:
-            news_item['content'] = "Empty"
-            logging.error(f"WebDriver exception while parsing article content on {response.url}: {e}")
         except Exception as e:
-            news_item['content'] = "Empty"
             logging.error(f"Unexpected error while parsing article content on {response.url}: {e}")
-            
-
-
-    def closed(self, reason):
-        """
-        Ensures the Selenium webdriver is properly closed when the spider is closed to prevent resource leaks.
-        """
-        self.driver.quit()
@@ -1,31 +1,37 @@
 import os
 from dotenv import load_dotenv
 import scrapy
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from datetime import datetime
 import logging
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
-import dateparser
 from Crawler.items import MarketItem
-from services.translator import Translator
+from Crawler.prefilter import ListingDatePrefilterMixin
+from Crawler.rendering import RenderedRequestMixin
+from services.async_translator import get_async_translator
+from services.date_parser import DateParser, crawl_date
 
-class MarketSpiderFKZ(scrapy.Spider):
+class MarketSpiderFKZ(ListingDatePrefilterMixin, RenderedRequestMixin, scrapy.Spider):
     """
-    A Scrapy spider for scraping and translating news articles from finance.kz that are published on the current date. 
-    It uses Selenium for dynamic content loading and a custom translation service for translating content.
+    A Scrapy spider for scraping and translating news articles from finance.kz that are published on the current date.
+    It uses a headless browser for dynamic content loading and a custom translation service for translating content.
+
+    Pages are rendered once, by Playwright or SeleniumMiddleware's browser pool depending on
+    RENDER_BACKEND, and parsed from the returned HtmlResponse.
     """
     name = "FKZSpider"
+    listing_date_selector = 'span.record-item-date'
+    date_parser = DateParser(languages=['ru'])
     custom_settings = {
         'DOWNLOADER_MIDDLEWARES': {
+            'Crawler.middlewares.IncrementalCrawlMiddleware': 50,
             'Crawler.middlewares.SeleniumMiddleware': 800,
         }
     }
 
+    # CSS selectors the renderer waits for before capturing each callback's page
+    render_wait_for = {
+        'parse_articles': 'div.record-item-block',
+        'parse_article_content': 'div.record-page-date',
+    }
+
     def __init__(self, *args, **kwargs):
         load_dotenv()
         super(MarketSpiderFKZ, self).__init__(*args, **kwargs)
@@ -33,95 +39,59 @@ class MarketSpiderFKZ(scrapy.Spider):
         if not api_key:
             logging.error("OPENAI_API_KEY not found in environment variables")
             raise EnvironmentError("OPENAI_API_KEY not found in environment variables")
-        
-        self.translator = Translator(api_key=api_key)
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_service = Service(self.get_chromedriver_path())
-        self.driver = webdriver.Chrome(service=chrome_service, options=chrome_options)
 
-    def get_chromedriver_path(self):
-        """
-        Determines the correct path for chromedriver based on the operating system.
-        """
-
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        if os.name == 'nt': 
-            return os.path.join(project_root, 'chromedriver.exe')
-        else:
-            return '/path/to/your/chromedriver'
+        self.translator = get_async_translator(api_key)
 
     def start_requests(self):
         urls = ['https://finance.kz/news']
         for url in urls:
-            yield scrapy.Request(url, callback=self.parse_articles, meta={'use_selenium': True})
+            yield self.rendered_request(url, callback=self.parse_articles)
 
     def parse_articles(self, response):
         """
         Processes each article element, extracting the URL and scheduling a parse callback.
         """
-        self.driver.get(response.url)
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'div.record-item-block'))
-            )
-            articles = self.driver.find_elements(By.CSS_SELECTOR, 'div.record-item-block')
-            for article in articles:
-                link = article.find_element(By.TAG_NAME, 'a')
-                href = link.get_attribute('href')
-                date_span = article.find_element(By.CSS_SELECTOR, 'span.record-item-date').text.strip()
-                article_date = dateparser.parse(date_span, languages=['ru']).date()
-                if href and article_date == datetime.now().date():
-                    yield scrapy.Request(href, callback=self.parse_article_content, meta={'use_selenium': True})
-        except TimeoutException:
-            logging.error(f'Timeout while loading {response.url}')
-        except WebDriverException as e:
-            logging.error(f"WebDriver exception on {response.url}: {e}")
-    
-    def parse_article_content(self, response):
+        articles = response.css('div.record-item-block')
+        for article in articles:
+            href = article.css('a::attr(href)').get()
+            if href and self.in_date_window(article):
+                yield self.rendered_request(response.urljoin(href), callback=self.parse_article_content)
+
+    async def parse_article_content(self, response):
         """
         Parses individual news articles to extract relevant information.
         """
-
-        self.driver.get(response.url)
         try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div.record-page-date'))
-            )
-            date_str_element = self.driver.find_element(By.CSS_SELECTOR, 'div.record-page-date').text.strip()
-            date_obj = dateparser.parse(date_str_element)
-            if date_obj.date() == datetime.now().date():
+            date_str_element = response.css('div.record-page-date').xpath('string()').get(default='').strip()
+            date_obj = self.date_parser.parse(date_str_element)
+            if date_obj.date() == crawl_date():
                 news_item = MarketItem()
                 news_item['date'] = date_obj.strftime('%Y-%m-%d')
 
-                header = self.driver.find_element(By.CSS_SELECTOR, 'h1').text
-                translated_header = self.translator.translate_text(header)
-                news_item['header'] = translated_header if translated_header else "Empty"
-                
-                sub_header = self.driver.find_element(By.CSS_SELECTOR, 'h3').text
-                translated_sub_header = self.translator.translate_text(sub_header)
-                news_item['sub_header'] = translated_sub_header if translated_sub_header else "Empty"
-                
+                header = response.css('h1').xpath('string()').get(default='').strip()
+                sub_header = response.css('h3').xpath('string()').get(default='').strip()
+                paragraphs = response.css('div.record-page-body > p')
+                content = ' '.join(p.xpath('string()').get().strip() for p in paragraphs)
+
+                # All fields of the article are translated in a single request
+                translated = await self.translator.translate_fields({
+                    'header': header,
+                    'sub_header': sub_header,
+                    'content': content,
+                })
+                if not translated['header']:
+                    # The translation request failed; the article is fetched again on the next run
+                    logging.error(f"No translated header, skipping article on {response.url}")
+                    return
+                news_item['header'] = translated['header']
+                news_item['sub_header'] = translated['sub_header'] if translated['sub_header'] else "Empty"
                 news_item['label'] = "Central Asia"
-                
-                paragraphs = self.driver.find_elements(By.CSS_SELECTOR, 'div.record-page-body > p')
-                content = ' '.join(p.text.strip() for p in paragraphs)
-                translated_content = self.translator.translate_text(content)
-                news_item['content'] = translated_content if translated_content else None
+                news_item['content'] = translated['content'] if translated['content'] else None
 
                 yield news_item
             else:
+                # Off-day articles stay off-day; the frontier skips the page on later runs
+                response.meta['frontier_rejected'] = True
                 logging.info(f"Skipping article from {date_obj.strftime('%Y-%m-%d')}, not today's date.")
-        except WebDriverException as e:
-            news_item['content'] = "Empty"
-            logging.error(f"WebDriver exception while parsing article content on {response.url}: {e}")
         except Exception as e:
-            news_item['content'] = "Empty"
             logging.error(f"Unexpected error while parsing article content on {response.url}: {e}")
-            
-
-    def closed(self, reason):
-        """
-        Ensures the Selenium webdriver is properly closed when the spider is closed to prevent resource leaks.
-        """
-        self.driver.quit()
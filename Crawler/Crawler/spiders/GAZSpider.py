@@ -1,12 +1,10 @@
 import os
 import scrapy
 import logging
-from datetime import datetime
-import dateparser
 from Crawler.items import MarketItem
-from services.translator import Translator
+from services.async_translator import get_async_translator
+from services.date_parser import DateParser, crawl_date
 from dotenv import load_dotenv
-from selenium.common.exceptions import TimeoutException, WebDriverException
 
 
 class MarketSpiderGAZ(scrapy.Spider):
@@ -16,6 +14,7 @@ class MarketSpiderGAZ(scrapy.Spider):
     name = "GAZSpider"
     allowed_domains = ["gazeta.uz"]
     start_urls = ["https://www.gazeta.uz/uz/economy?page=1"]
+    date_parser = DateParser(languages=['uz', 'ru'])
 
     def __init__(self, *args, **kwargs):
         load_dotenv()
@@ -24,7 +23,7 @@ class MarketSpiderGAZ(scrapy.Spider):
         if not api_key:
             logging.error("OPENAI_API_KEY not found in environment variables")
             raise EnvironmentError("OPENAI_API_KEY not found in environment variables")
-        self.translator = Translator(api_key=api_key)
+        self.translator = get_async_translator(api_key)
 
     def parse(self, response):
         """
@@ -42,37 +41,45 @@ class MarketSpiderGAZ(scrapy.Spider):
             else:
                 logging.warning('Missing URL in article listing: {}'.format(response.url))
 
-    def parse_news_content(self, response):
+    async def parse_news_content(self, response):
         """
         Parses individual news articles to extract relevant information.
         """
         try:
             date_text = response.css('div.articleDateTime::text').extract_first(default='').strip()
             parsed_date = self.handle_date(date_text)
-            if not parsed_date or parsed_date.date() != datetime.now().date():
+            if not parsed_date or parsed_date.date() != crawl_date():
+                if parsed_date:
+                    # Off-day articles stay off-day; the frontier skips the page on later runs
+                    response.meta['frontier_rejected'] = True
                 logging.info(f"Skipping article, not from today: {date_text}")
                 return
-            yield self.extract_article_info(response, parsed_date)
+            yield await self.extract_article_info(response, parsed_date)
         except Exception as e:
             logging.error(f"Error extracting article content from {response.url}: {e}")
 
-    def extract_article_info(self, response, parsed_date):
+    async def extract_article_info(self, response, parsed_date):
         """
-        Extracts details from the article response and prepares them for translation.
+        Extracts details from the article response and translates them in a single request.
         """
         item = MarketItem()
         try:
             item['date'] = parsed_date.strftime('%Y-%m-%d')
-            item['header'] = self.translate_text(response.css('h1::text').get())
-            item['sub_header'] = self.translate_text(response.css('h4::text').get())
-            item['img_caption'] = self.translate_text(response.css('p.articlePicDesc::text').get())
-            item['label'] = self.translate_text(response.css('div.articleDateTime a span::text').get())
-            item['content'] = self.translate_text(' '.join(response.css('div.articleContent.type-news p::text').extract()))
+            translated = await self.translator.translate_fields({
+                'header': response.css('h1::text').get(),
+                'sub_header': response.css('h4::text').get(),
+                'img_caption': response.css('p.articlePicDesc::text').get(),
+                'label': response.css('div.articleDateTime a span::text').get(),
+                'content': ' '.join(response.css('div.articleContent.type-news p::text').extract()),
+            })
+            if not translated['header']:
+                # The translation request failed; the article is fetched again on the next run
+                logging.error(f"No translated header, skipping article on {response.url}")
+                return None
+            for field, text in translated.items():
+                item[field] = text or "Empty"
             item['img'] = response.css('img.lazy.articleBigPic::attr(data-src)').get()
             return item
-        except WebDriverException as e:
-            item['content'] = "Empty"
-            logging.error(f"WebDriver exception while parsing article content on {response.url}: {e}")
         except Exception as e:
             item['content'] = "Empty"
             logging.error(f"Unexpected error while parsing article content on {response.url}: {e}")
@@ -84,21 +91,7 @@ class MarketSpiderGAZ(scrapy.Spider):
         Parses the publication date from a string, handling relative dates like 'Today'.
         """
         try:
-            if 'Бугун' in date_text:
-                return datetime.now()
-            return dateparser.parse(date_text)
+            return self.date_parser.parse(date_text)
         except Exception as e:
             logging.error(f"Error parsing date: {date_text}, Error: {e}")
             return None
-
-    def translate_text(self, text):
-        """
-        Translates text using the configured translation service.
-        """
-        try:
-            if text:
-                text = text.strip()
-                return self.translator.translate_text(text)
-        except Exception as e:
-            logging.error(f"Translation error for text: {e}")
-        return "Empty"
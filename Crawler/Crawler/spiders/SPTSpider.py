@@ -1,18 +1,17 @@
 import scrapy
 import os
-from datetime import datetime
 import logging
 from Crawler.items import MarketItem
-from services.translator import Translator
-import dateparser
+from services.async_translator import get_async_translator
+from services.date_parser import DateParser, crawl_date
 from dotenv import load_dotenv
-from selenium.common.exceptions import TimeoutException, WebDriverException
 
 
 class MarketSpiderSPT(scrapy.Spider):
     name = "SPTSpider"
     allowed_domains = ["spot.uz"]
     start_urls = ["https://www.spot.uz/ru/business/"]
+    date_parser = DateParser(languages=['ru'])
 
     def __init__(self, *args, **kwargs):
         load_dotenv()
@@ -20,7 +19,7 @@ class MarketSpiderSPT(scrapy.Spider):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise EnvironmentError("OPENAI_API_KEY not found in environment variables")
-        self.translator = Translator(api_key=api_key)
+        self.translator = get_async_translator(api_key)
 
     def parse(self, response):
         """
@@ -37,7 +36,7 @@ class MarketSpiderSPT(scrapy.Spider):
             else:
                 self.logger.warning('Missing URL in article listing.')
 
-    def parse_news_content(self, response):
+    async def parse_news_content(self, response):
         """
         Extracts content from an individual news article page and processes it.
         """
@@ -48,33 +47,40 @@ class MarketSpiderSPT(scrapy.Spider):
             self.logger.error(f'Error parsing date for article: {response.url}')
             return
 
-        if parsed_date.date() != datetime.now().date():
+        if parsed_date.date() != crawl_date():
+            # Off-day articles stay off-day; the frontier skips the page on later runs
+            response.meta['frontier_rejected'] = True
             self.logger.info(f"Skipping article, not from today: {date_string}")
             return
 
         try:
-            news_item = self.extract_article_info(response, parsed_date)
+            news_item = await self.extract_article_info(response, parsed_date)
             yield news_item
         except Exception as e:
             self.logger.error(f"Error extracting article content: {e}, URL: {response.url}")
 
-    def extract_article_info(self, response, parsed_date):
+    async def extract_article_info(self, response, parsed_date):
         """
-        Extracts details from the article response and prepares them for translation.
+        Extracts details from the article response and translates them in a single request.
         """
         item = MarketItem()
         try:
             item['date'] = parsed_date.strftime('%Y-%m-%d')
-            item['label'] = self.translate_text(response.css('div.itemData a span::text').get())
-            item['header'] = self.translate_text(response.css('h1::text').get())
-            item['sub_header'] = self.translate_text(response.css('div.articleContent p::text').get())
             item['img'] = response.css('div.articleContent a::attr(href)').get()
-            item['img_caption'] = self.translate_text(response.css('div.postPicDesc::text').get())
-            item['content'] = self.translate_text(' '.join(response.css('div.js-mediator-article.article-text p::text').extract()))
+            translated = await self.translator.translate_fields({
+                'label': response.css('div.itemData a span::text').get(),
+                'header': response.css('h1::text').get(),
+                'sub_header': response.css('div.articleContent p::text').get(),
+                'img_caption': response.css('div.postPicDesc::text').get(),
+                'content': ' '.join(response.css('div.js-mediator-article.article-text p::text').extract()),
+            })
+            if not translated['header']:
+                # The translation request failed; the article is fetched again on the next run
+                logging.error(f"No translated header, skipping article on {response.url}")
+                return None
+            for field, text in translated.items():
+                item[field] = text or "Empty"
             return item
-        except WebDriverException as e:
-            logging.error(f"WebDriver exception while parsing article content on {response.url}: {e}")
-            item['content'] = "Empty"
         except Exception as e:
             item['content'] = "Empty"
             logging.error(f"Unexpected error while parsing article content on {response.url}: {e}")
@@ -84,15 +90,4 @@ class MarketSpiderSPT(scrapy.Spider):
         """
         Parses the publication date from a string, handling relative dates like 'Today'.
         """
-        if "Сегодня" in date_string:
-            return datetime.now()
-        return dateparser.parse(date_string)
-
-    def translate_text(self, text):
-        """
-        Translates text using the configured translation service.
-        """
-        if text:
-            text = text.strip()
-            return self.translator.translate_text(text)
-        return "Empty"
+        return self.date_parser.parse(date_string)
@@ -1,21 +1,22 @@
 import scrapy
 import os
-from datetime import datetime
 import logging
 from Crawler.items import MarketItem
-from services.translator import Translator
-import dateparser
+from services.async_translator import get_async_translator
+from services.date_parser import DateParser, crawl_date
 from dotenv import load_dotenv
-from selenium.common.exceptions import TimeoutException, WebDriverException
 
 
 class MarketSpiderUZA(scrapy.Spider):
     name = "UZASpider"
     allowed_domains = ["uza.uz"]
     start_urls = ["https://uza.uz/"]
+    date_parser = DateParser(languages=['ru'])
 
     custom_settings = {
         'DOWNLOADER_MIDDLEWARES': {
+            'Crawler.middlewares.IncrementalCrawlMiddleware': 50,
+            'Crawler.middlewares.ConditionalGetMiddleware': 100,
             'scrapy.downloadermiddlewares.redirect.MetaRefreshMiddleware': None,
         },
     }
@@ -29,7 +30,7 @@ class MarketSpiderUZA(scrapy.Spider):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise EnvironmentError("OPENAI_API_KEY not found in environment variables")
-        self.translator = Translator(api_key=api_key)
+        self.translator = get_async_translator(api_key)
 
     def parse(self, response):
         """
@@ -42,48 +43,55 @@ class MarketSpiderUZA(scrapy.Spider):
             full_url = response.urljoin(url)
             yield response.follow(full_url, self.parse_news_content)
 
-    def parse_news_content(self, response):
+    async def parse_news_content(self, response):
         date_text = response.css('div.news-top-head__date::text').get()
         if not date_text:
             logging.error('Date not found for article: {}'.format(response.url))
             return
 
-        parsed_date = dateparser.parse(date_text.strip(), languages=['ru'])
-        if not parsed_date or parsed_date.date() != datetime.now().date():
+        parsed_date = self.date_parser.parse(date_text)
+        if not parsed_date or parsed_date.date() != crawl_date():
+            if parsed_date:
+                # Off-day articles stay off-day; the frontier skips the page on later runs
+                response.meta['frontier_rejected'] = True
             logging.info(f"Skipping article, not from today: {date_text}")
             return
 
         try:
-            item = self.extract_article_info(response, parsed_date)
+            item = await self.extract_article_info(response, parsed_date)
             yield item
         except Exception as e:
             logging.error(f"Error extracting article content: {e}")
 
-    def extract_article_info(self, response, parsed_date):
+    async def extract_article_info(self, response, parsed_date):
         item = MarketItem()
         try:
             item['date'] = parsed_date.strftime('%Y-%m-%d')
-            item['header'] = self.translate_and_extract_text(response, 'div.news-top-head__title::text')
-            content = self.translate_and_extract_text(response, 'div.content-block p::text', join=True)
+            # Header and content are translated together in a single request
+            header = self.extract_text(response, 'div.news-top-head__title::text')
+            translated = await self.translator.translate_fields({
+                'header': header,
+                'content': self.extract_text(response, 'div.content-block p::text', join=True),
+            })
+            if header and not translated['header']:
+                # The translation request failed; the article is fetched again on the next run
+                logging.error(f"No translated header, skipping article on {response.url}")
+                return None
+            item['header'] = translated['header']
+            content = translated['content']
             item['content'] = content if content not in [None, ""] else "Empty"
             item['label'] = "Business"
             item['sub_header'] = "Empty" 
             return item
-        except TimeoutException as e:
-            item['content'] = "Empty"
-            logging.error(f"Timeout waiting for article content to load on {response.url}: {e}")
-        except WebDriverException as e:
-            item['content'] = "Empty"
-            logging.error(f"WebDriver exception while parsing article content on {response.url}: {e}")
         except Exception as e:
             item['content'] = "Empty"
             logging.error(f"Unexpected error while parsing article content on {response.url}: {e}")
         
 
-    def translate_and_extract_text(self, response, css_selector, join=False):
+    def extract_text(self, response, css_selector, join=False):
         texts = response.css(css_selector).getall()
         if join:
             text = ' '.join(texts).strip()
         else:
             text = texts[0].strip() if texts else None
-        return self.translator.translate_text(text) if text else None
+        return text if text else None
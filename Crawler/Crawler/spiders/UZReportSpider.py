@@ -1,12 +1,13 @@
 import scrapy
 import re
-from datetime import datetime
 from Crawler.items import MarketItem
+from services.date_parser import DateParser
 
 class UZReportSpider(scrapy.Spider):
     name = "UZReportSpider"
     allowed_domains = ["uzreport.news"]
     start_urls = ["https://www.uzreport.news"]
+    date_parser = DateParser(formats=['%H:%M, %d %B %Y'], languages=['uz'])
 
     def parse(self, response):
         articles = response.css('div.search-content.hidden-xs h3 a::attr(href)').extract()
@@ -17,7 +18,6 @@ class UZReportSpider(scrapy.Spider):
         item = MarketItem()
 
         date_string = ''.join(response.css('li.time a::text').extract()).strip()
-        date_string = self.translate_date_to_english(date_string)
         date_string = self.clean_date_string(date_string)
 
         item['date'] = self.parse_date(date_string)
@@ -30,25 +30,6 @@ class UZReportSpider(scrapy.Spider):
         
         yield item
 
-    def translate_date_to_english(self, date_str):
-        translations = {
-            'yanvar': 'January',
-            'fevral': 'February',
-            'mart': 'March',
-            'aprel': 'April',
-            'may': 'May',
-            'iyun': 'June',
-            'iyul': 'July',
-            'avgust': 'August',
-            'sentyabr': 'September',
-            'oktyabr': 'October',
-            'noyabr': 'November',
-            'dekabr': 'December'
-        }
-        for uz, en in translations.items():
-            date_str = date_str.replace(uz, en)
-        return date_str
-
     def clean_date_string(self, date_str):
         # Find the year using regex and keep everything up to that point
         year_match = re.search(r'\d{4}', date_str)
@@ -58,10 +39,9 @@ class UZReportSpider(scrapy.Spider):
         return date_str
 
     def parse_date(self, date_str):
-        try:
-            # Assuming the cleaned date string is now in a 'day Month year' format
-            date_obj = datetime.strptime(date_str, '%H:%M, %d %B %Y')
-            return date_obj.strftime('%Y-%m-%d')
-        except ValueError as e:
-            self.logger.error(f"Error parsing date '{date_str}': {e}")
+        # The cleaned date string is in an 'HH:MM, day month year' format with an Uzbek month name
+        date_obj = self.date_parser.parse(date_str)
+        if date_obj is None:
+            self.logger.error(f"Error parsing date '{date_str}'")
             return None
+        return date_obj.strftime('%Y-%m-%d')
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of services.date_parser.DateParser against dateparser.
+
+The strings below are the shapes the spiders read from listing and article pages (relative
+days, Russian and Uzbek month names, numeric dates). A crawl parses each string more than
+once (listing row and article page), so the list repeats them.
+
+Run from the Crawler directory:
+
+    python benchmarks/bench_dates.py [--rounds 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.date_parser import DateParser  # noqa: E402
+
+DATE_STRINGS = [
+    # gazeta.uz
+    'Бугун, 14:05', 'Кеча, 18:40', '12 март 2024, 10:20',
+    # spot.uz, finance.kz, forbes.kz, uza.uz
+    'Сегодня, 09:15', 'Вчера в 22:10', '12 марта 2024, 10:35', '3 сентября 2023 г.', '12.03.2024 10:00',
+    '20 декабря, 11:45',
+    # uzreport.news
+    '14:05, 12 mart 2024', '09:30, 1 iyun 2024',
+    # astanatimes.com, asiafinancial.com, centralasia.tech
+    '12 March 2024', 'March 12, 2024', '2024-03-12',
+] * 4
+
+
+def bench(label, parse, strings, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in strings:
+            parse(text)
+    elapsed = time.perf_counter() - start
+    calls = rounds * len(strings)
+    print(f"{label:<32} {calls:>8} calls  {elapsed * 1e6 / calls:>10.1f} us/call")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rounds', type=int, default=20)
+    args = arg_parser.parse_args()
+
+    unparsed = [text for text in set(DATE_STRINGS) if DateParser(memo_size=0).parse(text) is None]
+    if unparsed:
+        print(f"Not parsed without dateparser: {unparsed}")
+
+    start = time.perf_counter()
+    DateParser(languages=['ru']).parse(DATE_STRINGS[0])
+    print(f"{'DateParser first call':<32} {(time.perf_counter() - start) * 1e3:>29.2f} ms")
+    bench('DateParser, no memo', DateParser(languages=['ru'], memo_size=0).parse, DATE_STRINGS, args.rounds)
+    bench('DateParser, memoised', DateParser(languages=['ru']).parse, DATE_STRINGS, args.rounds)
+
+    try:
+        import dateparser
+    except ImportError:
+        print("dateparser is not installed; skipping the comparison")
+        return
+
+    start = time.perf_counter()
+    dateparser.parse(DATE_STRINGS[0])
+    print(f"{'dateparser first call':<32} {(time.perf_counter() - start) * 1e3:>29.2f} ms")
+    # dateparser is slow enough that fewer rounds give a stable figure
+    rounds = max(1, args.rounds // 10)
+    bench('dateparser, detected language', dateparser.parse, DATE_STRINGS, rounds)
+    bench('dateparser, languages=ru,uz,en', lambda text: dateparser.parse(text, languages=['ru', 'uz', 'en']),
+          DATE_STRINGS, rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Local databases for the offline benchmark: an in-memory stand-in for the Supabase client
+used by CrawlerPipeline, and a SQLite copy of the WordPress tables DraftPipeline writes to.
+"""
+import sqlite3
+
+from services.wordpress_writer import POST_COLUMNS
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, run):
+        self._run = run
+
+    def execute(self):
+        return _Result(self._run())
+
+
+class _Table:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, *columns):
+        names = [name.strip() for column in columns for name in column.split(',')]
+        if names == ['*']:
+            return _Query(lambda: [dict(row) for row in self.rows])
+        return _Query(lambda: [{name: row.get(name) for name in names} for row in self.rows])
+
+    def insert(self, rows):
+        rows = [dict(row) for row in (rows if isinstance(rows, list) else [rows])]
+
+        def run():
+            self.rows.extend(rows)
+            return rows
+        return _Query(run)
+
+
+class LocalSupabase:
+    """
+    Keeps Supabase tables as lists of dicts in memory.
+
+    Supports the calls the pipelines make: `table(name).select(columns).execute()` and
+    `table(name).insert(rows).execute()`, both returning an object with `data`.
+    """
+
+    def __init__(self, tables=None):
+        """
+        Args:
+            tables (dict, optional): Initial rows per table name, e.g. {'news': [{'header': ...}]}.
+        """
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+
+    def table(self, name):
+        return _Table(self.tables.setdefault(name, []))
+
+
+class _Cursor:
+    """A DB-API cursor over SQLite that accepts the MySQL-style queries WordPressWriter sends."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursor = conn.cursor()
+        self.lastrowid = None
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace('%s', '?'), params)
+        self.lastrowid = self._cursor.lastrowid
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(query.replace('%s', '?'), rows)
+        self.lastrowid = None
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def close(self):
+        self._cursor.close()
+
+
+class WordPressSQLite:
+    """
+    A connection to a SQLite database holding the WordPress tables DraftPipeline writes:
+    posts, terms, term_taxonomy and term_relationships.
+    """
+
+    def __init__(self, path=':memory:', table_prefix='wp_'):
+        """
+        Args:
+            path (str): SQLite database file, in memory by default.
+            table_prefix (str): WordPress table prefix, matching WP_TABLE_PREFIX.
+        """
+        self.table_prefix = table_prefix
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        post_columns = ', '.join(f"{column} TEXT" for column in POST_COLUMNS)
+        self.conn.executescript(
+            f"CREATE TABLE IF NOT EXISTS {table_prefix}posts (ID INTEGER PRIMARY KEY AUTOINCREMENT, {post_columns});"
+            f"CREATE TABLE IF NOT EXISTS {table_prefix}terms "
+            "(term_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, slug TEXT);"
+            f"CREATE TABLE IF NOT EXISTS {table_prefix}term_taxonomy (term_taxonomy_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "term_id INTEGER, taxonomy TEXT, description TEXT, count INTEGER NOT NULL DEFAULT 0);"
+            f"CREATE TABLE IF NOT EXISTS {table_prefix}term_relationships "
+            "(object_id INTEGER, term_taxonomy_id INTEGER);"
+        )
+
+    def cursor(self):
+        return _Cursor(self.conn)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+    def count(self, table):
+        """Returns the number of rows in a WordPress table, e.g. count('posts')."""
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table_prefix}{table}").fetchone()[0]
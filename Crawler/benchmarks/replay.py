@@ -0,0 +1,216 @@
+"""
+Recorded site fixtures for the offline benchmark.
+
+In record mode RecordingMiddleware saves every page a spider receives (after rendering,
+so JS-heavy sites are stored as the DOM their callbacks parse) into a FixtureStore. In
+replay mode FixtureServer serves those pages from a local HTTP server and
+ReplayDownloadHandler sends every request there instead of to the site, so the crawl
+exercises Scrapy's real download path without touching the network.
+
+A fixture directory holds one folder of HTML files per spider and an index.json that maps
+each recorded URL to its file, status and headers, plus the day each spider was
+recorded on (spiders only keep articles from the crawl date, see services.date_parser.crawl_date).
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from scrapy import signals
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.exceptions import NotConfigured
+
+# Response headers kept with each recorded page; Location lets redirects replay
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+
+class FixtureStore:
+    """Recorded pages on disk, indexed by URL."""
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): The fixture directory (created on the first `save`).
+        """
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self.pages = {}
+        self.recorded_on = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as file:
+                index = json.load(file)
+            self.pages = index.get('pages', {})
+            self.recorded_on = index.get('recorded_on', {})
+
+    def add(self, spider_name, url, status, headers, body):
+        """
+        Writes a page's body to the spider's folder and indexes it under `url`.
+
+        Args:
+            spider_name (str): The spider that fetched the page.
+            url (str): The URL that was requested.
+            status (int): The response status.
+            headers (dict): The REPLAYED_HEADERS of the response, as str values.
+            body (bytes): The response body.
+        """
+        file_name = os.path.join(spider_name, hashlib.sha1(url.encode('utf-8')).hexdigest()[:20] + '.html')
+        path = os.path.join(self.root, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(body)
+        self.pages[url] = {'spider': spider_name, 'file': file_name, 'status': status, 'headers': headers}
+        self.recorded_on[spider_name] = date.today().isoformat()
+
+    def get(self, url):
+        """
+        Returns:
+            tuple or None: (status, headers, body) of the recorded page, or None if `url` was
+            not recorded.
+        """
+        page = self.pages.get(url)
+        if page is None:
+            return None
+        with open(os.path.join(self.root, page['file']), 'rb') as file:
+            return page['status'], page['headers'], file.read()
+
+    def spiders(self):
+        """Returns the names of the spiders that have recorded pages."""
+        return sorted(self.recorded_on)
+
+    def page_count(self, spider_name):
+        return sum(1 for page in self.pages.values() if page['spider'] == spider_name)
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_path, 'w', encoding='utf-8') as file:
+            json.dump({'recorded_on': self.recorded_on, 'pages': self.pages}, file, indent=1, sort_keys=True)
+
+
+class RecordingMiddleware:
+    """
+    Downloader middleware that saves every response into the FixtureStore at
+    BENCHMARK_FIXTURES_DIR.
+
+    The store is shared by every crawler in the process and its index is written when the
+    last spider closes.
+    """
+    store = None
+    open_spiders = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        root = crawler.settings.get('BENCHMARK_FIXTURES_DIR')
+        if not root:
+            raise NotConfigured('BENCHMARK_FIXTURES_DIR is not set')
+        if cls.store is None:
+            cls.store = FixtureStore(root)
+        s = cls()
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def spider_opened(self, spider):
+        self.__class__.open_spiders += 1
+
+    def spider_closed(self, spider):
+        cls = self.__class__
+        cls.open_spiders -= 1
+        if cls.open_spiders == 0:
+            cls.store.save()
+
+    def process_response(self, request, response, spider):
+        headers = {
+            name: response.headers[name].decode('latin-1') for name in REPLAYED_HEADERS if name in response.headers
+        }
+        self.store.add(spider.name, request.url, response.status, headers, response.body)
+        spider.crawler.stats.inc_value('benchmark/recorded')
+        return response
+
+
+class FixtureServer:
+    """
+    Serves a FixtureStore over HTTP on 127.0.0.1.
+
+    GET /fixture?url=<recorded url> answers with the recorded status, headers and body, or
+    404 for a URL that was not recorded. Requests are served from a thread per connection.
+    """
+
+    def __init__(self, store, port=0):
+        """
+        Args:
+            store (FixtureStore): The recorded pages.
+            port (int): Port to listen on; 0 picks a free one.
+        """
+        self.store = store
+        self.served = 0
+        self.missing = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                target = parse_qs(urlparse(self.path).query).get('url', [''])[0]
+                page = server.store.get(target)
+                with server._lock:
+                    if page is None:
+                        server.missing.append(target)
+                    else:
+                        server.served += 1
+                status, headers, body = page if page is not None else (404, {'Content-Type': 'text/plain'}, b'not recorded')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ReplayDownloadHandler(HTTP11DownloadHandler):
+    """
+    Download handler for http and https that fetches every request from the FixtureServer
+    at BENCHMARK_FIXTURE_SERVER.
+
+    The request is rewritten to the server's /fixture URL and downloaded with Scrapy's
+    regular HTTP/1.1 handler; the response keeps the original URL, so callbacks resolve
+    relative links exactly as they did when the page was recorded.
+    """
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        self.server_url = crawler.settings.get('BENCHMARK_FIXTURE_SERVER')
+        if not self.server_url:
+            raise NotConfigured('BENCHMARK_FIXTURE_SERVER is not set')
+
+    async def download_request(self, request):
+        fixture_url = f"{self.server_url}/fixture?{urlencode({'url': request.url})}"
+        response = await super().download_request(request.replace(url=fixture_url))
+        return response.replace(url=request.url)
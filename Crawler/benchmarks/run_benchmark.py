@@ -0,0 +1,359 @@
+"""
+End-to-end offline benchmark of the crawl, dedup, grouping and drafting stages.
+
+Spiders crawl recorded copies of their sites served by a local HTTP server (see
+benchmarks/replay.py), translation and drafting requests go to a local stub of the OpenAI
+API (benchmarks/stub_openai.py), and the pipelines write to in-memory stand-ins for
+Supabase and the WordPress database (benchmarks/local_db.py). Nothing touches the network,
+so runs on the same fixtures are comparable and regressions show up as changes in the report:
+pages/s and items/s of the crawl, the latency of every stage and the peak RSS after each.
+
+The dedup and grouping stages load the SentenceTransformer and spaCy models; they must
+have been downloaded once, as the benchmark runs Hugging Face in offline mode.
+
+Run from the Crawler directory. Record fixtures once (this one needs the network and the
+spiders' renderers; translations still go to the stub, only the pages are kept):
+
+    python benchmarks/run_benchmark.py record --fixtures benchmarks/fixtures --spiders GAZSpider SPTSpider
+
+Replay them, optionally saving the crawled items for later runs:
+
+    python benchmarks/run_benchmark.py replay --fixtures benchmarks/fixtures --output report.json
+
+Benchmark only the stages after the crawl, from items saved by an earlier replay:
+
+    python benchmarks/run_benchmark.py replay --items items.jsonl --stages dedup grouping drafting
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.local_db import LocalSupabase, WordPressSQLite  # noqa: E402
+from benchmarks.replay import FixtureServer, FixtureStore  # noqa: E402
+from benchmarks.stub_openai import StubOpenAIServer  # noqa: E402
+
+STAGES = ['crawl', 'dedup', 'grouping', 'drafting']
+
+# Middlewares that keep state between runs or drive a browser; replays bypass all of them
+STATEFUL_MIDDLEWARES = ['Crawler.middlewares.IncrementalCrawlMiddleware', 'Crawler.middlewares.ConditionalGetMiddleware']
+RENDERING_MIDDLEWARES = ['Crawler.middlewares.SeleniumMiddleware']
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of the process so far, in MB (None on Windows)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def configure_environment(llm_url, crawl_date=None):
+    """
+    Points the translators and DraftPipeline at the stub API and makes every run start cold.
+
+    Must run before the project settings and spiders are imported, since they read the
+    environment at import time.
+    """
+    os.environ['OPENAI_BASE_URL'] = llm_url
+    os.environ['OPENAI_API_KEY'] = 'benchmark'
+    # No translation cache and a fresh embedding store, so every run does the same work
+    os.environ['TRANSLATION_CACHE_PATH'] = ''
+    os.environ['EMBEDDING_STORE_DIR'] = tempfile.mkdtemp(prefix='benchmark-embeddings-')
+    # The stub has no rate limit to respect
+    os.environ.setdefault('TRANSLATION_RPM', '100000')
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'Crawler.settings')
+    if crawl_date:
+        os.environ['CRAWL_DATE'] = crawl_date
+
+
+def crawl_settings(spider_classes, mode, fixtures_dir, fixture_server_url, log_level):
+    """Returns the project settings, overridden at cmdline priority for a benchmark crawl."""
+    from scrapy.utils.project import get_project_settings
+
+    # Spider-level middlewares are kept, apart from the stateful ones (and, when replaying,
+    # the browser renderer: recorded pages are already rendered)
+    disabled = STATEFUL_MIDDLEWARES + (RENDERING_MIDDLEWARES if mode == 'replay' else [])
+    middlewares = {}
+    for spider_class in spider_classes:
+        middlewares.update((spider_class.custom_settings or {}).get('DOWNLOADER_MIDDLEWARES', {}))
+    middlewares.update(dict.fromkeys(disabled))
+
+    overrides = {
+        'SPIDER_MODULES': [],
+        'LOG_LEVEL': log_level,
+        'TELNETCONSOLE_ENABLED': False,
+        'FEEDS': {},
+        'ITEM_PIPELINES': {'Crawler.pipelines.AccumulatePipeline': 300},
+        'FRONTIER_ENABLED': False,
+        'CONDITIONAL_GET_ENABLED': False,
+        'DOWNLOADER_MIDDLEWARES': middlewares,
+    }
+    if mode == 'record':
+        middlewares['benchmarks.replay.RecordingMiddleware'] = 950
+        overrides['BENCHMARK_FIXTURES_DIR'] = fixtures_dir
+    else:
+        overrides.update({
+            # Rendered requests are downloaded like any other; the fixture holds the rendered DOM
+            'RENDER_BACKEND': 'selenium',
+            'DOWNLOAD_HANDLERS': {
+                'http': 'benchmarks.replay.ReplayDownloadHandler',
+                'https': 'benchmarks.replay.ReplayDownloadHandler',
+            },
+            'BENCHMARK_FIXTURE_SERVER': fixture_server_url,
+        })
+
+    settings = get_project_settings()
+    settings.setdict(overrides, priority='cmdline')
+    return settings
+
+
+def run_crawl(spider_classes, settings):
+    """
+    Runs the spiders concurrently, as run_all_spiders does, and collects what they scraped.
+
+    Returns:
+        tuple: (items, report) with the accumulated items and the crawl's report entry.
+    """
+    from scrapy.crawler import CrawlerRunner
+    from scrapy.utils.log import configure_logging
+    from scrapy.utils.reactor import install_reactor
+
+    install_reactor(settings.get('TWISTED_REACTOR'))
+    from twisted.internet import defer, reactor
+
+    configure_logging(settings)
+    runner = CrawlerRunner(settings)
+    crawlers = [runner.create_crawler(spider_class) for spider_class in spider_classes]
+
+    started = time.perf_counter()
+    d = defer.gatherResults([runner.crawl(crawler) for crawler in crawlers])
+    d.addBoth(lambda _: reactor.stop())
+    reactor.run()
+    seconds = time.perf_counter() - started
+
+    from Crawler.pipelines import AccumulatePipeline
+
+    per_spider = {}
+    for crawler in crawlers:
+        stats = crawler.stats.get_stats()
+        per_spider[crawler.spider.name] = {
+            'pages': stats.get('response_received_count', 0),
+            'items': stats.get('item_scraped_count', 0),
+            'seconds': round(stats.get('elapsed_time_seconds', 0.0), 3),
+        }
+    pages = sum(spider['pages'] for spider in per_spider.values())
+    items = list(AccumulatePipeline.get_accumulated_items())
+    AccumulatePipeline.reset()
+    return items, {
+        'seconds': round(seconds, 3),
+        'pages': pages,
+        'pages_per_second': round(pages / seconds, 2) if seconds else None,
+        'items': len(items),
+        'items_per_second': round(len(items) / seconds, 2) if seconds else None,
+        'spiders': per_spider,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_stages(items, stages):
+    """
+    Runs dedup, grouping and drafting the way run_all_spiders does, against local databases.
+
+    Returns:
+        dict: The report entry of each stage that ran.
+    """
+    report = {}
+    if 'dedup' in stages:
+        from Crawler.pipelines import CrawlerPipeline
+
+        started = time.perf_counter()
+        inserted = list(CrawlerPipeline(supabase_client=LocalSupabase()).process_item(items))
+        seconds = time.perf_counter() - started
+        report['dedup'] = {
+            'seconds': round(seconds, 3),
+            'items': len(items),
+            'items_per_second': round(len(items) / seconds, 2) if seconds else None,
+            'inserted': len(inserted),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        items = inserted
+
+    grouped_articles = {}
+    if 'grouping' in stages or 'drafting' in stages:
+        from Crawler.pipelines import ComparePipeline
+
+        started = time.perf_counter()
+        grouped_articles = ComparePipeline().process_grouped_articles(items) or {}
+        seconds = time.perf_counter() - started
+        report['grouping'] = {
+            'seconds': round(seconds, 3),
+            'items': len(items),
+            'items_per_second': round(len(items) / seconds, 2) if seconds else None,
+            'groups': len(grouped_articles),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+    if 'drafting' in stages and grouped_articles:
+        from Crawler.pipelines import DraftPipeline
+
+        database = WordPressSQLite(table_prefix=os.environ.get('WP_TABLE_PREFIX', 'wp_'))
+        started = time.perf_counter()
+        DraftPipeline(conn=database).close(grouped_articles)
+        seconds = time.perf_counter() - started
+        report['drafting'] = {
+            'seconds': round(seconds, 3),
+            'groups': len(grouped_articles),
+            'groups_per_second': round(len(grouped_articles) / seconds, 2) if seconds else None,
+            'posts': database.count('posts'),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+    return report
+
+
+def load_items(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_items(items, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        for item in items:
+            file.write(json.dumps(dict(item), ensure_ascii=False, default=str) + '\n')
+
+
+def print_report(report):
+    print(f"\n{'stage':<10} {'seconds':>9} {'count':>14} {'per second':>12} {'peak RSS':>11}")
+    for stage in STAGES:
+        entry = report['stages'].get(stage)
+        if entry is None:
+            continue
+        count_name = next(name for name in ('pages', 'items', 'groups') if name in entry)
+        rate = entry.get(f'{count_name}_per_second')
+        rss = entry.get('peak_rss_mb')
+        print(
+            f"{stage:<10} {entry['seconds']:>9.2f} {entry[count_name]:>8} {count_name:<5} "
+            f"{rate if rate is not None else '-':>12} {f'{rss} MB' if rss is not None else '-':>11}"
+        )
+    crawl = report['stages'].get('crawl')
+    if crawl:
+        print(f"{'':<10} {'':>9} {crawl['items']:>8} items {crawl['items_per_second'] or '-':>12}")
+    print(f"LLM requests: {report['llm_requests']}")
+
+
+def parse_args(argv=None):
+    from run_all_spiders import SPIDERS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--fixtures', default=os.path.join(os.path.dirname(__file__), 'fixtures'),
+                        help="Fixture directory (default: benchmarks/fixtures)")
+    parser.add_argument('--spiders', nargs='+', choices=sorted(SPIDERS), metavar='SPIDER',
+                        help="Spiders to crawl (default: every spider in the fixtures; every spider when recording)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES,
+                        help="Stages to run when replaying (default: all)")
+    parser.add_argument('--items', help="JSONL items to start from instead of crawling")
+    parser.add_argument('--save-items', help="Write the crawled items to this JSONL file")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Seconds the stub API waits per request")
+    parser.add_argument('--output', help="Write the report to this JSON file")
+    parser.add_argument('--log-level', default='WARNING')
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    from run_all_spiders import SPIDERS
+
+    store = FixtureStore(args.fixtures)
+    if args.mode == 'record':
+        spider_names = args.spiders or sorted(SPIDERS)
+        stages = ['crawl']
+        crawl_date = None
+    elif args.items:
+        spider_names = []
+        stages = [stage for stage in args.stages if stage != 'crawl']
+        crawl_date = None
+    else:
+        spider_names = args.spiders or store.spiders()
+        if not spider_names:
+            sys.exit(f"No fixtures in {args.fixtures}; record some first, or pass --items")
+        not_recorded = [name for name in spider_names if name not in store.recorded_on]
+        if not_recorded:
+            sys.exit(f"No fixtures for {', '.join(not_recorded)} in {args.fixtures}")
+        recorded_on = {store.recorded_on[name] for name in spider_names}
+        if len(recorded_on) > 1:
+            sys.exit(f"The fixtures of {', '.join(spider_names)} were recorded on different days "
+                     f"({', '.join(sorted(recorded_on))}); record them together or replay them separately")
+        stages = args.stages
+        crawl_date = recorded_on.pop()
+
+    llm = StubOpenAIServer(latency=args.llm_latency).start()
+    fixture_server = FixtureServer(store).start() if args.mode == 'replay' and spider_names else None
+    configure_environment(llm.url, crawl_date)
+    if 'crawl' not in stages:
+        # Otherwise Scrapy configures logging for the crawl
+        logging.basicConfig(level=args.log_level)
+
+    report = {
+        'mode': args.mode,
+        'spiders': spider_names,
+        'crawl_date': crawl_date,
+        'stages': {},
+    }
+    try:
+        if 'crawl' in stages:
+            spider_classes = []
+            for name in spider_names:
+                module_name, class_name = SPIDERS[name].split(':')
+                spider_classes.append(getattr(importlib.import_module(module_name), class_name))
+            settings = crawl_settings(
+                spider_classes, args.mode, args.fixtures, fixture_server.url if fixture_server else None, args.log_level,
+            )
+            items, report['stages']['crawl'] = run_crawl(spider_classes, settings)
+            if fixture_server:
+                report['stages']['crawl']['fixtures_missing'] = len(fixture_server.missing)
+            if args.save_items:
+                save_items(items, args.save_items)
+        else:
+            items = load_items(args.items)
+
+        report['stages'].update(run_stages(items, stages))
+
+        from services.metrics import metrics
+        from services.model_registry import registry
+        report['model_load_seconds'] = {
+            key: round(values['load_seconds'], 3) for key, values in registry.metrics().items()
+        }
+        # Timings of the individual operations inside the stages (see services/metrics.py)
+        report['metrics'] = metrics.report()
+    finally:
+        report['llm_requests'] = dict(llm.requests)
+        llm.stop()
+        if fixture_server:
+            fixture_server.stop()
+
+    if args.mode == 'record':
+        # RecordingMiddleware saved the pages through its own store
+        store = FixtureStore(args.fixtures)
+        print(f"Recorded {sum(store.page_count(name) for name in spider_names)} pages into {args.fixtures}")
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+A local stand-in for the OpenAI chat completions endpoint, used by the offline benchmark.
+
+The translators and DraftPipeline honour OPENAI_BASE_URL, so pointing it at this server
+replaces every API call with a canned answer of the same shape:
+
+- JSON translation prompts (services.async_translator) get the source JSON object back,
+  so each field "translates" to itself;
+- plain translation prompts ("Translate this to English: ...", services.translator) get the
+  source text back;
+- any other prompt is a drafting prompt and gets an HTML article built from its first lines.
+
+`latency` seconds are added to every answer to model the API's response time.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_TRANSLATE_RE = re.compile(r'^Translate this to [^:]+: (.*)$', re.DOTALL)
+
+
+def completion_text(prompt, json_mode=False):
+    """
+    Returns the canned answer to a prompt, and the kind of request it was.
+
+    Returns:
+        tuple: (kind, text), where kind is 'translation' or 'draft'.
+    """
+    if json_mode:
+        # The JSON object to translate is the last paragraph of the prompt
+        return 'translation', prompt.rsplit('\n\n', 1)[-1]
+    match = _TRANSLATE_RE.match(prompt)
+    if match:
+        return 'translation', match.group(1)
+
+    information = prompt.split('Information to Include:\n', 1)[-1]
+    words = information.split()
+    header = ' '.join(words[:10]) or 'Draft'
+    subheader = ' '.join(words[10:20])
+    paragraphs = ''.join(f"<p>{' '.join(words[start:start + 60])}</p>" for start in range(20, min(len(words), 620), 60))
+    return 'draft', f"<h1>{header}</h1><h2>{subheader}</h2>{paragraphs}"
+
+
+class StubOpenAIServer:
+    """
+    Serves POST <url>/chat/completions on 127.0.0.1, counts the requests by kind and
+    records the most requests that were in flight at once.
+    """
+
+    def __init__(self, latency=0.0, port=0):
+        """
+        Args:
+            latency (float): Seconds each answer is delayed by.
+            port (int): Port to listen on; 0 picks a free one.
+        """
+        self.latency = latency
+        self.requests = {'translation': 0, 'draft': 0}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base URL to use as OPENAI_BASE_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if not self.path.endswith('/chat/completions'):
+                    self.reply(404, {'error': {'message': f'Unknown path {self.path}'}})
+                    return
+
+                prompt = request.get('messages', [{}])[-1].get('content', '')
+                json_mode = request.get('response_format', {}).get('type') == 'json_object'
+                kind, text = completion_text(prompt, json_mode)
+                with server._lock:
+                    server.requests[kind] += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                self.reply(200, {
+                    'id': 'chatcmpl-stub',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'stub'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': text},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+                })
+
+            def reply(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-openai', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,100 +1,235 @@
+import argparse
 import asyncio
+import importlib
 import os
-from twisted.internet import asyncioreactor
-from scrapy.exceptions import DropItem
+import sys
+import time
 import logging
 
-# Set the event loop policy to use SelectorEventLoop, which is compatible with Twisted
-if os.name == 'nt':  # Only necessary on Windows
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-
-asyncioreactor.install(asyncio.get_event_loop())
-
-# The rest of your imports and code follow here...
-from twisted.internet import reactor, defer
-from twisted.internet.error import ReactorNotRunning
-from scrapy.crawler import CrawlerRunner
-from scrapy.utils.log import configure_logging
-from scrapy.utils.project import get_project_settings
-
-# Import all your spider classes
-from Crawler.spiders.AFSpider import MarketSpiderAFS as AFSpider
-from Crawler.spiders.ASTSpider import MarketSpiderAST as ASTSpider
-from Crawler.spiders.CATSpider import MarketSpiderCAT as CATSpider
-from Crawler.spiders.FBKSpider import MarketSpiderFBK as FBKSpider
-from Crawler.spiders.FKZSpider import MarketSpiderFKZ as FKZSpider
-from Crawler.spiders.UZASpider import MarketSpiderUZA as UZASpider
-from Crawler.spiders.GAZSpider import MarketSpiderGAZ as GAZSpider
-from Crawler.spiders.SPTSpider import MarketSpiderSPT as SPTSpider
-from Crawler.pipelines import AccumulatePipeline, CrawlerPipeline, ComparePipeline, DraftPipeline
-# ... continue importing all your spiders
-
-settings = get_project_settings()
-configure_logging(settings)
-runner = CrawlerRunner(settings)
-
-def run_spiders():
-    """Initializes and runs all spiders concurrently."""
-    crawls = [
-        # runner.crawl(FBKSpider),
-        # runner.crawl(CATSpider), #this website got shut down
-        # runner.crawl(ASTSpider),
-        # runner.crawl(FKZSpider),
-        runner.crawl(AFSpider),
-        # runner.crawl(UZASpider),
-        # runner.crawl(GAZSpider),
-        # runner.crawl(SPTSpider),
-        # Add all your spiders here
-    ]
+STARTED = time.perf_counter()
+
+# Spiders the runner can start, as "module:class". Only the modules of the spiders selected
+# on the command line are imported, so their dependencies load only when they are used.
+SPIDERS = {
+    'AFSpider': 'Crawler.spiders.AFSpider:MarketSpiderAFS',
+    'ASTSpider': 'Crawler.spiders.ASTSpider:MarketSpiderAST',
+    'CATSpider': 'Crawler.spiders.CATSpider:MarketSpiderCAT',  # this website got shut down
+    'FBKSpider': 'Crawler.spiders.FBKSpider:MarketSpiderFBK',
+    'FKZSpider': 'Crawler.spiders.FKZSpider:MarketSpiderFKZ',
+    'GAZSpider': 'Crawler.spiders.GAZSpider:MarketSpiderGAZ',
+    'SPTSpider': 'Crawler.spiders.SPTSpider:MarketSpiderSPT',
+    'UZASpider': 'Crawler.spiders.UZASpider:MarketSpiderUZA',
+    'UZReportSpider': 'Crawler.spiders.UZReportSpider:UZReportSpider',
+}
+DEFAULT_SPIDERS = ['AFSpider']
+
+# 'batch' runs dedup, grouping and drafting after every spider has finished;
+# 'stream' runs them on micro-batches of items while the spiders are still crawling
+PIPELINE_MODE = os.environ.get('PIPELINE_MODE', 'batch')
+
+
+class ImportTimer:
+    """Imports modules on demand and records how long each one took to load."""
+
+    def __init__(self):
+        self.timings = []
+
+    def load(self, module_name):
+        """
+        Imports `module_name`, recording its load time and how many modules it pulled in.
+
+        Returns:
+            module: The imported module.
+        """
+        modules_before = len(sys.modules)
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self.timings.append((module_name, time.perf_counter() - started, len(sys.modules) - modules_before))
+        return module
+
+    def load_attribute(self, path):
+        """Imports the module of a "module:attribute" path and returns the attribute."""
+        module_name, attribute = path.split(':')
+        return getattr(self.load(module_name), attribute)
+
+    def report(self, title):
+        lines = [f"{title} ({(time.perf_counter() - STARTED) * 1000:.0f} ms since start):"]
+        for module_name, seconds, new_modules in sorted(self.timings, key=lambda timing: -timing[1]):
+            lines.append(f"  {module_name:<40} {seconds * 1000:>9.1f} ms  {new_modules:>5} modules")
+        logging.info('\n'.join(lines))
+
+
+import_timer = ImportTimer()
+# Crawlers started by this run, kept so their stats can be reported once they finish
+crawlers = []
+# Set up under __main__: CPU pool workers are spawned processes that import this module as
+# __mp_main__, and must not install a reactor or load the Scrapy settings
+settings = None
+runner = None
+
+
+def install_reactor():
+    """Installs the asyncio Twisted reactor; must run before anything imports twisted.internet.reactor."""
+    from twisted.internet import asyncioreactor
+
+    # Set the event loop policy to use SelectorEventLoop, which is compatible with Twisted
+    if os.name == 'nt':  # Only necessary on Windows
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    asyncioreactor.install(asyncio.get_event_loop())
+
+
+def project_settings():
+    """Returns the Scrapy project settings, adjusted for this runner."""
+    from scrapy.utils.project import get_project_settings
+
+    project = get_project_settings()
+    # Spider classes are passed to the runner directly; an empty SPIDER_MODULES keeps Scrapy's
+    # spider loader from importing every spider module up front
+    project.set('SPIDER_MODULES', [])
+    if PIPELINE_MODE == 'stream':
+        project.set('ITEM_PIPELINES', {'Crawler.pipelines.StreamingPipeline': 300})
+    return project
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crawls the news sites and drafts articles from the results.")
+    parser.add_argument(
+        '--spiders', nargs='+', default=DEFAULT_SPIDERS, choices=sorted(SPIDERS), metavar='SPIDER',
+        help=f"Spiders to run (default: {' '.join(DEFAULT_SPIDERS)}; available: {', '.join(sorted(SPIDERS))})",
+    )
+    parser.add_argument(
+        '--import-report', action='store_true',
+        help="Log how long each lazily imported module and model took to load",
+    )
+    parser.add_argument(
+        '--metrics-json', default=os.environ.get('METRICS_JSON_PATH'), metavar='PATH',
+        help="Write a JSON run report with the stage timings and counters to PATH (default: $METRICS_JSON_PATH)",
+    )
+    parser.add_argument(
+        '--metrics-prometheus', default=os.environ.get('METRICS_PROMETHEUS_PATH'), metavar='PATH',
+        help="Write the metrics in Prometheus text format to PATH (default: $METRICS_PROMETHEUS_PATH)",
+    )
+    return parser.parse_args(argv)
+
+
+def run_spiders(spider_names, import_report=False):
+    """Imports the selected spiders and runs them concurrently."""
+    from twisted.internet import defer
+
+    spider_classes = [import_timer.load_attribute(SPIDERS[name]) for name in spider_names]
+    # Scrapy imports the item pipelines module when the crawlers start; time it here instead.
+    # Only AccumulatePipeline or StreamingPipeline is built per crawler; no model is loaded yet
+    import_timer.load('Crawler.pipelines')
+    if import_report:
+        import_timer.report("Startup imports")
+    crawlers.extend(runner.create_crawler(spider_class) for spider_class in spider_classes)
+    crawls = [runner.crawl(crawler) for crawler in crawlers]
     # Wait for all spiders to finish using gatherResults
     d = defer.gatherResults(crawls)
-    d.addBoth(lambda _: process_all_items_and_stop())
+    if PIPELINE_MODE == 'stream':
+        # Items were already processed by StreamingPipeline while crawling
+        d.addBoth(lambda _: stop_reactor())
+    else:
+        d.addBoth(lambda _: process_all_items_and_stop())
+    if import_report:
+        d.addBoth(lambda _: report_imports())
 
-def process_all_items_and_stop():
-    all_items = AccumulatePipeline.get_accumulated_items()
-    output_file_path = 'accumulated_items.txt'  # Adjust the path as per your requirement
+def stop_reactor():
+    """Attempts to safely stop the Twisted reactor."""
+    from twisted.internet import reactor
+    from twisted.internet.error import ReactorNotRunning
 
     try:
-        # Attempt to process items through pipelines
-        processed_items = process_items_through_pipelines(all_items)  # Assuming this returns processed items
-        # Write processed items to the output file
-        with open(output_file_path, 'w', encoding='utf-8') as file:
-            for item in processed_items:  # Assuming processed_items is the correct list to iterate over
-                # Ensure each item is correctly formatted as a string
-                item_str = str(item)
-                file.write(f"{item_str}\n")
-    except DropItem as e:
-        logging.error(f"Item dropped due to error: {e}")
-    except Exception as e:
-        logging.error(f"Unexpected error processing items: {e}")
-    finally:
-        # Attempt to safely stop the Twisted reactor
+        reactor.stop()
+    except ReactorNotRunning:
+        logging.warning("Tried to stop an already stopped reactor.")
+
+def report_imports():
+    """Logs the import times, and the load times of the models the pipelines used."""
+    import_timer.report("Imports")
+    from services.model_registry import registry
+    for key, metrics in registry.metrics().items():
+        logging.info(f"  model {key:<50} {metrics['load_seconds'] * 1000:>9.1f} ms")
+
+def report_metrics(json_path=None, prometheus_path=None):
+    """
+    Logs a summary of the run's timings and writes the JSON and/or Prometheus exports.
+
+    The pages and items each spider crawled are taken from the Scrapy stats and recorded as
+    counters, next to the timings and counters the services and pipelines recorded.
+    """
+    from services.metrics import metrics
+    from services.model_registry import registry
+    from services.run_artifacts import run_artifacts
+
+    pages = metrics.counter('crawler_pages_total', 'Responses received by each spider', ['spider'])
+    items = metrics.counter('crawler_items_total', 'Items scraped by each spider', ['spider'])
+    for crawler in crawlers:
+        stats = crawler.stats.get_stats()
+        pages.inc(stats.get('response_received_count', 0), spider=crawler.spidercls.name)
+        items.inc(stats.get('item_scraped_count', 0), spider=crawler.spidercls.name)
+
+    logging.info(f"Run finished in {time.perf_counter() - STARTED:.1f}s\n{metrics.summary()}")
+    metrics.write(json_path, prometheus_path, extra={
+        'spiders': [crawler.spidercls.name for crawler in crawlers],
+        'pipeline_mode': PIPELINE_MODE,
+        'elapsed_seconds': round(time.perf_counter() - STARTED, 3),
+        'models': registry.metrics(),
+        'run_artifacts': run_artifacts().directory,
+    })
+
+def process_all_items_and_stop():
+    """
+    Runs dedup, grouping and drafting on the accumulated items, then stops the reactor.
+
+    The stages run in the reactor's thread pool: they wait on the CPU pool, the Supabase
+    writer's retry backoff and the LLM, none of which may block the reactor thread.
+    """
+    from twisted.internet import threads
+    from scrapy.exceptions import DropItem
+    from Crawler import pipelines
+    all_items = pipelines.AccumulatePipeline.get_accumulated_items()
+
+    def process():
         try:
-            reactor.stop()
-        except ReactorNotRunning:
-            logging.warning("Tried to stop an already stopped reactor.")
+            # Attempt to process items through pipelines; with RUN_ARTIFACTS_DIR set, each stage
+            # writes what it produced to the run's artifacts as it goes
+            process_items_through_pipelines(all_items)
+        except DropItem as e:
+            logging.error(f"Item dropped due to error: {e}")
+        except Exception as e:
+            logging.error(f"Unexpected error processing items: {e}")
+
+    def finish(result):
+        # Drop this run's items (and their spill file) so they are not processed again
+        pipelines.AccumulatePipeline.reset()
+        stop_reactor()
+        return result
+
+    return threads.deferToThread(process).addBoth(finish)
 
 
 def process_items_through_pipelines(all_items):
     """Processes all items collected by spiders after crawling is complete."""
+    # The pipelines module is already loaded by run_spiders
+    from Crawler.pipelines import CrawlerPipeline, ComparePipeline, DraftPipeline, STAGE_SECONDS
 
      # Initialize and process through CrawlerPipeline
     crawler_pipeline = CrawlerPipeline()
-    processed_items = crawler_pipeline.process_item(all_items)
-    # Write processed items to a file for inspection
-    with open('processed_items.txt', 'w', encoding='utf-8') as f:
-        for item in processed_items:
-            f.write(f"{item}\n")
+    processed_items = []
+    with STAGE_SECONDS.time(stage='dedup'):
+        # The stored items are read back a batch at a time, so only one batch of scraped
+        # articles is loaded at once; each batch is also deduplicated against the earlier ones
+        for batch in all_items.batches(settings.getint('DEDUP_BATCH_SIZE', 500)):
+            processed_items.extend(crawler_pipeline.process_item(batch))
     
     # Initialize ComparePipeline and process items if there are any
 
     if processed_items:
         compare_pipeline = ComparePipeline()
-        grouped_articles = compare_pipeline.process_grouped_articles(processed_items)
-        # Write grouped articles to a file for inspection
-        with open('grouped.txt', 'w', encoding='utf-8') as f:
-            for group_id, articles in grouped_articles.items():
-                f.write(f"Group ID {group_id}:\n{articles}\n\n")
+        with STAGE_SECONDS.time(stage='grouping'):
+            grouped_articles = compare_pipeline.process_grouped_articles(processed_items)
     else:
         logging.info("No processed items to compare.")
         return []
@@ -102,7 +237,8 @@ def process_items_through_pipelines(all_items):
     # Initialize DraftPipeline and process grouped articles if there are any
     if grouped_articles:
         draft_pipeline = DraftPipeline()
-        draft_articles = draft_pipeline.close(grouped_articles)  # This method needs to match your implementation
+        with STAGE_SECONDS.time(stage='drafting'):
+            draft_articles = draft_pipeline.close(grouped_articles)  # This method needs to match your implementation
     else:
         logging.info("No grouped articles to draft.")
         return []
@@ -111,5 +247,17 @@ def process_items_through_pipelines(all_items):
     return draft_articles
 
 if __name__ == '__main__':
-    reactor.callWhenRunning(run_spiders)
+    args = parse_args()
+    install_reactor()
+    from twisted.internet import reactor
+    from scrapy.crawler import CrawlerRunner
+    from scrapy.utils.log import configure_logging
+
+    settings = project_settings()
+    configure_logging(settings)
+    runner = CrawlerRunner(settings)
+    reactor.callWhenRunning(run_spiders, args.spiders, args.import_report)
     reactor.run()   # the script will block here until the last crawl call is finished
+    report_metrics(args.metrics_json, args.metrics_prometheus)
+    from services.run_artifacts import run_artifacts
+    run_artifacts().close()
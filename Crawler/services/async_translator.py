@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from services.metrics import metrics
+from services.openai_config import openai_base_url
+from services.translation_cache import default_translation_cache
+
+TRANSLATION_SECONDS = metrics.histogram('crawler_translation_request_seconds', 'Translation API requests', ['client'])
+TRANSLATED_FIELDS = metrics.counter(
+    'crawler_translated_fields_total', 'Fields translated, by where the translation came from', ['source'])
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket: `acquire` waits until a token is available.
+
+    Tokens refill continuously at `rate` per second, up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Maximum number of stored tokens. Defaults to `rate`, at least 1.
+            clock (Callable[[], float]): Monotonic time source in seconds.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        # Waiters are served one at a time so the bucket is shared fairly
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class AsyncTranslator:
+    """
+    Translates several fields of an article with a single non-blocking chat completion.
+
+    Requests run on the asyncio event loop Scrapy uses (the project installs the asyncio
+    reactor), so awaiting a translation does not stall other downloads. At most
+    `max_concurrency` requests are in flight and requests are rate limited with a token
+    bucket. Fields found in the translation cache are not sent to the API.
+
+    The client honours OPENAI_BASE_URL (see services.openai_config), so it can be pointed at a
+    local fake endpoint.
+    """
+
+    def __init__(self, api_key, model="gpt-4-0125-preview", max_concurrency=4, requests_per_minute=60,
+                 cache=None, base_url=None, timeout=120):
+        """
+        Args:
+            api_key (str): OpenAI API key.
+            model (str): Chat model used for translation.
+            max_concurrency (int): Maximum number of requests in flight.
+            requests_per_minute (float): Sustained request rate allowed by the token bucket.
+            cache (TranslationCache, optional): Defaults to the process-wide translation cache.
+            base_url (str, optional): API base URL; defaults to OPENAI_BASE_URL or the OpenAI API.
+            timeout (float): Per-request timeout in seconds.
+        """
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=api_key, base_url=openai_base_url(base_url), timeout=timeout)
+        self.model = model
+        self.cache = cache if cache is not None else default_translation_cache()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_minute / 60.0)
+
+    async def translate_text(self, text_to_translate, target_language='English'):
+        """
+        Translates a single string.
+
+        Returns:
+            str or None: The translation, or None if the text is empty or translation failed.
+        """
+        translated = await self.translate_fields({'text': text_to_translate}, target_language)
+        return translated['text']
+
+    async def translate_fields(self, fields, target_language='English'):
+        """
+        Translates every non-empty value of `fields` in one request.
+
+        Args:
+            fields (dict): Maps field names (e.g. 'header', 'content') to source texts or None.
+            target_language (str): Language to translate into.
+
+        Returns:
+            dict: The same keys, mapped to translations; None for empty fields and failures.
+        """
+        results = {name: None for name in fields}
+        pending = {}
+        for name, text in fields.items():
+            if not text or not text.strip():
+                continue
+            text = text.strip()
+            cached = self.cache.get(text, target_language, self.model) if self.cache is not None else None
+            if cached is not None:
+                results[name] = cached
+                TRANSLATED_FIELDS.inc(source='cache')
+            else:
+                pending[name] = text
+
+        if not pending:
+            return results
+
+        translated = await self._request(pending, target_language)
+        for name, text in pending.items():
+            value = translated.get(name)
+            if isinstance(value, str):
+                results[name] = value
+                TRANSLATED_FIELDS.inc(source='api')
+                if self.cache is not None:
+                    self.cache.set(text, target_language, self.model, value)
+            else:
+                TRANSLATED_FIELDS.inc(source='failed')
+        return results
+
+    async def _request(self, fields, target_language):
+        prompt = (
+            f"Translate every value of the following JSON object to {target_language}. "
+            "Reply with a JSON object that has exactly the same keys and the translated values.\n\n"
+            f"{json.dumps(fields, ensure_ascii=False)}"
+        )
+        async with self._semaphore:
+            await self._bucket.acquire()
+            try:
+                with TRANSLATION_SECONDS.time(client='async'):
+                    chat_completion = await self.client.chat.completions.create(
+                        messages=[{"role": "user", "content": prompt}],
+                        model=self.model,
+                        response_format={"type": "json_object"},
+                    )
+                translated = json.loads(chat_completion.choices[0].message.content)
+                if not isinstance(translated, dict):
+                    raise ValueError("Translation response is not a JSON object")
+                return translated
+            except Exception as e:
+                logging.error(f'Error translating fields {sorted(fields)}: {e}')
+                return {}
+
+
+_shared_translator = None
+
+
+def get_async_translator(api_key):
+    """
+    Returns the process-wide AsyncTranslator, so all spiders share one concurrency limit
+    and rate limit.
+
+    TRANSLATION_CONCURRENCY and TRANSLATION_RPM configure the limits.
+    """
+    global _shared_translator
+    if _shared_translator is None:
+        _shared_translator = AsyncTranslator(
+            api_key=api_key,
+            max_concurrency=int(os.environ.get('TRANSLATION_CONCURRENCY', 4)),
+            requests_per_minute=float(os.environ.get('TRANSLATION_RPM', 60)),
+        )
+    return _shared_translator
@@ -0,0 +1,167 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from services.metrics import metrics
+
+RENDER_SECONDS = metrics.histogram('crawler_browser_render_seconds', 'Pages rendered in a browser', ['backend'])
+BROWSER_LAUNCHES = metrics.counter('crawler_browser_launches_total', 'Browsers started by the browser pool')
+
+
+def default_chrome_driver():
+    """
+    Starts a headless Chrome webdriver.
+
+    On Windows chromedriver.exe is expected in the repository root; elsewhere CHROMEDRIVER_PATH
+    is used when set, otherwise Selenium locates chromedriver itself.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Enables headless mode for Chrome
+    # Return from get() at DOMContentLoaded; BrowserPool waits for the selectors it needs itself
+    chrome_options.page_load_strategy = 'eager'
+
+    if os.name == 'nt':
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        return webdriver.Chrome(service=Service(os.path.join(project_root, 'chromedriver.exe')), options=chrome_options)
+    chromedriver_path = os.environ.get('CHROMEDRIVER_PATH')
+    if chromedriver_path:
+        return webdriver.Chrome(service=Service(chromedriver_path), options=chrome_options)
+    return webdriver.Chrome(options=chrome_options)
+
+
+class BrowserPool:
+    """
+    A fixed set of worker threads, each driving its own headless browser.
+
+    Pages to render are queued with `submit` and picked up by the first idle worker, so
+    several pages render in parallel. Before each page a worker checks that its browser
+    still responds, and it replaces the browser after `max_pages_per_browser` pages or
+    after any rendering error.
+    """
+
+    def __init__(self, size=2, max_pages_per_browser=50, timeout=20, driver_factory=default_chrome_driver):
+        """
+        Args:
+            size (int): Number of browsers rendering in parallel.
+            max_pages_per_browser (int): Pages rendered before a browser is recycled.
+            timeout (float): Default seconds to wait for a page and its selectors.
+            driver_factory (Callable[[], WebDriver]): Starts a new browser.
+        """
+        self.size = size
+        self.max_pages_per_browser = max_pages_per_browser
+        self.timeout = timeout
+        self.driver_factory = driver_factory
+        self._queue = queue.Queue()
+        self._workers = []
+        self._closed = False
+
+    def start(self):
+        """Starts the worker threads; browsers are launched when the first page arrives."""
+        if self._workers:
+            return
+        for number in range(self.size):
+            worker = threading.Thread(target=self._work, name=f'browser-pool-{number}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, url, wait_for=None, timeout=None):
+        """
+        Queues a page to be rendered.
+
+        Args:
+            url (str): The page to load.
+            wait_for (str or List[str], optional): CSS selectors that must be present before
+                the DOM is captured. Without them the pool waits for the page's load event.
+            timeout (float, optional): Overrides the pool's default timeout for this page.
+
+        Returns:
+            concurrent.futures.Future: Resolves to a (final_url, page_source) tuple.
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        self.start()
+        future = Future()
+        self._queue.put((future, url, wait_for, timeout or self.timeout))
+        return future
+
+    def close(self):
+        """Stops the workers once the queued pages are rendered and quits their browsers."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def _work(self):
+        driver = None
+        pages = 0
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            future, url, wait_for, timeout = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if driver is not None and (pages >= self.max_pages_per_browser or not self._is_healthy(driver)):
+                    self._quit(driver)
+                    driver = None
+                if driver is None:
+                    driver = self.driver_factory()
+                    BROWSER_LAUNCHES.inc()
+                    pages = 0
+                with RENDER_SECONDS.time(backend='selenium'):
+                    result = self._render(driver, url, wait_for, timeout)
+                pages += 1
+                future.set_result(result)
+            except Exception as e:
+                # The browser may be in a bad state; start a fresh one for the next page
+                self._quit(driver)
+                driver = None
+                future.set_exception(e)
+        self._quit(driver)
+
+    @staticmethod
+    def _render(driver, url, wait_for, timeout):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver.get(url)
+        selectors = [wait_for] if isinstance(wait_for, str) else (wait_for or [])
+        if not selectors:
+            # Nothing specific to wait for, so wait for the whole page to finish loading
+            WebDriverWait(driver, timeout).until(
+                lambda d: d.execute_script('return document.readyState') == 'complete'
+            )
+        # Capture the DOM as soon as the content the callback parses is there
+        for selector in selectors:
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+        return driver.current_url, driver.page_source
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            return driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Error quitting browser: {e}")
@@ -0,0 +1,209 @@
+import atexit
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from services.metrics import metrics
+from services.model_registry import registry
+
+# Timed where the task runs, so it excludes the time spent waiting for a free worker
+CPU_TASK_SECONDS = metrics.histogram('crawler_cpu_task_seconds', 'Tasks run by the CPU pool', ['task'])
+
+
+def _init_worker(threads_per_worker):
+    """Runs once in every worker process, before any task."""
+    # Ctrl-C is handled by the crawler process, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Split the cores between the workers instead of letting every worker's torch/BLAS use all of them
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ.setdefault(variable, str(threads_per_worker))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [cpu_pool %(process)d] %(levelname)s: %(message)s')
+
+
+def _run_task(fn, args, kwargs):
+    """
+    Runs a task in a worker process and returns its result together with what the worker
+    measured, since metrics recorded in a worker never reach the crawler's registry.
+
+    Returns:
+        tuple: The result, the task's run time in seconds, the worker's pid and the load
+        metrics of the models the worker has loaded.
+    """
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started, os.getpid(), registry.metrics()
+
+
+def encode(texts, model_name, **kwargs):
+    """
+    Encodes `texts` with the SentenceTransformer `model_name`.
+
+    Runs in a worker process (or inline when the pool is disabled). Each worker loads the
+    model from its own model registry on its first task and keeps it for later tasks.
+    """
+    from services.model_registry import get_sentence_transformer
+
+    return get_sentence_transformer(model_name).encode(texts, **kwargs)
+
+
+def lemmatize(texts, model_name, batch_size=64, n_process=1):
+    """
+    Lemmatises `texts` with the spaCy pipeline `model_name`, dropping stopwords,
+    punctuation and numbers.
+
+    Like `encode`, runs in a worker process, which loads the spaCy model on first use.
+
+    Returns:
+        List[str]: The lemmas of each text joined by spaces, in the same order.
+    """
+    from services.model_registry import get_spacy_model
+
+    nlp = get_spacy_model(model_name)
+    # Only lemmas and the stopword, punctuation and number flags are used
+    disabled = [name for name in ('parser', 'ner') if name in nlp.pipe_names]
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disabled)
+    return [
+        ' '.join([token.lemma_ for token in doc if not token.is_stop and not token.is_punct and not token.like_num])
+        for doc in docs
+    ]
+
+
+class CPUPool:
+    """
+    Runs CPU-heavy functions, such as embedding and lemmatisation, in worker processes.
+
+    In-process, these calls hold the GIL and stall the Twisted reactor, so no downloads
+    progress while a batch is encoded. With `workers` > 0 they run in a pool of processes
+    started with the 'spawn' method, which keeps the models and the torch threads out of
+    the crawler process; `workers` = 0 runs every call inline, as before.
+
+    Functions and their arguments are pickled, so tasks must be module-level functions
+    such as `encode` and `lemmatize`.
+    """
+
+    def __init__(self, workers=0, min_chunk_size=32):
+        """
+        Args:
+            workers (int): Number of worker processes; 0 disables the pool.
+            min_chunk_size (int): Smallest number of texts `map` sends to one worker.
+        """
+        self.workers = workers
+        self.min_chunk_size = min_chunk_size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(threads_per_worker,),
+                )
+                logging.info(f"Started CPU pool with {self.workers} workers, {threads_per_worker} threads each")
+            return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedules `fn(*args, **kwargs)` in a worker.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the result. With the pool disabled the call
+            runs immediately and the returned future is already done.
+        """
+        future = Future()
+        if not self.enabled:
+            started = time.perf_counter()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            CPU_TASK_SECONDS.observe(time.perf_counter() - started, task=fn.__name__)
+            return future
+
+        def task_done(worker_future):
+            try:
+                result, seconds, pid, model_metrics = worker_future.result()
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            CPU_TASK_SECONDS.observe(seconds, task=fn.__name__)
+            registry.add_metrics(model_metrics, f"worker {pid}")
+            future.set_result(result)
+
+        self._get_executor().submit(_run_task, fn, args, kwargs).add_done_callback(task_done)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Runs `fn(*args, **kwargs)` in a worker and waits for its result."""
+        return self._result(self.submit(fn, *args, **kwargs))
+
+    def map(self, fn, texts, *args, **kwargs):
+        """
+        Splits `texts` into one chunk per worker and runs `fn(chunk, *args, **kwargs)` on
+        all chunks in parallel.
+
+        Returns:
+            list: The result of each chunk, in order. With the pool disabled, `fn` is called
+            once with all of `texts`.
+        """
+        if not self.enabled or len(texts) <= self.min_chunk_size:
+            return [self.run(fn, texts, *args, **kwargs)]
+        chunk_size = max(self.min_chunk_size, math.ceil(len(texts) / self.workers))
+        futures = [
+            self.submit(fn, texts[start:start + chunk_size], *args, **kwargs)
+            for start in range(0, len(texts), chunk_size)
+        ]
+        return [self._result(future) for future in futures]
+
+    def _result(self, future):
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next call
+            logging.error("A CPU pool worker died; the pool will be restarted")
+            self.shutdown(wait=False)
+            raise
+
+    def shutdown(self, wait=True):
+        """Stops the worker processes; the pool starts again on the next call."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_cpu_pool = None
+_cpu_pool_lock = threading.Lock()
+
+
+def cpu_pool():
+    """
+    Returns the process-wide CPU pool configured from the environment.
+
+    CPU_WORKERS sets the number of worker processes ('auto' for one per core, 0 to run
+    in-process); CPU_POOL_MIN_CHUNK_SIZE the smallest chunk of texts sent to one worker.
+
+    Returns:
+        CPUPool: The shared pool.
+    """
+    global _cpu_pool
+    with _cpu_pool_lock:
+        if _cpu_pool is None:
+            workers = os.environ.get('CPU_WORKERS', '0')
+            workers = (os.cpu_count() or 1) if workers == 'auto' else int(workers)
+            _cpu_pool = CPUPool(workers, min_chunk_size=int(os.environ.get('CPU_POOL_MIN_CHUNK_SIZE', 32)))
+            atexit.register(_cpu_pool.shutdown)
+        return _cpu_pool
@@ -0,0 +1,170 @@
+import functools
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+
+# Month names and abbreviations (English, Russian, Uzbek Latin and Cyrillic) mapped to the
+# English names strptime's %B understands
+MONTHS = {
+    'January': ['january', 'jan', 'январь', 'января', 'янв', 'yanvar', 'январ'],
+    'February': ['february', 'feb', 'февраль', 'февраля', 'фев', 'fevral', 'феврал'],
+    'March': ['march', 'mar', 'март', 'марта', 'мар', 'mart'],
+    'April': ['april', 'apr', 'апрель', 'апреля', 'апр', 'aprel', 'апрел'],
+    'May': ['may', 'май', 'мая'],
+    'June': ['june', 'jun', 'июнь', 'июня', 'июн', 'iyun'],
+    'July': ['july', 'jul', 'июль', 'июля', 'июл', 'iyul'],
+    'August': ['august', 'aug', 'август', 'августа', 'авг', 'avgust'],
+    'September': ['september', 'sep', 'sept', 'сентябрь', 'сентября', 'сен', 'сент', 'sentyabr', 'сентябр'],
+    'October': ['october', 'oct', 'октябрь', 'октября', 'окт', 'oktyabr', 'октябр'],
+    'November': ['november', 'nov', 'ноябрь', 'ноября', 'ноя', 'noyabr', 'ноябр'],
+    'December': ['december', 'dec', 'декабрь', 'декабря', 'дек', 'dekabr', 'декабр'],
+}
+MONTH_NAMES = {name: english for english, names in MONTHS.items() for name in names}
+
+# Words for relative days, as days before today
+RELATIVE_DAYS = {
+    'today': 0, 'сегодня': 0, 'бугун': 0, 'bugun': 0,
+    'yesterday': 1, 'вчера': 1, 'кеча': 1, 'kecha': 1,
+}
+
+# Formats tried, after month names are normalised, when a site declares none of its own
+DEFAULT_FORMATS = (
+    '%d %B %Y, %H:%M',
+    '%d %B %Y %H:%M',
+    '%H:%M, %d %B %Y',
+    '%H:%M %d %B %Y',
+    '%d %B %Y',
+    '%d %B, %H:%M',
+    '%d %B',
+    '%B %d, %Y',
+    '%d.%m.%Y, %H:%M',
+    '%d.%m.%Y %H:%M',
+    '%d.%m.%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+)
+
+_MONTH_RE = re.compile(
+    r'\b(' + '|'.join(sorted(map(re.escape, MONTH_NAMES), key=len, reverse=True)) + r')\.?(?=\W|$)',
+    re.IGNORECASE,
+)
+_RELATIVE_RE = re.compile(
+    r'^(' + '|'.join(map(re.escape, RELATIVE_DAYS)) + r')\b[\s,в-]*(?:(\d{1,2}):(\d{2}))?',
+    re.IGNORECASE,
+)
+# Year suffixes ("2024 г.", "2024 года", "2024 yil") and the " в " before a time
+_NOISE_RE = re.compile(r'(?<=\d)\s*(?:г\.|года|год|йил|yil)(?=\W|$)|\sв\s', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def crawl_date():
+    """
+    Returns the day whose articles the spiders collect.
+
+    That is today, unless CRAWL_DATE (YYYY-MM-DD) is set, e.g. to replay pages recorded on
+    an earlier day.
+    """
+    value = os.environ.get('CRAWL_DATE')
+    return date.fromisoformat(value) if value else date.today()
+
+
+class DateParser:
+    """
+    Parses the publication dates news sites print, without dateparser's start-up and language
+    detection cost for the formats the sites actually use.
+
+    A date string is normalised once (relative words such as "Сегодня" or "Bugun", Russian
+    and Uzbek month names mapped to English, year suffixes dropped) and then tried against
+    the site's formats followed by DEFAULT_FORMATS. Only strings none of them match are
+    passed to dateparser, with its languages pinned to `languages`. Results are memoised per
+    raw string and day, so repeated strings (the same "Today, 10:00" on a listing and on the
+    article) are parsed once.
+    """
+
+    def __init__(self, formats=(), languages=None, memo_size=4096):
+        """
+        Args:
+            formats (Sequence[str]): strptime formats of the site, tried before DEFAULT_FORMATS.
+                Month names are English after normalisation, so %B matches any supported language.
+            languages (List[str], optional): Languages dateparser may use as a fallback.
+            memo_size (int): Number of parsed strings remembered.
+        """
+        self.formats = tuple(formats) + tuple(f for f in DEFAULT_FORMATS if f not in formats)
+        self.languages = languages
+        self.fallbacks = 0
+        self._parse_memo = functools.lru_cache(maxsize=memo_size)(self._parse)
+
+    def parse(self, text, today=None):
+        """
+        Args:
+            text (str): The date as printed on the page.
+            today (datetime.date, optional): Reference day for relative dates; defaults to `crawl_date()`.
+
+        Returns:
+            datetime or None: The parsed date, or None if the string is not a recognisable date.
+        """
+        if not text or not text.strip():
+            return None
+        return self._parse_memo(text.strip(), today or crawl_date())
+
+    def memo_info(self):
+        """Returns the memo's hit and miss counters and the number of dateparser fallbacks."""
+        info = self._parse_memo.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'fallbacks': self.fallbacks}
+
+    @staticmethod
+    def normalise(text):
+        """Maps month names to English, drops year suffixes and collapses whitespace."""
+        text = _NOISE_RE.sub(' ', text)
+        text = _MONTH_RE.sub(lambda m: MONTH_NAMES[m.group(1).lower()], text)
+        return _SPACE_RE.sub(' ', text).strip()
+
+    def _parse(self, text, today):
+        relative = _RELATIVE_RE.match(text)
+        if relative:
+            day = today - timedelta(days=RELATIVE_DAYS[relative.group(1).lower()])
+            hour, minute = (int(relative.group(2)), int(relative.group(3))) if relative.group(2) else (0, 0)
+            return datetime(day.year, day.month, day.day, hour, minute)
+
+        normalised = self.normalise(text)
+        for date_format in self.formats:
+            if '%Y' not in date_format:
+                parsed = self._parse_without_year(normalised, date_format, today)
+                if parsed is not None:
+                    return parsed
+                continue
+            try:
+                return datetime.strptime(normalised, date_format)
+            except ValueError:
+                continue
+        return self._fallback(text)
+
+    @staticmethod
+    def _parse_without_year(text, date_format, today):
+        """
+        Parses a date printed without its year, which sites omit for recent dates.
+
+        The year is appended before parsing rather than set afterwards, since strptime's
+        default year 1900 has no 29 February. A day later than today is from last year.
+        """
+        for year in (today.year, today.year - 1):
+            try:
+                parsed = datetime.strptime(f"{text} {year}", f"{date_format} %Y")
+            except ValueError:
+                # Not this format, or 29 February outside a leap year
+                continue
+            if parsed.date() <= today:
+                return parsed
+        return None
+
+    def _fallback(self, text):
+        import dateparser
+
+        self.fallbacks += 1
+        try:
+            return dateparser.parse(text, languages=self.languages)
+        except Exception as e:
+            logging.error(f"Error parsing date: {text}, Error: {e}")
+            return None
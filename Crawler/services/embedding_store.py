@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """
+    A persistent, append-only store of text embeddings for a single model and backend.
+
+    Embeddings are kept in a raw float32 matrix on disk that is memory-mapped on load,
+    next to a sidecar file holding one text hash per row. Only texts whose hash is not
+    yet in the store are encoded, so restarting the crawler does not re-encode the
+    whole news archive.
+
+    Files written to `directory` (where <key> is the sanitised model name and backend):
+        <key>.f32         Row-major float32 matrix, one embedding per row.
+        <key>.hashes      One sha1 hex digest per line, aligned with the matrix rows.
+        <key>.meta.json   The model name, backend and embedding dimension.
+    """
+
+    def __init__(self, directory, model_name, backend='torch'):
+        """
+        Opens (or creates) the store for `model_name` and `backend` inside `directory`.
+
+        Args:
+            directory (str): Directory holding the store files.
+            model_name (str): Name of the model the embeddings were produced with.
+            backend (str): Embedding backend of the model ('torch', 'onnx' or 'quantized');
+                the backends produce slightly different vectors, so each gets its own store.
+        """
+        self.directory = directory
+        self.model_name = model_name
+        self.backend = backend
+        os.makedirs(directory, exist_ok=True)
+
+        stem = re.sub(r'[^A-Za-z0-9_.-]', '_', f'{model_name}.{backend}')
+        self.matrix_path = os.path.join(directory, f'{stem}.f32')
+        self.hashes_path = os.path.join(directory, f'{stem}.hashes')
+        self.meta_path = os.path.join(directory, f'{stem}.meta.json')
+
+        self.dim = None
+        self.hashes = []
+        self.index = {}  # text hash -> row number
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
+        self._load()
+
+    @staticmethod
+    def text_hash(text):
+        """Returns the sha1 hex digest used to key `text` in the store."""
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, text):
+        return self.text_hash(text) in self.index
+
+    def _load(self):
+        """Reads the metadata and hash sidecar and memory-maps the embedding matrix."""
+        if not os.path.exists(self.meta_path):
+            # Nothing stored yet (or a partial store without metadata); start clean
+            self._reset_files()
+            return
+
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Unreadable embedding store metadata {self.meta_path}: {e}")
+            self._reset_files()
+            return
+
+        if meta.get('model') != self.model_name or meta.get('backend') != self.backend or not meta.get('dim'):
+            logging.warning(f"Embedding store {self.meta_path} belongs to another model or backend, rebuilding it")
+            self._reset_files()
+            return
+
+        self.dim = int(meta['dim'])
+        if os.path.exists(self.hashes_path):
+            with open(self.hashes_path, 'r', encoding='utf-8') as f:
+                self.hashes = [line.strip() for line in f if line.strip()]
+
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        rows = os.path.getsize(self.matrix_path) // row_bytes if os.path.exists(self.matrix_path) else 0
+
+        # An interrupted append can leave the two files out of step; keep only complete rows
+        count = min(rows, len(self.hashes))
+        if count != rows or count != len(self.hashes):
+            logging.warning(f"Embedding store {self.matrix_path} was truncated to {count} rows")
+            self.hashes = self.hashes[:count]
+            with open(self.matrix_path, 'ab') as f:
+                f.truncate(count * row_bytes)
+            with open(self.hashes_path, 'w', encoding='utf-8') as f:
+                f.writelines(f'{h}\n' for h in self.hashes)
+
+        self.index = {h: row for row, h in enumerate(self.hashes)}
+        self._map()
+
+    def _reset_files(self):
+        """Removes any existing store files for this model."""
+        for path in (self.matrix_path, self.hashes_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.dim = None
+        self.hashes = []
+        self.index = {}
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
+
+    def _map(self):
+        """(Re)maps the embedding matrix file as a read-only array."""
+        if not self.hashes:
+            self.embeddings = np.empty((0, self.dim or 0), dtype=np.float32)
+            return
+        self.embeddings = np.memmap(self.matrix_path, dtype=np.float32, mode='r', shape=(len(self.hashes), self.dim))
+
+    def add(self, texts, embeddings):
+        """
+        Appends embeddings for texts that are not stored yet.
+
+        Args:
+            texts (List[str]): The texts the embeddings were computed from.
+            embeddings (array-like): One embedding per text.
+
+        Returns:
+            int: The number of rows actually appended.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            with open(self.meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'model': self.model_name, 'backend': self.backend, 'dim': self.dim}, f)
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected embeddings of dimension {self.dim}, got {embeddings.shape[1]}")
+
+        new_rows = []
+        new_hashes = {}
+        for row, text in enumerate(texts):
+            text_hash = self.text_hash(text)
+            if text_hash in self.index or text_hash in new_hashes:
+                continue
+            new_rows.append(row)
+            new_hashes[text_hash] = row
+        if not new_rows:
+            return 0
+
+        # Write the matrix before the hashes so a crash never leaves a hash without its row
+        with open(self.matrix_path, 'ab') as f:
+            f.write(np.ascontiguousarray(embeddings[new_rows]).tobytes())
+        with open(self.hashes_path, 'a', encoding='utf-8') as f:
+            f.writelines(f'{h}\n' for h in new_hashes)
+
+        for text_hash in new_hashes:
+            self.index[text_hash] = len(self.hashes)
+            self.hashes.append(text_hash)
+        self._map()
+        return len(new_rows)
+
+    def sync(self, texts, encode):
+        """
+        Makes sure every text has a stored embedding and returns their embeddings.
+
+        Only texts missing from the store are passed to `encode`; the result is appended
+        to the store before returning.
+
+        Args:
+            texts (List[str]): The texts to look up.
+            encode (Callable[[List[str]], array-like]): Encodes a list of texts into embeddings.
+
+        Returns:
+            np.ndarray: One row per distinct text, in order of first appearance.
+        """
+        missing = {}
+        for text in texts:
+            text_hash = self.text_hash(text)
+            if text_hash not in self.index and text_hash not in missing:
+                missing[text_hash] = text
+
+        if missing:
+            logging.info(f"Encoding {len(missing)} headers not found in the embedding store")
+            missing_texts = list(missing.values())
+            self.add(missing_texts, encode(missing_texts))
+
+        rows = list(dict.fromkeys(self.index[self.text_hash(text)] for text in texts))
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.asarray(self.embeddings[rows])
@@ -0,0 +1,107 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class FrontierStore:
+    """
+    A persistent SQLite record of the pages already crawled, keyed by request fingerprint.
+
+    Each entry keeps the page's URL, when it was first and last fetched and a hash of the
+    body from the last fetch, so a later run can skip a page without fetching it, or drop a
+    refetched page whose content has not changed.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the SQLite database file (created if missing).
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            "fingerprint TEXT PRIMARY KEY, url TEXT NOT NULL, first_seen REAL NOT NULL, "
+            "last_seen REAL NOT NULL, content_hash TEXT)"
+        )
+        self.conn.commit()
+
+    def get(self, fingerprint):
+        """
+        Looks up a crawled page.
+
+        Returns:
+            dict or None: `url`, `first_seen`, `last_seen` and `content_hash`, or None if the
+            page has not been crawled.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url, first_seen, last_seen, content_hash FROM frontier WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('url', 'first_seen', 'last_seen', 'content_hash'), row))
+
+    def record(self, fingerprint, url, content_hash, seen_at=None):
+        """Records that a page was fetched with the given content hash."""
+        seen_at = seen_at if seen_at is not None else time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO frontier (fingerprint, url, first_seen, last_seen, content_hash) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(fingerprint) DO UPDATE SET "
+                "url = excluded.url, last_seen = excluded.last_seen, content_hash = excluded.content_hash",
+                (fingerprint, url, seen_at, seen_at, content_hash),
+            )
+            self.conn.commit()
+
+    def record_many(self, entries, seen_at=None):
+        """
+        Records several fetched pages in one transaction.
+
+        Args:
+            entries (Iterable[dict]): `fingerprint`, `url` and `content_hash` of each page.
+        """
+        seen_at = seen_at if seen_at is not None else time.time()
+        rows = [(entry['fingerprint'], entry['url'], seen_at, seen_at, entry['content_hash']) for entry in entries]
+        if not rows:
+            return
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO frontier (fingerprint, url, first_seen, last_seen, content_hash) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(fingerprint) DO UPDATE SET "
+                "url = excluded.url, last_seen = excluded.last_seen, content_hash = excluded.content_hash",
+                rows,
+            )
+            self.conn.commit()
+
+    def prune(self, older_than):
+        """
+        Forgets pages last fetched more than `older_than` seconds ago.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            cursor = self.conn.execute("DELETE FROM frontier WHERE last_seen < ?", (time.time() - older_than,))
+            self.conn.commit()
+        if cursor.rowcount:
+            logging.info(f"Pruned {cursor.rowcount} pages from the crawl frontier {self.path}")
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
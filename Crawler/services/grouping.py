@@ -0,0 +1,135 @@
+import numpy as np
+
+from services.similarity_index import normalize_rows
+
+
+def _thresholded_neighbours(embeddings, rows, threshold, top_k):
+    """
+    Finds, for each of `rows`, the other articles whose similarity is above `threshold`.
+
+    Only a len(rows) x N block of the similarity matrix is materialised.
+
+    Returns:
+        List[Tuple[np.ndarray, np.ndarray]]: For each row, the neighbour indices (ascending)
+            and their similarity scores.
+    """
+    block = embeddings[rows] @ embeddings.T
+    neighbours = []
+    for offset, row in enumerate(rows):
+        scores = block[offset]
+        candidates = np.nonzero(scores > threshold)[0]
+        candidates = candidates[candidates != row]
+        if top_k and len(candidates) > top_k:
+            strongest = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = np.sort(candidates[strongest])
+        neighbours.append((candidates, scores[candidates]))
+    return neighbours
+
+
+def leader_groups(embeddings, threshold, top_k=None, block_size=1024):
+    """
+    Greedy leader clustering: every article not yet grouped starts a group with all the
+    ungrouped articles above `threshold`.
+
+    Gives the same groups as scanning the full similarity matrix row by row, but computes
+    it one block of rows at a time and skips the rows of articles that are already grouped.
+
+    Args:
+        embeddings (np.ndarray): Unit-length article embeddings, one row per article.
+        threshold (float): Articles must be strictly more similar than this to be grouped.
+        top_k (int, optional): Keep at most this many of the most similar neighbours per leader.
+        block_size (int): Number of rows of the similarity matrix computed at once.
+
+    Returns:
+        dict: Maps each leader index to a list of (index, similarity) tuples of its group members.
+    """
+    count = len(embeddings)
+    grouped = np.zeros(count, dtype=bool)
+    groups = {}
+    for start in range(0, count, block_size):
+        rows = np.nonzero(~grouped[start:start + block_size])[0] + start
+        if not len(rows):
+            continue
+        for row, (candidates, scores) in zip(rows, _thresholded_neighbours(embeddings, rows, threshold, top_k)):
+            # Rows can become grouped by an earlier leader in the same block
+            if grouped[row]:
+                continue
+            free = ~grouped[candidates]
+            members = candidates[free]
+            groups[int(row)] = [(int(j), float(score)) for j, score in zip(members, scores[free])]
+            grouped[row] = True
+            grouped[members] = True
+    return groups
+
+
+def union_find_groups(embeddings, threshold, top_k=None, block_size=1024):
+    """
+    Groups articles into the connected components of the thresholded similarity graph.
+
+    Unlike leader clustering, grouping is transitive: two articles end up together when a
+    chain of similar articles links them, even if they are not similar to each other.
+
+    Args:
+        embeddings (np.ndarray): Unit-length article embeddings, one row per article.
+        threshold (float): Articles must be strictly more similar than this to be linked.
+        top_k (int, optional): Link each article to at most this many of its most similar neighbours.
+        block_size (int): Number of rows of the similarity matrix computed at once.
+
+    Returns:
+        dict: Maps the smallest index of each component to a list of (index, similarity) tuples
+            of the other members, where similarity is measured against that first article.
+    """
+    count = len(embeddings)
+    parent = np.arange(count)
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for start in range(0, count, block_size):
+        rows = np.arange(start, min(start + block_size, count))
+        for row, (candidates, _) in zip(rows, _thresholded_neighbours(embeddings, rows, threshold, top_k)):
+            for j in candidates[candidates > row]:
+                root_a, root_b = find(row), find(j)
+                if root_a != root_b:
+                    # Keep the smaller index as root so each component is keyed by its first article
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    roots = np.array([find(node) for node in range(count)], dtype=int)
+    # A stable sort by root lists each component's members in index order, starting with the root
+    order = np.argsort(roots, kind='stable')
+    boundaries = np.nonzero(np.diff(roots[order]))[0] + 1
+    groups = {}
+    for component in np.split(order, boundaries):
+        leader, members = component[0], component[1:]
+        scores = embeddings[members] @ embeddings[leader]
+        groups[int(leader)] = [(int(j), float(score)) for j, score in zip(members, scores)]
+    return groups
+
+
+def group_similar_articles(embeddings, threshold, method='leader', top_k=None, block_size=1024):
+    """
+    Groups articles by embedding similarity without building the full similarity matrix.
+
+    Args:
+        embeddings (array-like): Article embeddings, one row per article.
+        threshold (float): The minimum similarity (exclusive) for two articles to be grouped.
+        method (str): 'leader' for greedy leader clustering or 'union_find' for connected components.
+        top_k (int, optional): Limit on the neighbours considered per article.
+        block_size (int): Number of rows of the similarity matrix computed at once.
+
+    Returns:
+        dict: Maps each group's first article index to a list of (index, similarity) tuples.
+    """
+    methods = {
+        'leader': leader_groups,
+        'union_find': union_find_groups,
+    }
+    if method not in methods:
+        raise ValueError(f"Unknown grouping method '{method}', expected one of {sorted(methods)}")
+    if not np.asarray(embeddings).size:
+        return {}
+    embeddings = normalize_rows(embeddings)
+    return methods[method](embeddings, threshold, top_k=top_k, block_size=block_size)
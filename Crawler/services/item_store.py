@@ -0,0 +1,183 @@
+import pickle
+import sys
+import tempfile
+import threading
+
+# The fields of Crawler.items.MarketItem, the item every spider yields
+ITEM_FIELDS = ('unique_id', 'date', 'label', 'header', 'sub_header', 'img', 'img_caption', 'content', 'frontier_entry')
+
+
+class ItemRecord:
+    """
+    A scraped article kept in fixed slots instead of a scrapy.Item's per-item dict.
+
+    Supports the mapping operations the pipelines use on items (`get`, `[]`, `in`, `keys`,
+    `dict(record)`). As with scrapy.Item, a field that was never set is missing: `get`
+    returns the default and `[]` raises KeyError.
+    """
+    __slots__ = ITEM_FIELDS
+
+    def __init__(self, **values):
+        for field, value in values.items():
+            self[field] = value
+
+    @classmethod
+    def from_item(cls, item):
+        """Copies the set fields of a scrapy.Item or dict into a record."""
+        return item if isinstance(item, cls) else cls(**dict(item))
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except (AttributeError, TypeError):
+            raise KeyError(field) from None
+
+    def __setitem__(self, field, value):
+        if field not in ITEM_FIELDS:
+            raise KeyError(f"ItemRecord does not support field: {field}")
+        setattr(self, field, value)
+
+    def get(self, field, default=None):
+        return getattr(self, field, default) if field in ITEM_FIELDS else default
+
+    def keys(self):
+        return [field for field in ITEM_FIELDS if hasattr(self, field)]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, field):
+        return field in ITEM_FIELDS and hasattr(self, field)
+
+    def __eq__(self, other):
+        return isinstance(other, ItemRecord) and dict(self) == dict(other)
+
+    def __repr__(self):
+        return f"ItemRecord({dict(self)!r})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, field, _UNSET) for field in ITEM_FIELDS)
+
+    def __setstate__(self, state):
+        for field, value in zip(ITEM_FIELDS, state):
+            if value is not _UNSET:
+                setattr(self, field, value)
+
+
+class _Unset:
+    """Marks a field that was never set in a pickled ItemRecord."""
+
+    def __reduce__(self):
+        return '_UNSET'
+
+
+_UNSET = _Unset()
+
+
+class ItemStore:
+    """
+    An append-only store of scraped items with a bounded memory footprint.
+
+    Items are kept as ItemRecords. Once the records held in memory exceed `memory_budget`
+    bytes (estimated from their field values), they are pickled to an anonymous temporary
+    file and dropped from memory, so a long crawl holds at most about one budget's worth of
+    articles. Iterating reads the spilled records back one at a time, followed by the ones
+    still in memory, in the order they were added.
+    """
+
+    def __init__(self, memory_budget=256 * 1024 * 1024, spill_dir=None):
+        """
+        Args:
+            memory_budget (int): Bytes of item data kept in memory before spilling to disk.
+            spill_dir (str, optional): Directory of the temporary spill file; defaults to the
+                system temporary directory.
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._records = []
+        self._memory_bytes = 0
+        self._spill_file = None
+        self._spill_end = 0
+        self._spilled = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def record_size(record):
+        """Estimates the memory a record's values take, in bytes."""
+        return sys.getsizeof(record) + sum(sys.getsizeof(getattr(record, field, None)) for field in ITEM_FIELDS)
+
+    def append(self, item):
+        """Adds a scrapy.Item or dict, spilling the in-memory records if the budget is exceeded."""
+        record = ItemRecord.from_item(item)
+        with self._lock:
+            self._records.append(record)
+            self._memory_bytes += self.record_size(record)
+            if self._memory_bytes > self.memory_budget:
+                self._spill()
+
+    def _spill(self):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix='items-', suffix='.pickle', dir=self.spill_dir)
+        self._spill_file.seek(self._spill_end)
+        for record in self._records:
+            pickle.dump(record, self._spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spill_end = self._spill_file.tell()
+        self._spilled += len(self._records)
+        self._records = []
+        self._memory_bytes = 0
+
+    def __len__(self):
+        return self._spilled + len(self._records)
+
+    def __iter__(self):
+        """Yields every record in insertion order, reading spilled records lazily from disk."""
+        position = 0
+        while True:
+            with self._lock:
+                if position >= self._spill_end:
+                    break
+                self._spill_file.seek(position)
+                record = pickle.load(self._spill_file)
+                position = self._spill_file.tell()
+            yield record
+        # Records added while the spill file was being read are still in memory
+        with self._lock:
+            records = list(self._records)
+        yield from records
+
+    def batches(self, size):
+        """
+        Yields the records in lists of at most `size`, so a consumer only needs one batch in
+        memory at a time.
+        """
+        batch = []
+        for record in self:
+            batch.append(record)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def stats(self):
+        """Returns the number of items, how many were spilled and the in-memory byte estimate."""
+        return {
+            'items': len(self),
+            'spilled': self._spilled,
+            'in_memory': len(self._records),
+            'memory_bytes': self._memory_bytes,
+        }
+
+    def clear(self):
+        """Drops every item and deletes the spill file."""
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+            self._spill_file = None
+            self._spill_end = 0
+            self._spilled = 0
+            self._records = []
+            self._memory_bytes = 0
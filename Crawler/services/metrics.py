@@ -0,0 +1,273 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds: from a cached similarity query up to a slow GPT draft
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {sorted(labelnames)}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count, kept per combination of label values."""
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(dict(zip(self.labelnames, key)), value) for key, value in sorted(self._values.items())]
+
+    def prometheus_lines(self):
+        return [
+            f"{self.name}{_format_labels(list(labels.items()))} {_format_value(value)}"
+            for labels, value in self.samples()
+        ]
+
+    def report(self):
+        return [{'labels': labels, 'value': value} for labels, value in self.samples()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Observed values, usually latencies in seconds, counted into cumulative buckets per
+    combination of label values. The sum, count and maximum are kept alongside the buckets.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts, sum, count, max]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0, 0.0]
+            position = bisect.bisect_left(self.buckets, value)
+            if position < len(self.buckets):
+                series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+            series[3] = max(series[3], value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes how long the `with` block took, in seconds.
+
+        A block that raises is observed as well, and counted in the registry's
+        `<name>_errors_total` counter with the same labels.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            metrics.counter(f"{self.name}_errors_total", f"Failed operations timed by {self.name}",
+                            self.labelnames).inc(**labels)
+            raise
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(self.labelnames, labels))
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            return [
+                (dict(zip(self.labelnames, key)), list(series[0]), series[1], series[2], series[3])
+                for key, series in sorted(self._series.items())
+            ]
+
+    def prometheus_lines(self):
+        lines = []
+        for labels, bucket_counts, total, count, _ in self.samples():
+            pairs = list(labels.items())
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {count}")
+        return lines
+
+    def report(self):
+        return [
+            {
+                'labels': labels,
+                'count': count,
+                'sum': round(total, 6),
+                'mean': round(total / count, 6) if count else None,
+                'max': round(maximum, 6),
+                'buckets': dict(zip(map(str, self.buckets), bucket_counts)),
+            }
+            for labels, bucket_counts, total, count, maximum in self.samples()
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """
+    The counters and histograms of one process.
+
+    Metrics are created on first use with `counter` and `histogram` and returned as-is on
+    later calls, so modules declare the metrics they record at import time. Everything
+    recorded can be exported in the Prometheus text exposition format or as a JSON report.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind} with labels {metric.labelnames}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        """
+        Returns the counter `name`, creating it on first use.
+
+        Args:
+            name (str): Metric name; by Prometheus convention counters end in `_total`.
+            help (str): One-line description shown in the export.
+            labelnames (Sequence[str]): Names of the labels every `inc` must pass.
+
+        Returns:
+            Counter: The counter.
+        """
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Returns the histogram `name`, creating it on first use.
+
+        Args:
+            name (str): Metric name; latency histograms end in `_seconds`.
+            help (str): One-line description shown in the export.
+            labelnames (Sequence[str]): Names of the labels every `observe` must pass.
+            buckets (Sequence[float]): Upper bounds of the buckets.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def to_prometheus(self):
+        """Returns every metric with recorded values in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            samples = metric.prometheus_lines()
+            if samples:
+                lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+                lines.extend(samples)
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def report(self):
+        """
+        Returns the recorded values as a JSON-serialisable dict.
+
+        Returns:
+            dict: Maps each metric name to its `type`, `help` and per-label `samples`.
+        """
+        return {
+            name: {'type': metric.kind, 'help': metric.help, 'samples': metric.report()}
+            for name, metric in sorted(self._metrics.items())
+            if metric.samples()
+        }
+
+    def summary(self):
+        """Returns one line per timed operation: count, total, mean and max seconds."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            if not isinstance(metric, Histogram):
+                continue
+            for labels, _, total, count, maximum in metric.samples():
+                label_text = ','.join(f'{key}={value}' for key, value in labels.items())
+                lines.append(
+                    f"  {name + (f'{{{label_text}}}' if label_text else ''):<70} {count:>7} x  "
+                    f"{total:>9.2f} s total  {total / count * 1000:>9.1f} ms mean  {maximum * 1000:>9.1f} ms max"
+                )
+        return '\n'.join(lines)
+
+    def write(self, json_path=None, prometheus_path=None, extra=None):
+        """
+        Writes the JSON report and/or the Prometheus text export.
+
+        Args:
+            json_path (str, optional): Where to write `report()`, together with `extra`.
+            prometheus_path (str, optional): Where to write `to_prometheus()`, e.g. a node
+                exporter textfile collector directory.
+            extra (dict, optional): Additional top-level fields of the JSON report.
+        """
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump({**(extra or {}), 'metrics': self.report()}, f, indent=2, default=str)
+            logging.info(f"Wrote metrics report to {json_path}")
+        if prometheus_path:
+            # Written under a temporary name first so a collector never reads a partial file
+            temporary_path = f"{prometheus_path}.tmp"
+            with open(temporary_path, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(temporary_path, prometheus_path)
+            logging.info(f"Wrote Prometheus metrics to {prometheus_path}")
+
+    def reset(self):
+        """Clears every recorded value; the metrics themselves stay registered."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+
+# Shared by the spiders, services and pipelines of the process
+metrics = MetricsRegistry()
@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+import time
+
+
+def _current_rss_bytes():
+    """Returns the resident set size of this process in bytes, or None if it cannot be read."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS; reported in bytes on macOS and in kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def _parameter_bytes(model):
+    """Returns the size of a torch module's parameters in bytes, or None for other models."""
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """
+    A process-wide cache of loaded models.
+
+    Each model is loaded the first time it is requested and shared by every caller
+    afterwards. Load time and memory use are recorded per model and exposed via `metrics`.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """
+        Returns the model stored under `key`, loading it with `loader` on first use.
+
+        Args:
+            key (str): Identifies the model and its loading options.
+            loader (Callable[[], object]): Loads the model; only called when `key` is not loaded yet.
+
+        Returns:
+            object: The loaded model.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have loaded the model while we waited for the lock
+            if key in self._models:
+                return self._models[key]
+
+            rss_before = _current_rss_bytes()
+            started = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - started
+            rss_after = _current_rss_bytes()
+
+            self._models[key] = model
+            self._metrics[key] = {
+                'load_seconds': round(load_seconds, 3),
+                'rss_delta_bytes': rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+                'parameter_bytes': _parameter_bytes(model),
+            }
+            logging.info(f"Loaded model {key} in {load_seconds:.1f}s")
+            return model
+
+    def is_loaded(self, key):
+        return key in self._models
+
+    def metrics(self):
+        """
+        Returns load metrics for every model loaded so far.
+
+        Returns:
+            dict: Maps each model key to its `load_seconds`, `rss_delta_bytes` and `parameter_bytes`.
+        """
+        return {key: dict(values) for key, values in self._metrics.items()}
+
+    def add_metrics(self, metrics, source):
+        """
+        Records load metrics of models loaded in another process, such as a CPU pool worker.
+
+        Args:
+            metrics (dict): The other process's `metrics()`.
+            source (str): Names the process; the models are listed as '<key> (<source>)'.
+        """
+        with self._lock:
+            for key, values in metrics.items():
+                self._metrics[f"{key} ({source})"] = dict(values)
+
+    def clear(self):
+        """Drops every loaded model so the next request loads it again."""
+        with self._lock:
+            self._models.clear()
+            self._metrics.clear()
+
+
+# Shared by all pipelines in the process
+registry = ModelRegistry()
+
+
+def _load_sentence_transformer(name, backend):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == 'onnx':
+        # Needs sentence-transformers >= 3.2 with the optimum/onnxruntime extras installed
+        return SentenceTransformer(name, backend='onnx', device='cpu')
+
+    if backend == 'quantized':
+        import torch
+        model = SentenceTransformer(name, device='cpu')
+        # Dynamic int8 quantisation of the linear layers; CPU inference only
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend != 'torch':
+        raise ValueError(f"Unknown embedding backend '{backend}', expected 'torch', 'onnx' or 'quantized'")
+    return SentenceTransformer(name)
+
+
+def embedding_backend():
+    """Returns the configured embedding backend: EMBEDDING_BACKEND, or 'torch' when it is not set."""
+    return os.environ.get('EMBEDDING_BACKEND', 'torch')
+
+
+def get_sentence_transformer(name, backend=None):
+    """
+    Returns the shared SentenceTransformer `name`, loading it on first use.
+
+    Args:
+        name (str): The sentence-transformers model name.
+        backend (str, optional): 'torch', 'onnx' or 'quantized'. Defaults to the
+            EMBEDDING_BACKEND environment variable, or 'torch' when it is not set.
+
+    Returns:
+        SentenceTransformer: The loaded model.
+    """
+    backend = backend or embedding_backend()
+    return registry.get(f'sentence-transformers:{name}:{backend}', lambda: _load_sentence_transformer(name, backend))
+
+
+def get_spacy_model(name):
+    """
+    Returns the shared spaCy pipeline `name`, loading it on first use.
+
+    Args:
+        name (str): The spaCy model package name.
+
+    Returns:
+        spacy.language.Language: The loaded pipeline.
+    """
+    def load():
+        import spacy
+        return spacy.load(name)
+
+    return registry.get(f'spacy:{name}', load)
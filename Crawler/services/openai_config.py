@@ -0,0 +1,16 @@
+import os
+
+# The endpoint the OpenAI client uses when no base URL is configured
+DEFAULT_OPENAI_BASE_URL = 'https://api.openai.com/v1'
+
+
+def openai_base_url(base_url=None):
+    """
+    Returns the API base URL for an OpenAI client: `base_url`, else OPENAI_BASE_URL, else the
+    OpenAI API.
+
+    The client reads OPENAI_BASE_URL itself when given base_url=None, and an empty value (an
+    `OPENAI_BASE_URL=` line in .env) makes every request fail, so the URL is always resolved
+    here and passed explicitly.
+    """
+    return base_url or os.environ.get('OPENAI_BASE_URL') or DEFAULT_OPENAI_BASE_URL
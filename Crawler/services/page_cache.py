@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class PageCache:
+    """
+    A persistent SQLite store of fetched pages for conditional GET requests.
+
+    Each page is keyed by request fingerprint and keeps its ETag and Last-Modified
+    validators, a sha1 hash of the body, the zlib-compressed body and the headers needed to
+    rebuild the response.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the SQLite database file (created if missing).
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "fingerprint TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "body_hash TEXT NOT NULL, body BLOB NOT NULL, headers TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def body_hash(body):
+        return hashlib.sha1(body).hexdigest()
+
+    def get(self, fingerprint):
+        """
+        Looks up a stored page.
+
+        Returns:
+            dict or None: `url`, `etag`, `last_modified`, `body_hash`, `headers` and
+            `fetched_at`, or None if the page is not stored. The body is read separately
+            with `body`.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url, etag, last_modified, body_hash, headers, fetched_at FROM pages WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(('url', 'etag', 'last_modified', 'body_hash', 'headers', 'fetched_at'), row))
+        entry['headers'] = json.loads(entry['headers'])
+        return entry
+
+    def body(self, fingerprint):
+        """Returns the stored, decompressed body of a page, or None if it is not stored."""
+        with self._lock:
+            row = self.conn.execute("SELECT body FROM pages WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def put(self, fingerprint, url, body, etag=None, last_modified=None, headers=None):
+        """Stores a page, replacing any earlier copy."""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(fingerprint, url, etag, last_modified, body_hash, body, headers, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint, url, etag, last_modified, self.body_hash(body), zlib.compress(body),
+                 json.dumps(headers or {}), time.time()),
+            )
+            self.conn.commit()
+
+    def touch(self, fingerprint, etag=None, last_modified=None):
+        """Marks a stored page as revalidated now, updating any validators the server sent."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE pages SET fetched_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE fingerprint = ?",
+                (time.time(), etag, last_modified, fingerprint),
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
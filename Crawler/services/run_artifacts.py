@@ -0,0 +1,123 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+
+class RunArtifacts:
+    """
+    Writes what a run produced at each stage as gzip-compressed JSON Lines.
+
+    Every run gets its own directory, `<directory>/<run id>/`, holding one
+    `<artifact>.jsonl.gz` file per artifact (e.g. `scraped_items`, `groups`, `drafts`).
+    Files are opened on the first record and records are appended as the stages produce
+    them, so nothing is held back in memory and no file is rewritten. Writes from several
+    threads are serialised per writer.
+    """
+    enabled = True
+
+    def __init__(self, directory, run_id=None, compresslevel=6):
+        """
+        Args:
+            directory (str): Parent directory of the per-run directories.
+            run_id (str, optional): Name of this run's directory; defaults to the start time.
+            compresslevel (int): gzip compression level, 1 (fastest) to 9 (smallest).
+        """
+        self.run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+        self.directory = os.path.join(directory, self.run_id)
+        self.compresslevel = compresslevel
+        self._files = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, artifact):
+        return os.path.join(self.directory, f'{artifact}.jsonl.gz')
+
+    def write(self, artifact, record):
+        """Appends one JSON-serialisable record to `artifact`."""
+        self.write_many(artifact, [record])
+
+    def write_many(self, artifact, records):
+        """Appends several records to `artifact`; values json cannot encode are written as str()."""
+        lines = ''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records)
+        if not lines:
+            return
+        with self._lock:
+            file = self._files.get(artifact)
+            if file is None:
+                file = self._files[artifact] = gzip.open(
+                    self.path(artifact), 'at', encoding='utf-8', compresslevel=self.compresslevel)
+            file.write(lines)
+
+    def flush(self):
+        with self._lock:
+            for file in self._files.values():
+                file.flush()
+
+    def close(self):
+        with self._lock:
+            for file in self._files.values():
+                file.close()
+            self._files.clear()
+
+
+class DisabledRunArtifacts:
+    """Stands in for RunArtifacts when artifacts are switched off: every write is a no-op."""
+    enabled = False
+    directory = None
+
+    def write(self, artifact, record):
+        pass
+
+    def write_many(self, artifact, records):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def read_artifact(path):
+    """Yields the records of a `.jsonl.gz` artifact file one at a time."""
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def item_record(item, **extra):
+    """Returns a scraped item (a scrapy.Item or a dict) as a plain dict, with `extra` fields added."""
+    record = dict(item)
+    record.update(extra)
+    return record
+
+
+_run_artifacts = None
+_run_artifacts_lock = threading.Lock()
+
+
+def run_artifacts():
+    """
+    Returns the process-wide artifact writer configured from the environment.
+
+    Artifacts are off unless RUN_ARTIFACTS_DIR is set; RUN_ARTIFACTS_COMPRESSLEVEL sets the
+    gzip level.
+
+    Returns:
+        RunArtifacts or DisabledRunArtifacts: The shared writer.
+    """
+    global _run_artifacts
+    with _run_artifacts_lock:
+        if _run_artifacts is None:
+            directory = os.environ.get('RUN_ARTIFACTS_DIR')
+            if directory:
+                _run_artifacts = RunArtifacts(
+                    directory, compresslevel=int(os.environ.get('RUN_ARTIFACTS_COMPRESSLEVEL', 6)))
+                logging.info(f"Writing run artifacts to {_run_artifacts.directory}")
+            else:
+                _run_artifacts = DisabledRunArtifacts()
+        return _run_artifacts
@@ -0,0 +1,228 @@
+import logging
+
+import numpy as np
+
+
+def normalize_rows(vectors):
+    """Returns `vectors` as a float32 2D array with unit-length rows."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _GrowableMatrix:
+    """A row buffer that grows geometrically so repeated appends stay amortised O(1)."""
+
+    def __init__(self, dim=None):
+        self.dim = dim
+        self.size = 0
+        self._data = np.empty((0, dim or 0), dtype=np.float32)
+
+    def append(self, rows):
+        if self.dim is None:
+            self.dim = rows.shape[1]
+            self._data = np.empty((0, self.dim), dtype=np.float32)
+        needed = self.size + len(rows)
+        if needed > len(self._data):
+            capacity = max(needed, 2 * len(self._data), 64)
+            grown = np.empty((capacity, self.dim), dtype=np.float32)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = rows
+        self.size = needed
+
+    @property
+    def rows(self):
+        return self._data[:self.size]
+
+
+class SimilarityIndex:
+    """
+    Interface for cosine-similarity lookups against a growing set of embeddings.
+
+    Vectors are normalised on the way in, so similarities are plain dot products.
+    """
+
+    def add(self, vectors):
+        """
+        Adds embeddings to the index.
+
+        Args:
+            vectors (array-like): A single embedding or a 2D array with one embedding per row.
+        """
+        raise NotImplementedError
+
+    def max_similarity(self, queries):
+        """
+        Finds the highest cosine similarity of each query against the indexed embeddings.
+
+        Args:
+            queries (array-like): A single embedding or a 2D array with one query per row.
+
+        Returns:
+            np.ndarray: One score per query; 0 for every query when the index is empty.
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class BruteForceIndex(SimilarityIndex):
+    """Exact index that scores every query against every stored embedding."""
+
+    def __init__(self, block_size=65536):
+        """
+        Args:
+            block_size (int): Number of stored rows scored per matrix product, bounding peak memory.
+        """
+        self.block_size = block_size
+        self._vectors = _GrowableMatrix()
+
+    def __len__(self):
+        return self._vectors.size
+
+    def add(self, vectors):
+        vectors = normalize_rows(vectors)
+        if len(vectors):
+            self._vectors.append(vectors)
+
+    def max_similarity(self, queries):
+        queries = normalize_rows(queries)
+        best = np.zeros(len(queries), dtype=np.float32)
+        if not len(self) or not len(queries):
+            return best
+        best.fill(-np.inf)
+        stored = self._vectors.rows
+        for start in range(0, len(stored), self.block_size):
+            scores = queries @ stored[start:start + self.block_size].T
+            np.maximum(best, scores.max(axis=1), out=best)
+        return best
+
+
+class IVFIndex(SimilarityIndex):
+    """
+    Approximate inverted-file index built on NumPy.
+
+    Embeddings are assigned to the nearest of `nlist` spherical k-means centroids and a
+    query is only scored against the `nprobe` lists whose centroids are closest to it.
+    Until `train_size` embeddings have been added the index answers exactly; it then
+    trains its centroids once and keeps assigning later additions incrementally.
+    """
+
+    def __init__(self, nlist=None, nprobe=8, train_size=4096, kmeans_iterations=10, seed=0):
+        """
+        Args:
+            nlist (int, optional): Number of inverted lists. Defaults to about sqrt(N) at training time.
+            nprobe (int): Number of lists scanned per query.
+            train_size (int): Number of embeddings to collect before the centroids are trained.
+            kmeans_iterations (int): Lloyd iterations run when training.
+            seed (int): Seed for the training sample and the initial centroids.
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.kmeans_iterations = kmeans_iterations
+        self._rng = np.random.default_rng(seed)
+        self._pending = BruteForceIndex()  # exact fallback until the centroids are trained
+        self.centroids = None
+        self._lists = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def add(self, vectors):
+        vectors = normalize_rows(vectors)
+        if not len(vectors):
+            return
+        self._size += len(vectors)
+        if self.is_trained:
+            self._assign(vectors)
+            return
+        self._pending.add(vectors)
+        if len(self._pending) >= self.train_size:
+            self._train(self._pending._vectors.rows)
+            self._pending = None
+
+    def _train(self, vectors):
+        """Runs spherical k-means on a sample of `vectors` and fills the inverted lists."""
+        nlist = self.nlist or max(1, int(np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+        sample_size = min(len(vectors), 256 * nlist)
+        sample = vectors[self._rng.choice(len(vectors), sample_size, replace=False)]
+
+        centroids = sample[self._rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            # Keep the previous centroid for lists that lost all their members
+            empty = counts == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+
+        self.centroids = centroids
+        self._lists = [_GrowableMatrix(vectors.shape[1]) for _ in range(nlist)]
+        self._assign(vectors)
+        logging.info(f"Trained IVF similarity index with {nlist} lists on {sample_size} embeddings")
+
+    def _assign(self, vectors):
+        assignment = np.argmax(vectors @ self.centroids.T, axis=1)
+        for list_id in np.unique(assignment):
+            self._lists[list_id].append(vectors[assignment == list_id])
+
+    def max_similarity(self, queries):
+        queries = normalize_rows(queries)
+        if not self.is_trained:
+            return self._pending.max_similarity(queries)
+
+        best = np.zeros(len(queries), dtype=np.float32)
+        if not len(queries):
+            return best
+        best.fill(-np.inf)
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        # Score each probed list once against all the queries that probe it
+        for list_id in np.unique(probes):
+            members = self._lists[list_id]
+            if not members.size:
+                continue
+            query_ids = np.nonzero((probes == list_id).any(axis=1))[0]
+            scores = queries[query_ids] @ members.rows.T
+            best[query_ids] = np.maximum(best[query_ids], scores.max(axis=1))
+
+        # Queries whose probed lists were all empty have nothing to compare against
+        best[np.isinf(best)] = 0.0
+        return best
+
+
+def build_similarity_index(kind='exact', **kwargs):
+    """
+    Creates a similarity index backend by name.
+
+    Args:
+        kind (str): 'exact' for brute force or 'ivf' for the approximate inverted-file index.
+        **kwargs: Passed to the backend's constructor.
+
+    Returns:
+        SimilarityIndex: The requested index.
+    """
+    backends = {
+        'exact': BruteForceIndex,
+        'ivf': IVFIndex,
+    }
+    if kind not in backends:
+        raise ValueError(f"Unknown similarity index '{kind}', expected one of {sorted(backends)}")
+    return backends[kind](**kwargs)
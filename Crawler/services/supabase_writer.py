@@ -0,0 +1,129 @@
+import logging
+import time
+from collections import namedtuple
+
+from services.metrics import metrics
+
+DB_WRITE_SECONDS = metrics.histogram('crawler_db_write_seconds', 'Database write requests and transactions', ['database'])
+DB_ROWS_WRITTEN = metrics.counter('crawler_db_rows_written_total', 'Rows written to a database', ['database', 'outcome'])
+
+# Outcome of a single buffered row: `key` is whatever the caller passed to `add`
+RowOutcome = namedtuple('RowOutcome', ['key', 'row', 'ok', 'error'])
+
+
+def is_transient_error(error):
+    """
+    Tells connection failures, timeouts and 5xx responses apart from errors caused by the
+    rows themselves.
+
+    Returns:
+        bool: True if retrying the same request later may succeed.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # httpx, which supabase-py uses, raises TransportError subclasses for network failures
+    if any(cls.__name__ in ('TransportError', 'TimeoutException') for cls in type(error).__mro__):
+        return True
+    response = getattr(error, 'response', None)
+    for status in (getattr(error, 'status_code', None), getattr(response, 'status_code', None), getattr(error, 'code', None)):
+        try:
+            if 500 <= int(status) < 600:
+                return True
+        except (TypeError, ValueError):
+            pass
+    return False
+
+
+class SupabaseBatchWriter:
+    """
+    Buffers rows for one table and inserts them in chunks, one request per chunk.
+
+    A chunk that fails with a connection error, timeout or 5xx response is retried with
+    exponential backoff; if it still fails, all of its rows fail without further requests,
+    so an outage costs a few requests per chunk rather than one per row. A chunk rejected
+    for its contents (e.g. a constraint violation) is split in half and each half is tried
+    on its own, so a single bad row is isolated instead of aborting the rest of the batch.
+    Every row ends up with a `RowOutcome`.
+
+    The client only needs `client.table(name).insert(rows).execute()`, so any local stand-in
+    object with that shape can be used in place of a Supabase client.
+
+    Requests and retry delays block the calling thread, so the writer is run from a worker
+    thread (the reactor's thread pool), never from the reactor thread itself.
+    """
+
+    def __init__(self, client, table, chunk_size=100, max_retries=3, backoff=1.0, sleep=time.sleep):
+        """
+        Args:
+            client: A Supabase client, or any object exposing `table(name).insert(rows).execute()`.
+            table (str): Name of the table rows are inserted into.
+            chunk_size (int): Maximum number of rows sent per insert request.
+            max_retries (int): Number of retries of a chunk that fails with a transient error.
+            backoff (float): Delay in seconds before the first retry; doubled on each further retry.
+            sleep (Callable[[float], None]): Used to wait between retries.
+        """
+        self.client = client
+        self.table = table
+        self.chunk_size = max(1, chunk_size)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self._buffer = []
+        self.outcomes = []
+
+    def add(self, row, key=None):
+        """
+        Buffers a row, flushing the buffer once a full chunk is waiting.
+
+        Args:
+            row (dict): The row to insert.
+            key: Identifies the row in its `RowOutcome`; defaults to the row itself.
+
+        Returns:
+            List[RowOutcome]: Outcomes of the rows flushed by this call, if any.
+        """
+        self._buffer.append((key, row))
+        if len(self._buffer) >= self.chunk_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """
+        Inserts every buffered row.
+
+        Returns:
+            List[RowOutcome]: One outcome per flushed row, in the order the rows were added.
+        """
+        outcomes = []
+        while self._buffer:
+            chunk, self._buffer = self._buffer[:self.chunk_size], self._buffer[self.chunk_size:]
+            outcomes.extend(self._insert_chunk(chunk, self.max_retries))
+        self.outcomes.extend(outcomes)
+        return outcomes
+
+    def _insert_chunk(self, chunk, retries):
+        delay = self.backoff
+        for attempt in range(retries + 1):
+            try:
+                with DB_WRITE_SECONDS.time(database='supabase'):
+                    self.client.table(self.table).insert([row for _, row in chunk]).execute()
+                DB_ROWS_WRITTEN.inc(len(chunk), database='supabase', outcome='ok')
+                return [RowOutcome(key, row, True, None) for key, row in chunk]
+            except Exception as e:
+                error = e
+                if not is_transient_error(e):
+                    break
+                if attempt < retries:
+                    logging.warning(f"Insert of {len(chunk)} rows into {self.table} failed ({e}), retrying in {delay:.1f}s")
+                    self.sleep(delay)
+                    delay *= 2
+
+        if len(chunk) == 1 or is_transient_error(error):
+            # Splitting only helps to isolate bad rows; the service itself is failing
+            logging.error(f"Error inserting {len(chunk)} rows into {self.table}: {error}")
+            DB_ROWS_WRITTEN.inc(len(chunk), database='supabase', outcome='failed')
+            return [RowOutcome(key, row, False, error) for key, row in chunk]
+
+        # The chunk was rejected; split it to isolate the rows that cannot be inserted
+        middle = len(chunk) // 2
+        return self._insert_chunk(chunk[:middle], retries) + self._insert_chunk(chunk[middle:], retries)
@@ -0,0 +1,164 @@
+import atexit
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class TranslationCache:
+    """
+    A persistent SQLite cache of translations keyed by source text, target language and model.
+
+    Every lookup refreshes the entry's last-used time, and the least recently used entries
+    are evicted once the cache holds more than `max_entries` translations. Last-used times
+    of hits are buffered in memory and written together with the next store, eviction pass
+    or every `TOUCH_EVERY` hits, so a lookup does not commit a transaction. Hit and miss
+    counters are kept for the lifetime of the instance.
+    """
+
+    # How many new entries are written between two eviction passes
+    EVICT_EVERY = 64
+    # How many hits are buffered before their last-used times are written
+    TOUCH_EVERY = 256
+
+    def __init__(self, path, max_entries=100000):
+        """
+        Args:
+            path (str): Path of the SQLite database file (created if missing).
+            max_entries (int): Maximum number of translations kept on disk.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._touched = {}  # key -> last-used time not written yet
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Spider callbacks and worker threads may share one cache
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text, target_language, model):
+        """
+        Returns the sha256 hex digest identifying a translation request.
+
+        Surrounding whitespace is ignored, so the sync and async translators, which strip the
+        text differently, share entries.
+        """
+        return hashlib.sha256(f"{model}\0{target_language}\0{text.strip()}".encode('utf-8')).hexdigest()
+
+    def get(self, text, target_language, model):
+        """
+        Looks up a cached translation.
+
+        Returns:
+            str or None: The cached translation, or None on a miss.
+        """
+        key = self.make_key(text, target_language, model)
+        with self._lock:
+            row = self.conn.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.TOUCH_EVERY:
+                self._write_touches()
+                self.conn.commit()
+            return row[0]
+
+    def set(self, text, target_language, model, translation):
+        """Stores a translation, evicting the least recently used entries when the cache is full."""
+        key = self.make_key(text, target_language, model)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)",
+                (key, translation, time.time()),
+            )
+            self._touched.pop(key, None)
+            self._write_touches()
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict()
+            self.conn.commit()
+
+    def _write_touches(self):
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE translations SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            logging.info(f"Evicted {excess} least recently used translations from {self.path}")
+
+    def stats(self):
+        """
+        Returns the cache's counters.
+
+        Returns:
+            dict: `hits`, `misses`, `hit_rate` and the number of stored `entries`.
+        """
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._write_touches()
+            self.conn.commit()
+            self.conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_translation_cache():
+    """
+    Returns the process-wide translation cache configured from the environment.
+
+    TRANSLATION_CACHE_PATH sets the database file (an empty value disables caching) and
+    TRANSLATION_CACHE_MAX_ENTRIES the eviction limit.
+
+    Returns:
+        TranslationCache or None: The shared cache, or None when caching is disabled.
+    """
+    global _default_cache
+    path = os.environ.get('TRANSLATION_CACHE_PATH', '.translation_cache.sqlite')
+    if not path:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            max_entries = int(os.environ.get('TRANSLATION_CACHE_MAX_ENTRIES', 100000))
+            _default_cache = TranslationCache(path, max_entries=max_entries)
+            # Writes the buffered last-used times on exit
+            atexit.register(_default_cache.close)
+        return _default_cache
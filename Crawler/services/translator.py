@@ -1,24 +1,51 @@
 from openai import OpenAI
 import logging
 
+from services.metrics import metrics
+from services.openai_config import openai_base_url
+from services.translation_cache import default_translation_cache
+
+# The same metrics AsyncTranslator records, labelled client='sync'
+TRANSLATION_SECONDS = metrics.histogram('crawler_translation_request_seconds', 'Translation API requests', ['client'])
+TRANSLATED_FIELDS = metrics.counter(
+    'crawler_translated_fields_total', 'Fields translated, by where the translation came from', ['source'])
+
 class Translator:
-    def __init__(self, api_key):
-        self.openai_client = OpenAI(api_key=api_key)
+    def __init__(self, api_key, cache=None, model="gpt-4-0125-preview"):
+        self.openai_client = OpenAI(api_key=api_key, base_url=openai_base_url())
+        self.model = model
+        # Translations are looked up here before calling the API; None uses the shared cache,
+        # which TRANSLATION_CACHE_PATH= (empty) disables
+        self.cache = cache if cache is not None else default_translation_cache()
 
     def translate_text(self, text_to_translate, target_language='English'):
+        if self.cache is not None:
+            cached = self.cache.get(text_to_translate, target_language, self.model)
+            if cached is not None:
+                TRANSLATED_FIELDS.inc(source='cache')
+                return cached
         try:
-            chat_completion = self.openai_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Translate this to {target_language}: {text_to_translate}",
-                    }
-                ],
-                model="gpt-4-0125-preview",
-            )
+            with TRANSLATION_SECONDS.time(client='sync'):
+                chat_completion = self.openai_client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": f"Translate this to {target_language}: {text_to_translate}",
+                        }
+                    ],
+                    model=self.model,
+                )
             # Extract the translated text
             translated_text = chat_completion.choices[0].message.content
+            TRANSLATED_FIELDS.inc(source='api')
+            if self.cache is not None and translated_text is not None:
+                self.cache.set(text_to_translate, target_language, self.model, translated_text)
             return translated_text
         except Exception as e:
+            TRANSLATED_FIELDS.inc(source='failed')
             logging.error(f'Error translating text: {e}')
-            return None
\ No newline at end of file
+            return None
+
+    def cache_stats(self):
+        """Returns the translation cache's hit/miss counters, or None when caching is disabled."""
+        return self.cache.stats() if self.cache is not None else None
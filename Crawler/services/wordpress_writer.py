@@ -0,0 +1,162 @@
+import logging
+from collections import Counter
+
+from services.metrics import metrics
+
+# The same metrics SupabaseBatchWriter records, labelled database='wordpress'
+DB_WRITE_SECONDS = metrics.histogram('crawler_db_write_seconds', 'Database write requests and transactions', ['database'])
+DB_ROWS_WRITTEN = metrics.counter('crawler_db_rows_written_total', 'Rows written to a database', ['database', 'outcome'])
+
+# Columns of <prefix>posts written for each draft, in insert order
+POST_COLUMNS = (
+    'post_author', 'post_date', 'post_date_gmt', 'post_content', 'post_title', 'post_excerpt',
+    'post_status', 'comment_status', 'ping_status', 'post_password', 'post_name', 'to_ping',
+    'pinged', 'post_modified', 'post_modified_gmt', 'post_content_filtered', 'post_parent',
+    'guid', 'menu_order', 'post_type', 'post_mime_type', 'comment_count',
+)
+
+
+class WordPressWriter:
+    """
+    Writes posts and their category links to a WordPress MySQL/MariaDB database in batches.
+
+    Category term_taxonomy ids are looked up (or created) once and cached. Queued posts are
+    written in one transaction per batch: one INSERT per post, their category links with a
+    single multi-row INSERT, and one count update per category. Each post's id is the
+    lastrowid of its own INSERT, so the ids do not depend on how the server numbers the rows
+    of a multi-row insert (innodb_autoinc_lock_mode, auto_increment_increment). A batch that
+    fails twice is written one post per transaction.
+    """
+
+    def __init__(self, conn, table_prefix='wp_', batch_size=50):
+        """
+        Args:
+            conn: An open mysql.connector connection.
+            table_prefix (str): WordPress table prefix, e.g. 'wp_'.
+            batch_size (int): Number of queued posts that triggers a write.
+        """
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.table_prefix = table_prefix
+        self.batch_size = batch_size
+        self._category_ids = {}
+        self._pending = []
+
+    def table(self, name):
+        return f"{self.table_prefix}{name}"
+
+    def category_id(self, category_name):
+        """
+        Returns the term_taxonomy_id of a category, creating the category if it does not exist.
+
+        Args:
+            category_name (str): The name of the category.
+
+        Returns:
+            int: The category's term_taxonomy_id.
+        """
+        if category_name in self._category_ids:
+            return self._category_ids[category_name]
+
+        self.cur.execute(
+            f"SELECT tt.term_taxonomy_id FROM {self.table('terms')} AS t "
+            f"INNER JOIN {self.table('term_taxonomy')} AS tt ON t.term_id = tt.term_id "
+            "WHERE t.name = %s AND tt.taxonomy = 'category'",
+            (category_name,),
+        )
+        result = self.cur.fetchone()
+        if result:
+            term_taxonomy_id = result[0]
+        else:
+            slug = category_name.lower().replace(" ", "-")  # Simple slug creation
+            self.cur.execute(f"INSERT INTO {self.table('terms')} (name, slug) VALUES (%s, %s)", (category_name, slug))
+            self.cur.execute(
+                f"INSERT INTO {self.table('term_taxonomy')} (term_id, taxonomy, description) VALUES (%s, %s, %s)",
+                (self.cur.lastrowid, 'category', ''),
+            )
+            term_taxonomy_id = self.cur.lastrowid
+            self.conn.commit()
+            logging.info(f"Created category '{category_name}' with term_taxonomy_id {term_taxonomy_id}")
+
+        self._category_ids[category_name] = term_taxonomy_id
+        return term_taxonomy_id
+
+    def add_post(self, post, category_name):
+        """
+        Queues a post, writing the queue once it holds `batch_size` posts.
+
+        Args:
+            post (dict): Values for the POST_COLUMNS of the post.
+            category_name (str): Category the post is linked to.
+        """
+        self._pending.append((tuple(post[column] for column in POST_COLUMNS), self.category_id(category_name)))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the queued posts.
+
+        The posts are written in one transaction, which is tried a second time if it fails.
+        If the retry fails too, each post is written in its own transaction, so one bad row
+        does not discard the rest of the batch.
+
+        Returns:
+            List[int]: The ids of the inserted posts; empty if nothing was queued or every
+            post failed.
+        """
+        if not self._pending:
+            return []
+        pending, self._pending = self._pending, []
+
+        for attempt in (1, 2):
+            try:
+                post_ids = self._write(pending)
+                break
+            except Exception as e:
+                self.conn.rollback()
+                logging.warning(f"Failed to write {len(pending)} posts (attempt {attempt}), transaction rolled back: {e}")
+        else:
+            post_ids = self._write_one_by_one(pending)
+            if not post_ids:
+                return []
+
+        DB_ROWS_WRITTEN.inc(len(post_ids), database='wordpress', outcome='ok')
+        logging.info(f"Inserted {len(post_ids)} posts with IDs {post_ids[0]}-{post_ids[-1]}")
+        return post_ids
+
+    def _write(self, pending):
+        """Writes `pending` posts and their category links in one transaction and returns their ids."""
+        insert_posts = (
+            f"INSERT INTO {self.table('posts')} ({', '.join(POST_COLUMNS)}) "
+            f"VALUES ({', '.join(['%s'] * len(POST_COLUMNS))})"
+        )
+        with DB_WRITE_SECONDS.time(database='wordpress'):
+            post_ids = []
+            for row, _ in pending:
+                self.cur.execute(insert_posts, row)
+                post_ids.append(self.cur.lastrowid)
+
+            category_ids = [category_id for _, category_id in pending]
+            self.cur.executemany(
+                f"INSERT INTO {self.table('term_relationships')} (object_id, term_taxonomy_id) VALUES (%s, %s)",
+                list(zip(post_ids, category_ids)),
+            )
+            self.cur.executemany(
+                f"UPDATE {self.table('term_taxonomy')} SET count = count + %s WHERE term_taxonomy_id = %s",
+                [(count, category_id) for category_id, count in Counter(category_ids).items()],
+            )
+            self.conn.commit()
+        return post_ids
+
+    def _write_one_by_one(self, pending):
+        """Writes each of `pending` in its own transaction, returning the ids of the posts that were written."""
+        post_ids = []
+        for post in pending:
+            try:
+                post_ids.extend(self._write([post]))
+            except Exception as e:
+                self.conn.rollback()
+                DB_ROWS_WRITTEN.inc(database='wordpress', outcome='failed')
+                logging.error(f"Failed to write post '{post[0][POST_COLUMNS.index('post_title')]}', transaction rolled back: {e}")
+        return post_ids
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from benchmarks.stub_openai import StubOpenAIServer
+from services.async_translator import AsyncTranslator, TokenBucket
+from services.translation_cache import TranslationCache
+
+
+@pytest.fixture
+def stub_server():
+    server = StubOpenAIServer(latency=0.2).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'translations.sqlite'))
+    yield cache
+    cache.close()
+
+
+def make_translator(server, cache, **kwargs):
+    return AsyncTranslator(api_key='test', cache=cache, base_url=server.url, **kwargs)
+
+
+def test_token_bucket_limits_the_rate():
+    async def acquire_all():
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # The first token is available at once, the other four arrive 50 ms apart
+    elapsed = asyncio.run(acquire_all())
+    assert 0.18 <= elapsed < 0.5
+
+
+def test_translate_fields_in_one_json_request(stub_server, cache):
+    translator = make_translator(stub_server, cache)
+    fields = {'header': 'Заголовок', 'content': 'Текст статьи', 'img_caption': '  ', 'sub_header': None}
+
+    translated = asyncio.run(translator.translate_fields(fields))
+
+    # The stub echoes the JSON object back, so each field "translates" to its stripped source
+    assert translated == {'header': 'Заголовок', 'content': 'Текст статьи', 'img_caption': None, 'sub_header': None}
+    assert stub_server.requests['translation'] == 1
+
+
+def test_cached_fields_are_not_sent_again(stub_server, cache):
+    translator = make_translator(stub_server, cache)
+
+    async def translate_twice():
+        await translator.translate_fields({'header': 'Заголовок'})
+        return await translator.translate_fields({'header': 'Заголовок', 'content': 'Текст'})
+
+    translated = asyncio.run(translate_twice())
+
+    assert translated == {'header': 'Заголовок', 'content': 'Текст'}
+    assert stub_server.requests['translation'] == 2
+    assert cache.stats()['hits'] == 1
+
+
+def test_concurrency_is_limited_by_the_semaphore(stub_server, cache):
+    translator = make_translator(stub_server, cache, max_concurrency=2, requests_per_minute=6000)
+
+    async def translate_all():
+        return await asyncio.gather(*(translator.translate_text(f'text {i}') for i in range(6)))
+
+    assert asyncio.run(translate_all()) == [f'text {i}' for i in range(6)]
+    assert stub_server.requests['translation'] == 6
+    assert stub_server.max_in_flight == 2
+
+
+def test_invalid_json_response_is_a_failure(stub_server, cache, monkeypatch):
+    monkeypatch.setattr('benchmarks.stub_openai.completion_text', lambda prompt, json_mode=False: ('translation', 'not json'))
+    translator = make_translator(stub_server, cache)
+
+    translated = asyncio.run(translator.translate_fields({'header': 'Заголовок'}))
+
+    assert translated == {'header': None}
+    # Failures are not cached, so the next run asks again
+    assert cache.stats()['entries'] == 0
+
+
+def test_non_object_response_is_a_failure(stub_server, cache, monkeypatch):
+    # A JSON reply that is not an object cannot be mapped back to the fields
+    monkeypatch.setattr('benchmarks.stub_openai.completion_text', lambda prompt, json_mode=False: ('translation', json.dumps(['x'])))
+    translator = make_translator(stub_server, cache)
+
+    assert asyncio.run(translator.translate_fields({'header': 'Заголовок'})) == {'header': None}
+
+
+def test_cache_key_ignores_surrounding_whitespace(stub_server, cache):
+    # The sync Translator stores the raw text; AsyncTranslator looks up the stripped text
+    cache.set('  Заголовок\n', 'English', 'gpt-4-0125-preview', 'Header')
+    translator = make_translator(stub_server, cache, model='gpt-4-0125-preview')
+
+    translated = asyncio.run(translator.translate_fields({'header': 'Заголовок'}))
+
+    assert translated == {'header': 'Header'}
+    assert stub_server.requests.get('translation', 0) == 0
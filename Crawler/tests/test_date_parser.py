@@ -0,0 +1,32 @@
+from datetime import date, datetime
+
+import pytest
+
+from services.date_parser import DateParser
+
+
+@pytest.mark.parametrize('text, today, expected', [
+    ('29 февраля, 10:30', date(2024, 3, 1), datetime(2024, 2, 29, 10, 30)),
+    ('29 February', date(2024, 2, 29), datetime(2024, 2, 29)),
+    # Not a leap year: the 29th can only be from last year
+    ('29 февраля', date(2025, 3, 10), datetime(2024, 2, 29)),
+    # A day later than today is from last year
+    ('20 декабря, 11:45', date(2024, 1, 5), datetime(2023, 12, 20, 11, 45)),
+    ('5 января', date(2024, 1, 5), datetime(2024, 1, 5)),
+])
+def test_dates_without_year(text, today, expected):
+    parser = DateParser(languages=['ru'])
+
+    assert parser.parse(text, today=today) == expected
+    # Parsed by the site formats, without the dateparser fallback
+    assert parser.memo_info()['fallbacks'] == 0
+
+
+def test_relative_and_full_dates():
+    parser = DateParser()
+    today = date(2024, 3, 12)
+
+    assert parser.parse('Сегодня, 09:15', today=today) == datetime(2024, 3, 12, 9, 15)
+    assert parser.parse('Кеча, 18:40', today=today) == datetime(2024, 3, 11, 18, 40)
+    assert parser.parse('3 сентября 2023 г.', today=today) == datetime(2023, 9, 3)
+    assert parser.parse('14:05, 12 mart 2024', today=today) == datetime(2024, 3, 12, 14, 5)
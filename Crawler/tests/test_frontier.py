@@ -0,0 +1,118 @@
+import pytest
+from scrapy import Spider
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from Crawler.items import MarketItem
+from Crawler.middlewares import ConditionalGetMiddleware, FrontierItemMiddleware, IncrementalCrawlMiddleware
+from services.frontier_store import FrontierStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = FrontierStore(str(tmp_path / 'frontier.sqlite'))
+    monkeypatch.setattr(IncrementalCrawlMiddleware, 'store', store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def spider():
+    return Spider.from_crawler(get_crawler(Spider), name='test')
+
+
+def article_response(fingerprint, **meta):
+    url = f'https://example.com/{fingerprint}'
+    meta['frontier_entry'] = {'fingerprint': fingerprint, 'url': url, 'content_hash': 'hash'}
+    return HtmlResponse(url=url, body=b'<html></html>', request=Request(url, meta=meta))
+
+
+def run_callback(response, spider, outputs, rejected=False):
+    def callback():
+        if rejected:
+            response.meta['frontier_rejected'] = True
+        yield from outputs
+    return list(FrontierItemMiddleware().process_spider_output(response, callback(), spider))
+
+
+def test_items_carry_the_frontier_entry(store, spider):
+    response = article_response('a')
+    item, = run_callback(response, spider, [MarketItem(header='Header')])
+
+    assert item['frontier_entry'] == response.meta['frontier_entry']
+    # Recorded by CrawlerPipeline once the item is stored, not when it is parsed
+    assert store.get('a') is None
+
+
+def test_rejected_page_is_recorded(store, spider):
+    assert run_callback(article_response('b'), spider, [], rejected=True) == []
+
+    assert store.get('b')['url'] == 'https://example.com/b'
+    assert spider.crawler.stats.get_value('frontier/rejected') == 1
+
+
+def test_page_without_item_is_fetched_again(store, spider):
+    # e.g. a failed translation: no item and no rejection flag
+    assert run_callback(article_response('c'), spider, []) == []
+
+    assert store.get('c') is None
+
+
+class ListingSpider(Spider):
+    name = 'listing'
+
+    def parse(self, response):
+        for href in response.css('a::attr(href)').getall():
+            yield response.follow(href, callback=self.parse_news_content)
+
+    def parse_news_content(self, response):
+        pass
+
+
+def start_run(tmp_path):
+    crawler = get_crawler(ListingSpider, {
+        'FRONTIER_PATH': str(tmp_path / 'frontier.sqlite'),
+        'CONDITIONAL_GET_PATH': str(tmp_path / 'page_cache.sqlite'),
+    })
+    spider = ListingSpider.from_crawler(crawler)
+    conditional_get = ConditionalGetMiddleware.from_crawler(crawler)
+    frontier = IncrementalCrawlMiddleware.from_crawler(crawler)
+    conditional_get.spider_opened(spider)
+    frontier.spider_opened(spider)
+    return spider, conditional_get, frontier
+
+
+def end_run(spider, conditional_get, frontier):
+    conditional_get.spider_closed(spider)
+    frontier.spider_closed(spider)
+
+
+def fetch_listing(spider, conditional_get, status):
+    request = Request('https://example.com/news', callback=spider.parse)
+    conditional_get.process_request(request, spider)
+    response = HtmlResponse(
+        url=request.url, status=status, request=request, headers={'ETag': '"v1"'},
+        body=b'<a href="/news/1">1</a>' if status == 200 else b'',
+    )
+    return conditional_get.process_response(request, response, spider)
+
+
+def test_article_with_failed_insert_is_fetched_again_from_unchanged_listing(tmp_path):
+    run = start_run(tmp_path)
+    spider, conditional_get, frontier = run
+    listing = fetch_listing(spider, conditional_get, status=200)
+    article, = spider.parse(listing)
+    assert frontier.process_request(article, spider) is None
+    frontier.process_response(article, HtmlResponse(url=article.url, body=b'<h1>1</h1>', request=article), spider)
+    # The article's insert fails, so CrawlerPipeline never records its frontier entry
+    end_run(*run)
+
+    run = start_run(tmp_path)
+    spider, conditional_get, frontier = run
+    listing = fetch_listing(spider, conditional_get, status=304)
+    # The stored listing is parsed again and the article is requested
+    article, = spider.parse(listing)
+    assert article.url == 'https://example.com/news/1'
+    assert frontier.process_request(article, spider) is None
+    assert spider.crawler.stats.get_value('conditional_get/not_modified') == 1
+    end_run(*run)
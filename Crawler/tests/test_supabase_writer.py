@@ -0,0 +1,102 @@
+from services.supabase_writer import SupabaseBatchWriter, is_transient_error
+
+
+class RowError(Exception):
+    """Stands in for a postgrest APIError raised for a constraint violation."""
+
+
+class FakeSupabase:
+    """Records every insert request; `fail` decides which requests raise."""
+
+    def __init__(self, fail=lambda rows: None):
+        self.fail = fail
+        self.requests = []
+        self.inserted = []
+        self._rows = None
+
+    def table(self, name):
+        return self
+
+    def insert(self, rows):
+        self._rows = rows
+        return self
+
+    def execute(self):
+        self.requests.append(list(self._rows))
+        error = self.fail(self._rows)
+        if error is not None:
+            raise error
+        self.inserted.extend(self._rows)
+
+
+def rows(count):
+    return [{'header': f'header {i}'} for i in range(count)]
+
+
+def test_inserts_in_chunks():
+    client = FakeSupabase()
+    writer = SupabaseBatchWriter(client, 'news', chunk_size=4)
+    for position, row in enumerate(rows(10)):
+        writer.add(row, key=position)
+    writer.flush()
+
+    assert [len(request) for request in client.requests] == [4, 4, 2]
+    assert [outcome.key for outcome in writer.outcomes if outcome.ok] == list(range(10))
+
+
+def test_bad_row_is_isolated_by_splitting():
+    client = FakeSupabase(fail=lambda batch: RowError('duplicate key') if {'header': 'header 5'} in batch else None)
+    sleeps = []
+    writer = SupabaseBatchWriter(client, 'news', chunk_size=8, sleep=sleeps.append)
+    for position, row in enumerate(rows(8)):
+        writer.add(row, key=position)
+    writer.flush()
+
+    failed = [outcome.key for outcome in writer.outcomes if not outcome.ok]
+    assert failed == [5]
+    assert len(client.inserted) == 7
+    # Row errors are not retried, so there is no backoff
+    assert sleeps == []
+
+
+def test_outage_is_retried_with_backoff_and_not_split():
+    client = FakeSupabase(fail=lambda batch: ConnectionError('connection refused'))
+    sleeps = []
+    writer = SupabaseBatchWriter(client, 'news', chunk_size=100, max_retries=3, backoff=1.0, sleep=sleeps.append)
+    for position, row in enumerate(rows(100)):
+        writer.add(row, key=position)
+    writer.flush()
+
+    assert len(client.requests) == 4
+    assert sleeps == [1.0, 2.0, 4.0]
+    assert not any(outcome.ok for outcome in writer.outcomes)
+    assert len(writer.outcomes) == 100
+
+
+def test_recovers_when_the_service_comes_back():
+    attempts = []
+
+    def fail(batch):
+        attempts.append(len(batch))
+        return ConnectionError('timed out') if len(attempts) < 3 else None
+
+    client = FakeSupabase(fail=fail)
+    writer = SupabaseBatchWriter(client, 'news', chunk_size=5, max_retries=3, sleep=lambda delay: None)
+    for row in rows(5):
+        writer.add(row)
+    writer.flush()
+
+    assert all(outcome.ok for outcome in writer.outcomes)
+    assert len(client.inserted) == 5
+
+
+def test_is_transient_error():
+    class HTTPError(Exception):
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    assert is_transient_error(ConnectionError())
+    assert is_transient_error(TimeoutError())
+    assert is_transient_error(HTTPError(503))
+    assert not is_transient_error(HTTPError(409))
+    assert not is_transient_error(RowError('duplicate key'))
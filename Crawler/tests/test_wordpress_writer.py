@@ -0,0 +1,108 @@
+import sqlite3
+
+from benchmarks.local_db import WordPressSQLite
+from services.wordpress_writer import POST_COLUMNS, WordPressWriter
+
+
+def post(title):
+    values = {column: '' for column in POST_COLUMNS}
+    values.update(post_title=title, post_status='draft', post_type='post')
+    return values
+
+
+class FlakyConnection:
+    """Wraps a WordPressSQLite connection; `fail` decides which post inserts raise."""
+
+    def __init__(self, database, fail):
+        self.database = database
+        self.fail = fail
+        self.post_inserts = []
+
+    def cursor(self):
+        cursor = self.database.cursor()
+        execute = cursor.execute
+
+        def flaky_execute(query, params=()):
+            if query.startswith('INSERT INTO wp_posts'):
+                title = params[POST_COLUMNS.index('post_title')]
+                self.post_inserts.append(title)
+                if self.fail(title, len(self.post_inserts)):
+                    raise sqlite3.OperationalError(f"cannot insert {title}")
+            execute(query, params)
+        cursor.execute = flaky_execute
+        return cursor
+
+    def commit(self):
+        self.database.commit()
+
+    def rollback(self):
+        self.database.rollback()
+
+
+def titles(database):
+    return [row[0] for row in database.conn.execute("SELECT post_title FROM wp_posts ORDER BY ID")]
+
+
+def test_writes_batch_with_category_links():
+    database = WordPressSQLite()
+    writer = WordPressWriter(database, batch_size=3)
+    writer.add_post(post('a'), 'Markets')
+    writer.add_post(post('b'), 'Policy')
+    post_ids = writer.flush()
+
+    assert post_ids == [1, 2]
+    assert titles(database) == ['a', 'b']
+    links = database.conn.execute("SELECT object_id, term_taxonomy_id FROM wp_term_relationships").fetchall()
+    assert links == [(1, writer.category_id('Markets')), (2, writer.category_id('Policy'))]
+    counts = dict(database.conn.execute("SELECT term_taxonomy_id, count FROM wp_term_taxonomy").fetchall())
+    assert counts == {writer.category_id('Markets'): 1, writer.category_id('Policy'): 1}
+
+
+def test_retries_failed_batch_once():
+    database = WordPressSQLite()
+    conn = FlakyConnection(database, fail=lambda title, attempt: attempt == 1)
+    writer = WordPressWriter(conn, batch_size=10)
+    for title in 'abc':
+        writer.add_post(post(title), 'Markets')
+
+    assert writer.flush() == [1, 2, 3]
+    assert titles(database) == ['a', 'b', 'c']
+    assert database.count('term_relationships') == 3
+
+
+def test_falls_back_to_one_post_per_transaction():
+    database = WordPressSQLite()
+    conn = FlakyConnection(database, fail=lambda title, attempt: title == 'b')
+    writer = WordPressWriter(conn, batch_size=10)
+    for title in 'abc':
+        writer.add_post(post(title), 'Markets')
+
+    post_ids = writer.flush()
+
+    assert titles(database) == ['a', 'c']
+    assert len(post_ids) == 2
+    links = database.conn.execute("SELECT object_id FROM wp_term_relationships ORDER BY object_id").fetchall()
+    assert [object_id for object_id, in links] == post_ids
+    count, = database.conn.execute("SELECT count FROM wp_term_taxonomy").fetchone()
+    assert count == 2
+
+
+def test_post_ids_come_from_each_insert():
+    database = WordPressSQLite()
+    # Ids with gaps, as with auto_increment_increment > 1 or ids taken by other writers
+    database.conn.execute("INSERT INTO wp_posts (ID, post_title) VALUES (10, 'existing')")
+    database.conn.execute("INSERT INTO wp_posts (ID, post_title) VALUES (12, 'deleted')")
+    database.conn.execute("DELETE FROM wp_posts WHERE ID = 12")
+    writer = WordPressWriter(database)
+    writer.add_post(post('a'), 'Markets')
+    writer.add_post(post('b'), 'Policy')
+
+    post_ids = writer.flush()
+
+    rows = database.conn.execute("SELECT ID, post_title FROM wp_posts WHERE ID IN (?, ?)", post_ids).fetchall()
+    assert dict(rows) == {post_ids[0]: 'a', post_ids[1]: 'b'}
+    links = database.conn.execute(
+        "SELECT p.post_title, r.term_taxonomy_id FROM wp_term_relationships AS r "
+        "INNER JOIN wp_posts AS p ON p.ID = r.object_id ORDER BY p.ID"
+    ).fetchall()
+    assert links == [('a', writer.category_id('Markets')), ('b', writer.category_id('Policy'))]